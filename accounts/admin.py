@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from .models import OutboundEmail, PlatformStats, User
 
 
 @admin.register(User)
@@ -24,3 +24,25 @@ class UserAdmin(BaseUserAdmin):
             'fields': ('email', 'phone_number', 'preferred_currency')
         }),
     )
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'attempts', 'latency_ms', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject', 'message_id']
+    readonly_fields = ['message_id', 'latency_ms', 'created_at', 'sent_at', 'last_error']
+    ordering = ['-created_at']
+
+
+@admin.register(PlatformStats)
+class PlatformStatsAdmin(admin.ModelAdmin):
+    list_display = ['computed_at', 'total_users', 'active_users', 'total_transactions', 'estimated', 'duration_ms']
+    list_filter = ['estimated']
+    ordering = ['-computed_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -3,8 +3,11 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from django.contrib.auth import get_user_model
-from django.db.models import Sum, Count, Q
-from transactions.models import Transaction, Category, Budget
+from datetime import timedelta
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework.pagination import PageNumberPagination
+from transactions.models import Transaction, Category, Budget, UserStats
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, 
     UserProfileSerializer, ChangePasswordSerializer
@@ -12,6 +15,32 @@ from .serializers import (
 
 User = get_user_model()
 
+# ?ordering= keys for the admin user list -> model field
+USER_LIST_ORDERING = {
+    'username': 'username',
+    'email': 'email',
+    'date_joined': 'date_joined',
+    'last_login': 'last_login',
+    'transaction_count': 'stats__transaction_count',
+    'total_income': 'stats__total_income',
+    'total_expenses': 'stats__total_expenses',
+    'net_savings': 'stats__net_savings',
+    'category_count': 'stats__category_count',
+    'budget_count': 'stats__budget_count',
+    'last_activity': 'stats__last_activity_at',
+}
+
+
+# Rows of each related list returned by user_details
+RECENT_TRANSACTIONS_LIMIT = 10
+USER_DETAIL_LIMIT = 50
+
+
+class AdminUserPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
 
 class UserViewSet(viewsets.ModelViewSet):
     """API endpoint for user management"""
@@ -90,83 +119,147 @@ class AdminUserManagementViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['get'])
     def dashboard_stats(self, request):
-        """Get admin dashboard statistics"""
-        total_users = User.objects.count()
-        active_users = User.objects.filter(is_active=True).count()
-        staff_users = User.objects.filter(is_staff=True).count()
+        """
+        Get admin dashboard statistics from the latest platform snapshot.
         
-        # Recent registrations (last 30 days)
-        from datetime import datetime, timedelta
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_registrations = User.objects.filter(date_joined__gte=thirty_days_ago).count()
+        Snapshots are written by refresh_platform_stats, and recomputed here
+        when none is younger than PLATFORM_STATS_INTERVAL; ?refresh=true always
+        computes one now. computed_at and age_seconds say how fresh it is.
+        """
+        from .platform_stats import current, refresh
         
-        # Total transactions across all users
-        total_transactions = Transaction.objects.count()
-        total_income = Transaction.objects.filter(type='income').aggregate(total=Sum('amount'))['total'] or 0
-        total_expenses = Transaction.objects.filter(type='expense').aggregate(total=Sum('amount'))['total'] or 0
-        
-        # Total categories and budgets
-        total_categories = Category.objects.count()
-        total_budgets = Budget.objects.count()
+        stats = refresh() if request.query_params.get('refresh') == 'true' else current()
         
         return Response({
-            'total_users': total_users,
-            'active_users': active_users,
-            'staff_users': staff_users,
-            'recent_registrations': recent_registrations,
-            'total_transactions': total_transactions,
-            'total_income': str(total_income),
-            'total_expenses': str(total_expenses),
-            'total_categories': total_categories,
-            'total_budgets': total_budgets,
+            'total_users': stats.total_users,
+            'active_users': stats.active_users,
+            'staff_users': stats.staff_users,
+            'recent_registrations': stats.recent_registrations,
+            'total_transactions': stats.total_transactions,
+            'total_income': str(stats.total_income),
+            'total_expenses': str(stats.total_expenses),
+            'total_categories': stats.total_categories,
+            'total_budgets': stats.total_budgets,
+            'estimated': stats.estimated,
+            'computed_at': stats.computed_at,
+            'age_seconds': int((timezone.now() - stats.computed_at).total_seconds()),
         })
     
+    @action(detail=False, methods=['get'])
+    def email_delivery_stats(self, request):
+        """Get outbound email queue depth and Mailgun send latency"""
+        from .email_delivery import delivery_stats
+        return Response(delivery_stats())
+    
     @action(detail=False, methods=['get'])
     def user_list_detailed(self, request):
-        """Get detailed list of all users with their statistics"""
-        users = User.objects.all().order_by('-date_joined')
+        """
+        Paginated list of users with their statistics.
         
-        user_data = []
-        for user in users:
-            # Get user statistics
-            transaction_count = Transaction.objects.filter(user=user).count()
-            total_income = Transaction.objects.filter(user=user, type='income').aggregate(total=Sum('amount'))['total'] or 0
-            total_expenses = Transaction.objects.filter(user=user, type='expense').aggregate(total=Sum('amount'))['total'] or 0
-            category_count = Category.objects.filter(user=user).count()
-            budget_count = Budget.objects.filter(user=user).count()
-            
-            user_data.append({
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'full_name': user.full_name,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'is_active': user.is_active,
-                'is_staff': user.is_staff,
-                'date_joined': user.date_joined,
-                'last_login': user.last_login,
-                'phone_number': user.phone_number,
-                'preferred_currency': user.preferred_currency,
-                'statistics': {
-                    'transaction_count': transaction_count,
-                    'total_income': str(total_income),
-                    'total_expenses': str(total_expenses),
-                    'net_savings': str(total_income - total_expenses),
-                    'category_count': category_count,
-                    'budget_count': budget_count,
-                }
-            })
+        Statistics come from the maintained UserStats table, so a page costs a
+        COUNT and one joined SELECT whatever the number of users. Supports
+        ?ordering= (any USER_LIST_ORDERING key, '-' for descending),
+        ?search=, ?is_active=, ?is_staff=, ?has_transactions=,
+        ?active_within=<days> and ?inactive_for=<days>.
+        """
+        users = self.filter_user_list(User.objects.select_related('stats'), request.query_params)
         
-        return Response(user_data)
+        ordering = request.query_params.get('ordering', '-date_joined')
+        field = USER_LIST_ORDERING.get(ordering.lstrip('-'))
+        if field is None:
+            return Response(
+                {'ordering': [f"Choose one of: {', '.join(sorted(USER_LIST_ORDERING))}"]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        descending = ordering.startswith('-')
+        users = users.order_by(
+            F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_first=True),
+            '-id' if descending else 'id'
+        )
+        
+        paginator = AdminUserPagination()
+        page = paginator.paginate_queryset(users, request, view=self)
+        return paginator.get_paginated_response([self.user_list_row(user) for user in page])
+    
+    def filter_user_list(self, users, params):
+        """Apply the user_list_detailed query filters"""
+        search = params.get('search', '').strip()
+        if search:
+            users = users.filter(
+                Q(username__icontains=search) | Q(email__icontains=search) |
+                Q(first_name__icontains=search) | Q(last_name__icontains=search)
+            )
+        for param in ('is_active', 'is_staff'):
+            if params.get(param) in ('true', 'false'):
+                users = users.filter(**{param: params[param] == 'true'})
+        if params.get('has_transactions') in ('true', 'false'):
+            users = users.filter(stats__transaction_count__gt=0) if params['has_transactions'] == 'true' \
+                else users.exclude(stats__transaction_count__gt=0)
+        
+        # Activity is the latest transaction write or login
+        for param in ('active_within', 'inactive_for'):
+            try:
+                days = int(params[param])
+            except (KeyError, ValueError):
+                continue
+            since = timezone.now() - timedelta(days=days)
+            recent = Q(stats__last_activity_at__gte=since) | Q(last_login__gte=since)
+            users = users.filter(recent) if param == 'active_within' else users.exclude(recent)
+        return users
+    
+    def user_list_row(self, user):
+        stats = getattr(user, 'stats', None) or UserStats(user=user)
+        return {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'full_name': user.full_name,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'is_active': user.is_active,
+            'is_staff': user.is_staff,
+            'date_joined': user.date_joined,
+            'last_login': user.last_login,
+            'phone_number': user.phone_number,
+            'preferred_currency': user.preferred_currency,
+            'statistics': {
+                'transaction_count': stats.transaction_count,
+                'total_income': str(stats.total_income),
+                'total_expenses': str(stats.total_expenses),
+                'net_savings': str(stats.net_savings),
+                'category_count': stats.category_count,
+                'budget_count': stats.budget_count,
+                'last_activity_at': stats.last_activity_at,
+            }
+        }
+    
+    def get_queryset(self):
+        if self.action == 'user_details':
+            return User.objects.select_related('stats')
+        return super().get_queryset()
     
     @action(detail=True, methods=['get'])
     def user_details(self, request, pk=None):
-        """Get detailed information about a specific user"""
+        """
+        Get detailed information about a specific user.
+        
+        Costs the same four queries whatever the user owns: the user joined to
+        their maintained UserStats, then the recent transactions, categories
+        and budgets, each with its category joined in and capped at
+        USER_DETAIL_LIMIT rows (the statistics carry the full counts).
+        """
         user = self.get_object()
         
+        stats = getattr(user, 'stats', None)
+        if stats is None:
+            # Missing counters row: one grouped pass over the user's data instead
+            from transactions.user_stats import stats_from_db
+            stats = stats_from_db([user.pk])[user.pk]
+        
         # Get user's recent transactions
-        recent_transactions = Transaction.objects.filter(user=user).order_by('-date')[:10]
+        recent_transactions = Transaction.objects.filter(user=user).select_related('category').only(
+            'id', 'description', 'amount', 'type', 'date', 'category__name'
+        ).order_by('-date', '-created_at')[:RECENT_TRANSACTIONS_LIMIT]
         transactions_data = [{
             'id': t.id,
             'description': t.description,
@@ -177,7 +270,9 @@ class AdminUserManagementViewSet(viewsets.ReadOnlyModelViewSet):
         } for t in recent_transactions]
         
         # Get user's categories
-        categories = Category.objects.filter(user=user)
+        categories = Category.objects.filter(user=user).only(
+            'id', 'name', 'type', 'color'
+        ).order_by('type', 'name')[:USER_DETAIL_LIMIT]
         categories_data = [{
             'id': c.id,
             'name': c.name,
@@ -186,7 +281,9 @@ class AdminUserManagementViewSet(viewsets.ReadOnlyModelViewSet):
         } for c in categories]
         
         # Get user's budgets
-        budgets = Budget.objects.filter(user=user)
+        budgets = Budget.objects.filter(user=user).select_related('category').only(
+            'id', 'amount', 'period', 'start_date', 'category__name'
+        ).order_by('-created_at')[:USER_DETAIL_LIMIT]
         budgets_data = [{
             'id': b.id,
             'category_name': b.category.name,
@@ -195,10 +292,6 @@ class AdminUserManagementViewSet(viewsets.ReadOnlyModelViewSet):
             'start_date': b.start_date,
         } for b in budgets]
         
-        # Calculate statistics
-        total_income = Transaction.objects.filter(user=user, type='income').aggregate(total=Sum('amount'))['total'] or 0
-        total_expenses = Transaction.objects.filter(user=user, type='expense').aggregate(total=Sum('amount'))['total'] or 0
-        
         return Response({
             'user': {
                 'id': user.id,
@@ -218,16 +311,19 @@ class AdminUserManagementViewSet(viewsets.ReadOnlyModelViewSet):
                 'budget_alert_notifications': user.budget_alert_notifications,
             },
             'statistics': {
-                'total_income': str(total_income),
-                'total_expenses': str(total_expenses),
-                'net_savings': str(total_income - total_expenses),
-                'transaction_count': Transaction.objects.filter(user=user).count(),
-                'category_count': categories.count(),
-                'budget_count': budgets.count(),
+                'total_income': str(stats.total_income),
+                'total_expenses': str(stats.total_expenses),
+                'net_savings': str(stats.net_savings),
+                'transaction_count': stats.transaction_count,
+                'category_count': stats.category_count,
+                'budget_count': stats.budget_count,
+                'last_activity_at': stats.last_activity_at,
             },
             'recent_transactions': transactions_data,
             'categories': categories_data,
             'budgets': budgets_data,
+            'categories_truncated': stats.category_count > len(categories_data),
+            'budgets_truncated': stats.budget_count > len(budgets_data),
         })
     
     @action(detail=True, methods=['post'])
@@ -0,0 +1,253 @@
+"""
+Pooled, persistent Mailgun delivery.
+
+Every message is written to OutboundEmail before anything touches the network,
+so a recycled gunicorn worker loses nothing: rows left queued, or stuck in
+'sending' past their lease, are claimed by the next drain - either this
+process's pool or the send_queued_emails command. Without the mailer worker
+(BACKGROUND_WORKERS=False) each pool drain schedules a wake-up for the next
+deferred retry or lease expiry, and a starting web process drains whatever
+its predecessor left behind (finance_tracker/background.py). Sends share one
+requests.Session (keep-alive, pooled TLS connections) and a fixed-size thread
+pool, and 429/5xx responses or network errors are retried with backoff.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import requests
+from decouple import config
+from django.db import connection, transaction as db_transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from finance_tracker import background
+
+logger = logging.getLogger(__name__)
+
+API_BASE = config('MAILGUN_API_BASE', default='https://api.mailgun.net/v3')
+MAX_WORKERS = config('MAILGUN_MAX_WORKERS', default=4, cast=int)
+MAX_ATTEMPTS = config('MAILGUN_MAX_ATTEMPTS', default=6, cast=int)
+BACKOFF_SECONDS = 30
+MAX_BACKOFF_SECONDS = 3600
+# A claimed row whose sender died becomes claimable again after this long
+SENDING_LEASE = timedelta(minutes=5)
+# Mailgun accepts at most 1,000 recipients per batch message
+BATCH_LIMIT = 1000
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class DeliveryError(Exception):
+    """Mailgun rejected or never received a message"""
+
+    def __init__(self, message, retryable=False, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class MailgunClient:
+    """Thin Mailgun messages API client over one keep-alive session"""
+
+    def __init__(self, api_key, domain, api_base=API_BASE, pool_size=MAX_WORKERS, timeout=10):
+        self.url = f"{api_base.rstrip('/')}/{domain}/messages"
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.auth = ('api', api_key)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def send(self, from_email, email):
+        """Post one OutboundEmail; returns the Mailgun message id"""
+        data = {
+            'from': from_email,
+            'to': email.recipients,
+            'subject': email.subject,
+            'text': email.plain_content,
+            'html': email.html_content,
+        }
+        if email.recipient_variables:
+            data['recipient-variables'] = json.dumps(email.recipient_variables)
+
+        try:
+            response = self.session.post(self.url, data=data, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise DeliveryError(str(e), retryable=True)
+
+        if response.status_code == 200:
+            try:
+                return response.json().get('id', '')
+            except ValueError:
+                return ''
+
+        retry_after = response.headers.get('Retry-After')
+        raise DeliveryError(
+            f"Mailgun returned status {response.status_code}: {response.text[:500]}",
+            retryable=response.status_code in RETRYABLE_STATUSES,
+            retry_after=int(retry_after) if retry_after and retry_after.isdigit() else None,
+        )
+
+
+def backoff_delay(attempts, retry_after=None):
+    """Seconds to wait before the next attempt: Retry-After, else jittered exponential"""
+    if retry_after is not None:
+        return min(retry_after, MAX_BACKOFF_SECONDS)
+    delay = min(BACKOFF_SECONDS * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class DeliveryPipeline:
+    """Persisted queue drained by a bounded pool of sender threads"""
+
+    def __init__(self, client, from_email, max_workers=MAX_WORKERS):
+        self.client = client
+        self.from_email = from_email
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='mailgun')
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def enqueue(self, recipients, subject, html_content, plain_content='', recipient_variables=None):
+        """Persist a message and wake the pool once the surrounding transaction commits"""
+        from .models import OutboundEmail
+
+        email = OutboundEmail.objects.create(
+            recipients=list(recipients),
+            recipient_variables=recipient_variables,
+            subject=subject[:255],
+            html_content=html_content,
+            plain_content=plain_content,
+        )
+        db_transaction.on_commit(self.kick)
+        return email
+
+    def kick(self):
+        """Start another drain unless every worker is already draining"""
+        with self._lock:
+            if self._active >= self.max_workers:
+                return
+            self._active += 1
+        self.executor.submit(self._drain_and_release)
+
+    def _drain_and_release(self):
+        try:
+            self.drain()
+        except Exception:
+            logger.exception("Email drain failed")
+        finally:
+            with self._lock:
+                self._active -= 1
+        try:
+            self.schedule_next()
+        except Exception:
+            logger.exception("Email wake-up scheduling failed")
+        finally:
+            connection.close()
+
+    def schedule_next(self):
+        """Kick the pool again when the earliest deferred retry or sending lease comes due"""
+        from .models import OutboundEmail
+
+        due = OutboundEmail.objects.filter(status__in=['queued', 'sending']).aggregate(
+            due=Min('next_attempt_at')
+        )['due']
+        if due is not None:
+            background.call_at('emails', self.kick, due)
+
+    def drain(self, limit=None):
+        """Send due messages until none are left (or limit is hit); returns the number attempted"""
+        attempted = 0
+        try:
+            while limit is None or attempted < limit:
+                email = self.claim_next()
+                if email is None:
+                    break
+                self.deliver(email)
+                attempted += 1
+        finally:
+            # Pool threads must not hold on to their own DB connection
+            connection.close()
+        return attempted
+
+    def drain_all(self):
+        """Drain the queue with the whole pool and wait; returns the number attempted"""
+        futures = [self.executor.submit(self.drain) for _ in range(self.max_workers)]
+        wait(futures)
+        return sum(future.result() for future in futures)
+
+    def claim_next(self):
+        """Lease the oldest due message to this thread"""
+        from .models import OutboundEmail
+
+        now = timezone.now()
+        with db_transaction.atomic():
+            email = OutboundEmail.objects.select_for_update(skip_locked=True).filter(
+                status__in=['queued', 'sending'], next_attempt_at__lte=now
+            ).order_by('next_attempt_at').first()
+            if email is None:
+                return None
+            email.status = 'sending'
+            email.attempts += 1
+            email.next_attempt_at = now + SENDING_LEASE
+            email.save(update_fields=['status', 'attempts', 'next_attempt_at'])
+        return email
+
+    def deliver(self, email):
+        started = time.monotonic()
+        try:
+            email.message_id = self.client.send(self.from_email, email)
+        except DeliveryError as e:
+            email.last_error = str(e)
+            if e.retryable and email.attempts < MAX_ATTEMPTS:
+                email.status = 'queued'
+                email.next_attempt_at = timezone.now() + timedelta(
+                    seconds=backoff_delay(email.attempts, e.retry_after)
+                )
+                logger.warning(f"Mailgun send retry {email.attempts}/{MAX_ATTEMPTS} for email {email.pk}: {e}")
+            else:
+                email.status = 'failed'
+                logger.error(f"Mailgun send failed for email {email.pk}: {e}")
+        else:
+            email.status = 'sent'
+            email.sent_at = timezone.now()
+            email.last_error = ''
+            logger.info(f"Email sent via Mailgun: {email.subject} to {len(email.recipients)} recipient(s)")
+        email.latency_ms = int((time.monotonic() - started) * 1000)
+        email.save(update_fields=['status', 'next_attempt_at', 'last_error', 'message_id', 'latency_ms', 'sent_at'])
+
+
+def delivery_stats(window=timedelta(hours=1)):
+    """Queue depth by status and send latency percentiles over the recent window"""
+    from .models import OutboundEmail
+
+    now = timezone.now()
+    counts = dict(OutboundEmail.objects.order_by().values_list('status').annotate(total=Count('id')))
+    oldest = OutboundEmail.objects.filter(status__in=['queued', 'sending']).aggregate(
+        oldest=Min('created_at')
+    )['oldest']
+    latencies = sorted(OutboundEmail.objects.filter(
+        sent_at__gte=now - window, latency_ms__isnull=False
+    ).values_list('latency_ms', flat=True))
+
+    def percentile(p):
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    return {
+        'queue_depth': counts.get('queued', 0) + counts.get('sending', 0),
+        'oldest_queued_seconds': int((now - oldest).total_seconds()) if oldest else None,
+        'by_status': {status: counts.get(status, 0) for status in ('queued', 'sending', 'sent', 'failed')},
+        'latency_ms': {
+            'samples': len(latencies),
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+            'max': latencies[-1] if latencies else None,
+        },
+    }
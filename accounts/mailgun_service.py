@@ -2,11 +2,11 @@
 Mailgun Email Service - API-based email (bypasses SMTP port blocks on Render)
 """
 
-import requests
 from django.utils.html import strip_tags
 from decouple import config
+from accounts.email_delivery import BATCH_LIMIT, DeliveryPipeline, MailgunClient
+from accounts.email_templates import budget_alert_email
 import logging
-import threading
 
 logger = logging.getLogger(__name__)
 
@@ -28,80 +28,66 @@ class MailgunEmailService:
             print("⚠️  Mailgun not configured. Emails will be logged to console.")
         else:
             print(f"✅ Mailgun configured: {self.domain}")
+        
+        self.client = MailgunClient(self.api_key, self.domain)
+        self.pipeline = DeliveryPipeline(self.client, self.from_email)
     
-    def send_email_async(self, to_email, subject, html_content, plain_content=None):
-        """Send email asynchronously in a separate thread"""
-        thread = threading.Thread(
-            target=self._send_email_thread,
-            args=(to_email, subject, html_content, plain_content)
-        )
-        thread.daemon = True
-        thread.start()
-        return True  # Return immediately
+    @property
+    def is_configured(self):
+        return bool(self.api_key and self.domain)
     
-    def _send_email_thread(self, to_email, subject, html_content, plain_content=None):
-        """Internal method to send email in a thread"""
-        try:
-            if not self.api_key or not self.domain:
-                logger.error("Mailgun not configured")
-                print(f"\n{'='*60}")
-                print(f"📧 EMAIL (Console): {subject}")
-                print(f"To: {to_email}")
-                print(f"{'='*60}\n")
-                return False
-            
-            # Create plain text version if not provided
-            if not plain_content:
-                plain_content = strip_tags(html_content)
-            
-            # Mailgun API endpoint
-            url = f"https://api.mailgun.net/v3/{self.domain}/messages"
-            
-            # Send email via Mailgun API
-            response = requests.post(
-                url,
-                auth=("api", self.api_key),
-                data={
-                    "from": self.from_email,
-                    "to": to_email,
-                    "subject": subject,
-                    "text": plain_content,
-                    "html": html_content
-                },
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"Email sent successfully via Mailgun: {subject} to {to_email}")
-                print(f"\n{'='*60}")
-                print(f"✅ EMAIL SENT (Mailgun API): {subject}")
-                print(f"To: {to_email}")
-                print(f"Status: {response.status_code}")
-                print(f"Message ID: {response.json().get('id', 'N/A')}")
-                print(f"{'='*60}\n")
-            else:
-                logger.error(f"Mailgun returned status {response.status_code}: {response.text}")
-                print(f"\n{'='*60}")
-                print(f"❌ EMAIL FAILED (Mailgun): {subject}")
-                print(f"Status: {response.status_code}")
-                print(f"Error: {response.text}")
-                print(f"{'='*60}\n")
-                
-        except Exception as e:
-            logger.error(f"Failed to send email via Mailgun: {str(e)}")
+    def send_email(self, to_email, subject, html_content, plain_content=None):
+        """Queue an email for pooled delivery via the Mailgun API"""
+        if not self.is_configured:
+            logger.error("Mailgun not configured")
             print(f"\n{'='*60}")
-            print(f"❌ EMAIL FAILED (Mailgun): {subject}")
+            print(f"📧 EMAIL (Console): {subject}")
             print(f"To: {to_email}")
-            print(f"Error: {str(e)}")
             print(f"{'='*60}\n")
+            return False
+        
+        # Create plain text version if not provided
+        if not plain_content:
+            plain_content = strip_tags(html_content)
+        
+        self.pipeline.enqueue([to_email], subject, html_content, plain_content)
+        return True  # Return immediately
     
-    def send_email(self, to_email, subject, html_content, plain_content=None):
-        """Send email using Mailgun API - bypasses SMTP port blocks"""
-        return self.send_email_async(to_email, subject, html_content, plain_content)
+    def send_batch(self, recipients, subject, html_content, plain_content=None):
+        """
+        Queue one message for many users using Mailgun batch sending.
+        
+        recipients maps each address to its recipient variables, which the
+        content references as %recipient.<name>%. Each address only sees itself.
+        """
+        if not self.is_configured:
+            logger.error("Mailgun not configured")
+            print(f"📧 EMAIL (Console): {subject} to {len(recipients)} recipients")
+            return 0
+        
+        if not plain_content:
+            plain_content = strip_tags(html_content)
+        
+        addresses = list(recipients)
+        for i in range(0, len(addresses), BATCH_LIMIT):
+            chunk = addresses[i:i + BATCH_LIMIT]
+            self.pipeline.enqueue(
+                chunk, subject, html_content, plain_content,
+                recipient_variables={address: recipients[address] or {} for address in chunk}
+            )
+        return len(addresses)
+    
+    def send_budget_alert(self, user, budget, status=None):
+        """Send budget alert notification"""
+        if not user.budget_alert_notifications:
+            return False
+        
+        subject, html_content = budget_alert_email(user, budget, status)
+        return self.send_email(user.email, subject, html_content)
     
     def add_authorized_recipient(self, email):
         """Add email to Mailgun authorized recipients (for sandbox domains)"""
-        if not self.api_key or not self.domain:
+        if not self.is_configured:
             logger.warning("Mailgun not configured")
             return False
         
@@ -111,11 +97,8 @@ class MailgunEmailService:
             # This is a limitation of the free tier
             
             # Send a test email to trigger authorization request
-            url = f"https://api.mailgun.net/v3/{self.domain}/messages"
-            
-            response = requests.post(
-                url,
-                auth=("api", self.api_key),
+            response = self.client.session.post(
+                self.client.url,
                 data={
                     "from": self.from_email,
                     "to": email,
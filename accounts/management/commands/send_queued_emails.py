@@ -0,0 +1,39 @@
+"""
+Management command to deliver queued Mailgun emails
+"""
+import json
+import time
+from django.core.management.base import BaseCommand
+from accounts.email_delivery import delivery_stats
+from accounts.mailgun_service import email_service
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails through the pooled Mailgun pipeline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling the queue instead of exiting when empty')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between polls with --loop')
+        parser.add_argument('--stats', action='store_true', help='Print queue depth and send latency, then exit')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(delivery_stats(), indent=2))
+            return
+
+        if not email_service.is_configured:
+            self.stdout.write(self.style.WARNING('⚠️  Mailgun not configured, nothing sent'))
+            return
+
+        total = 0
+        while True:
+            attempted = email_service.pipeline.drain_all()
+            total += attempted
+
+            if attempted:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Attempted {total} emails'))
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-16 23:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_outbound_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_users', models.PositiveIntegerField(default=0)),
+                ('active_users', models.PositiveIntegerField(default=0)),
+                ('staff_users', models.PositiveIntegerField(default=0)),
+                ('recent_registrations', models.PositiveIntegerField(default=0, help_text='Users who joined in the last 30 days')),
+                ('total_transactions', models.PositiveBigIntegerField(default=0)),
+                ('total_income', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('total_expenses', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('total_categories', models.PositiveBigIntegerField(default=0)),
+                ('total_budgets', models.PositiveBigIntegerField(default=0)),
+                ('estimated', models.BooleanField(default=False, help_text='Row counts are Postgres planner estimates')),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Platform Stats Snapshot',
+                'verbose_name_plural': 'Platform Stats Snapshots',
+                'db_table': 'platform_stats',
+                'ordering': ['-computed_at'],
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -27,3 +28,64 @@ class User(AbstractUser):
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}".strip() or self.username
+
+
+class OutboundEmail(models.Model):
+    """Mailgun message persisted before delivery so restarts never drop mail"""
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+    
+    recipients = models.JSONField(help_text='List of recipient addresses')
+    recipient_variables = models.JSONField(blank=True, null=True, help_text='Mailgun batch recipient-variables')
+    subject = models.CharField(max_length=255)
+    html_content = models.TextField()
+    plain_content = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    message_id = models.CharField(max_length=255, blank=True)
+    latency_ms = models.PositiveIntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        db_table = 'outbound_emails'
+        verbose_name = 'Outbound Email'
+        verbose_name_plural = 'Outbound Emails'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+
+class PlatformStats(models.Model):
+    """Periodic snapshot of platform-wide metrics for the admin dashboard"""
+    total_users = models.PositiveIntegerField(default=0)
+    active_users = models.PositiveIntegerField(default=0)
+    staff_users = models.PositiveIntegerField(default=0)
+    recent_registrations = models.PositiveIntegerField(default=0, help_text='Users who joined in the last 30 days')
+    total_transactions = models.PositiveBigIntegerField(default=0)
+    total_income = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    total_expenses = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    total_categories = models.PositiveBigIntegerField(default=0)
+    total_budgets = models.PositiveBigIntegerField(default=0)
+    estimated = models.BooleanField(default=False, help_text='Row counts are Postgres planner estimates')
+    duration_ms = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        db_table = 'platform_stats'
+        verbose_name = 'Platform Stats Snapshot'
+        verbose_name_plural = 'Platform Stats Snapshots'
+        ordering = ['-computed_at']
+    
+    def __str__(self):
+        return f"Platform stats at {self.computed_at:%Y-%m-%d %H:%M}"
@@ -7,6 +7,7 @@ Uses threading for async email sending to prevent timeouts
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 from django.utils.html import strip_tags
+from accounts.email_templates import budget_alert_email
 import logging
 import threading
 
@@ -84,88 +85,12 @@ class EmailNotificationService:
         # Use async sending to prevent blocking
         return self.send_email_async(to_email, subject, html_content, plain_content)
     
-    def send_budget_alert(self, user, budget):
+    def send_budget_alert(self, user, budget, status=None):
         """Send budget alert notification"""
         if not user.budget_alert_notifications:
             return False
         
-        percentage = budget.get_percentage_used()
-        is_exceeded = budget.is_over_budget()
-        
-        subject = f"Budget Alert: {budget.category.name}"
-        
-        if is_exceeded:
-            subject = f"⚠️ Budget Exceeded: {budget.category.name}"
-        
-        html_content = f"""
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
-                .content {{ background: #f9fafb; padding: 30px; border-radius: 0 0 10px 10px; }}
-                .alert-box {{ background: {'#fee2e2' if is_exceeded else '#fef3c7'}; border-left: 4px solid {'#dc2626' if is_exceeded else '#f59e0b'}; padding: 15px; margin: 20px 0; border-radius: 5px; }}
-                .stats {{ background: white; padding: 20px; border-radius: 8px; margin: 20px 0; }}
-                .stat-row {{ display: flex; justify-content: space-between; padding: 10px 0; border-bottom: 1px solid #e5e7eb; }}
-                .stat-label {{ font-weight: 600; color: #6b7280; }}
-                .stat-value {{ font-weight: 700; color: {'#dc2626' if is_exceeded else '#f59e0b'}; }}
-                .progress-bar {{ background: #e5e7eb; height: 20px; border-radius: 10px; overflow: hidden; margin: 10px 0; }}
-                .progress-fill {{ background: {'linear-gradient(90deg, #dc2626, #ef4444)' if is_exceeded else 'linear-gradient(90deg, #f59e0b, #fbbf24)'}; height: 100%; width: {min(percentage, 100)}%; transition: width 0.3s; }}
-                .footer {{ text-align: center; color: #6b7280; font-size: 12px; margin-top: 20px; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>{'⚠️ Budget Exceeded!' if is_exceeded else '📊 Budget Alert'}</h1>
-                    <p>Finance Tracker Notification</p>
-                </div>
-                <div class="content">
-                    <p>Hi {user.first_name or user.username},</p>
-                    
-                    <div class="alert-box">
-                        <strong>{'Your budget has been exceeded!' if is_exceeded else 'You have reached your budget alert threshold!'}</strong>
-                    </div>
-                    
-                    <div class="stats">
-                        <h3>Budget Details: {budget.category.name}</h3>
-                        <div class="stat-row">
-                            <span class="stat-label">Budget Amount:</span>
-                            <span class="stat-value">{budget.currency} {budget.amount}</span>
-                        </div>
-                        <div class="stat-row">
-                            <span class="stat-label">Spent Amount:</span>
-                            <span class="stat-value">{budget.currency} {budget.get_spent_amount()}</span>
-                        </div>
-                        <div class="stat-row">
-                            <span class="stat-label">Remaining:</span>
-                            <span class="stat-value">{budget.currency} {budget.get_remaining_amount()}</span>
-                        </div>
-                        <div class="stat-row">
-                            <span class="stat-label">Usage:</span>
-                            <span class="stat-value">{percentage:.1f}%</span>
-                        </div>
-                        
-                        <div class="progress-bar">
-                            <div class="progress-fill"></div>
-                        </div>
-                    </div>
-                    
-                    <p>{'Consider reviewing your spending in this category to stay within budget.' if is_exceeded else 'You are approaching your budget limit. Monitor your spending carefully.'}</p>
-                    
-                    <p>You can view detailed reports and adjust your budget in the Finance Tracker app.</p>
-                    
-                    <div class="footer">
-                        <p>This is an automated notification from Finance Tracker.</p>
-                        <p>You can manage your notification preferences in your account settings.</p>
-                    </div>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
+        subject, html_content = budget_alert_email(user, budget, status)
         return self.send_email(user.email, subject, html_content)
     
     def send_weekly_summary(self, user, stats):
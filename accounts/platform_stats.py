@@ -0,0 +1,114 @@
+"""
+Platform-wide metrics for the admin dashboard, served from snapshots.
+
+refresh() computes every metric with two aggregates: one over the users table
+and one over the maintained per-user UserStats rows, which already carry each
+user's transaction, category and budget counts and income / expense totals. No
+query touches the transactions table. The result is stored as a PlatformStats
+row with its computed_at timestamp, and dashboard_stats serves the latest row.
+
+refresh_platform_stats --loop keeps snapshots current; current() also
+recomputes on read once the latest snapshot is older than
+PLATFORM_STATS_INTERVAL, so deployments without that process (the Render
+blueprint) never serve a frozen dashboard. With
+PLATFORM_STATS_ESTIMATE_COUNTS=True on Postgres, the user, transaction,
+category and budget totals come from the planner's pg_class.reltuples, so
+those counts cost no scan at all.
+"""
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from decouple import config
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+ESTIMATE_COUNTS = config('PLATFORM_STATS_ESTIMATE_COUNTS', default=False, cast=bool)
+REFRESH_INTERVAL = config('PLATFORM_STATS_INTERVAL', default=300, cast=int)
+RETENTION = timedelta(days=config('PLATFORM_STATS_RETENTION_DAYS', default=30, cast=int))
+RECENT_DAYS = 30
+CENT = Decimal('0.01')
+
+
+def planner_estimate(model):
+    """Row count estimate from the Postgres planner statistics, or None"""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    # -1 means the table was never analysed
+    return row[0] if row and row[0] >= 0 else None
+
+
+def compute(estimate=ESTIMATE_COUNTS):
+    """Unsaved PlatformStats with the current metrics"""
+    from transactions.models import Budget, Category, Transaction, UserStats
+
+    from .models import PlatformStats
+
+    User = get_user_model()
+    started = time.monotonic()
+    users = User.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        staff=Count('id', filter=Q(is_staff=True)),
+        recent=Count('id', filter=Q(date_joined__gte=timezone.now() - timedelta(days=RECENT_DAYS))),
+    )
+    totals = UserStats.objects.aggregate(
+        transactions=Sum('transaction_count'),
+        income=Sum('total_income'),
+        expenses=Sum('total_expenses'),
+        categories=Sum('category_count'),
+        budgets=Sum('budget_count'),
+    )
+
+    stats = PlatformStats(
+        total_users=users['total'],
+        active_users=users['active'],
+        staff_users=users['staff'],
+        recent_registrations=users['recent'],
+        total_transactions=totals['transactions'] or 0,
+        total_income=Decimal(totals['income'] or 0).quantize(CENT),
+        total_expenses=Decimal(totals['expenses'] or 0).quantize(CENT),
+        total_categories=totals['categories'] or 0,
+        total_budgets=totals['budgets'] or 0,
+    )
+
+    if estimate:
+        for field, model in (('total_users', User), ('total_transactions', Transaction),
+                             ('total_categories', Category), ('total_budgets', Budget)):
+            value = planner_estimate(model)
+            if value is not None:
+                setattr(stats, field, value)
+                stats.estimated = True
+
+    stats.duration_ms = int((time.monotonic() - started) * 1000)
+    return stats
+
+
+def refresh(estimate=ESTIMATE_COUNTS):
+    """Store a new snapshot, drop ones past the retention window and return it"""
+    from .models import PlatformStats
+
+    stats = compute(estimate)
+    stats.save()
+    PlatformStats.objects.filter(computed_at__lt=stats.computed_at - RETENTION).delete()
+    return stats
+
+
+def latest():
+    from .models import PlatformStats
+
+    return PlatformStats.objects.order_by('-computed_at').first()
+
+
+def current(max_age=None):
+    """Latest snapshot, recomputed first when there is none or it is older than max_age"""
+    max_age = timedelta(seconds=REFRESH_INTERVAL) if max_age is None else max_age
+    stats = latest()
+    if stats is None or timezone.now() - stats.computed_at > max_age:
+        stats = refresh()
+    return stats
@@ -0,0 +1,273 @@
+"""
+Mailgun delivery pipeline against a local stand-in for the messages API.
+
+StandInMailgun is a real HTTP server on 127.0.0.1 that answers each POST with
+the next scripted (status, body, headers) reply and records what it received,
+so MailgunClient, claim_next and the retry / failure paths run unmodified.
+"""
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs
+
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from accounts import email_delivery
+from accounts.email_delivery import DeliveryError, DeliveryPipeline, MailgunClient
+from accounts.models import OutboundEmail
+from finance_tracker import background
+
+
+class StandInMailgun:
+    """Scripted HTTP stand-in for POST /v3/<domain>/messages"""
+
+    def __init__(self):
+        self.replies = []
+        self.requests = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length'])).decode()
+                stand_in.requests.append({
+                    'path': self.path,
+                    'authorization': self.headers.get('Authorization'),
+                    'form': parse_qs(body),
+                })
+                status, payload, headers = stand_in.replies.pop(0) if stand_in.replies else (200, {'id': '<ok>'}, {})
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.api_base = f"http://127.0.0.1:{self.server.server_port}/v3"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def reply(self, status, payload=None, headers=None):
+        self.replies.append((status, payload or {}, headers or {}))
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class DeliveryPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.mailgun = StandInMailgun()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mailgun.close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.mailgun.replies.clear()
+        self.mailgun.requests.clear()
+        self.client = MailgunClient('key-test', 'mg.example.com', api_base=self.mailgun.api_base, timeout=2)
+        self.pipeline = DeliveryPipeline(self.client, 'Finance Tracker <noreply@mg.example.com>', max_workers=1)
+        self.addCleanup(self.pipeline.executor.shutdown)
+
+    def enqueue(self, **kwargs):
+        # Keep the pool asleep; tests drive claim_next / deliver themselves
+        with mock.patch.object(self.pipeline, 'kick'):
+            return self.pipeline.enqueue(
+                kwargs.pop('recipients', ['user@example.com']), 'Budget alert', '<p>Over budget</p>', 'Over budget',
+                **kwargs
+            )
+
+    def deliver_next(self, level='WARNING'):
+        with self.assertLogs('accounts.email_delivery', level) as logs:
+            self.pipeline.deliver(self.pipeline.claim_next())
+        return logs.output
+
+    def make_due(self, email):
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+
+    def test_client_posts_message(self):
+        email = self.enqueue(recipients=['a@example.com', 'b@example.com'],
+                             recipient_variables={'a@example.com': {'name': 'A'}})
+        self.mailgun.reply(200, {'id': '<abc@mg.example.com>'})
+
+        self.assertEqual(self.client.send('noreply@mg.example.com', email), '<abc@mg.example.com>')
+        request = self.mailgun.requests[0]
+        self.assertEqual(request['path'], '/v3/mg.example.com/messages')
+        self.assertTrue(request['authorization'].startswith('Basic '))
+        self.assertEqual(request['form']['to'], ['a@example.com', 'b@example.com'])
+        self.assertEqual(request['form']['subject'], ['Budget alert'])
+        self.assertEqual(json.loads(request['form']['recipient-variables'][0]), {'a@example.com': {'name': 'A'}})
+
+    def test_client_classifies_errors(self):
+        email = self.enqueue()
+        self.mailgun.reply(429, {'message': 'slow down'}, {'Retry-After': '7'})
+        with self.assertRaises(DeliveryError) as raised:
+            self.client.send('noreply@mg.example.com', email)
+        self.assertTrue(raised.exception.retryable)
+        self.assertEqual(raised.exception.retry_after, 7)
+
+        self.mailgun.reply(400, {'message': 'bad address'})
+        with self.assertRaises(DeliveryError) as raised:
+            self.client.send('noreply@mg.example.com', email)
+        self.assertFalse(raised.exception.retryable)
+
+    def test_client_network_error_is_retryable(self):
+        client = MailgunClient('key-test', 'mg.example.com', api_base='http://127.0.0.1:9/v3', timeout=1)
+        with self.assertRaises(DeliveryError) as raised:
+            client.send('noreply@mg.example.com', self.enqueue())
+        self.assertTrue(raised.exception.retryable)
+
+    def test_claim_leases_oldest_due_message(self):
+        older = self.enqueue()
+        newer = self.enqueue()
+        OutboundEmail.objects.filter(pk=older.pk).update(next_attempt_at=timezone.now() - timedelta(minutes=1))
+        OutboundEmail.objects.create(recipients=['later@example.com'], subject='Later', html_content='',
+                                     next_attempt_at=timezone.now() + timedelta(hours=1))
+
+        claimed = self.pipeline.claim_next()
+        self.assertEqual(claimed.pk, older.pk)
+        self.assertEqual((claimed.status, claimed.attempts), ('sending', 1))
+        self.assertGreater(claimed.next_attempt_at, timezone.now() + email_delivery.SENDING_LEASE - timedelta(seconds=5))
+
+        self.assertEqual(self.pipeline.claim_next().pk, newer.pk)
+        # The leased rows and the future one are not due
+        self.assertIsNone(self.pipeline.claim_next())
+
+    def test_expired_lease_is_reclaimed(self):
+        email = self.enqueue()
+        self.pipeline.claim_next()
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+        reclaimed = self.pipeline.claim_next()
+        self.assertEqual((reclaimed.pk, reclaimed.attempts), (email.pk, 2))
+
+    def test_delivers_and_records_message_id(self):
+        email = self.enqueue()
+        self.mailgun.reply(200, {'id': '<sent@mg.example.com>'})
+
+        self.pipeline.deliver(self.pipeline.claim_next())
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'sent')
+        self.assertEqual(email.message_id, '<sent@mg.example.com>')
+        self.assertIsNotNone(email.sent_at)
+        self.assertIsNotNone(email.latency_ms)
+
+    def test_retryable_failure_backs_off_then_succeeds(self):
+        email = self.enqueue()
+        self.mailgun.reply(503, {'message': 'unavailable'})
+
+        before = timezone.now()
+        self.assertIn('retry 1/', self.deliver_next()[0])
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('queued', 1))
+        self.assertIn('503', email.last_error)
+        delay = (email.next_attempt_at - before).total_seconds()
+        self.assertTrue(email_delivery.BACKOFF_SECONDS * 0.8 - 1 <= delay <= email_delivery.BACKOFF_SECONDS * 1.2 + 1)
+        # Backing off: not claimable until due
+        self.assertIsNone(self.pipeline.claim_next())
+
+        self.make_due(email)
+        self.pipeline.deliver(self.pipeline.claim_next())
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.last_error), ('sent', 2, ''))
+        self.assertEqual(len(self.mailgun.requests), 2)
+
+    def test_retry_after_is_honoured(self):
+        email = self.enqueue()
+        self.mailgun.reply(429, {}, {'Retry-After': '120'})
+
+        before = timezone.now()
+        self.deliver_next()
+        email.refresh_from_db()
+        self.assertAlmostEqual((email.next_attempt_at - before).total_seconds(), 120, delta=2)
+
+    def test_permanent_failure_is_not_retried(self):
+        email = self.enqueue()
+        self.mailgun.reply(400, {'message': "'to' parameter is not a valid address"})
+
+        self.assertIn('send failed', self.deliver_next('ERROR')[0])
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', 1))
+        self.assertIn('400', email.last_error)
+        self.assertIsNone(self.pipeline.claim_next())
+
+    def test_gives_up_after_max_attempts(self):
+        email = self.enqueue()
+        for attempt in range(1, email_delivery.MAX_ATTEMPTS + 1):
+            self.mailgun.reply(500, {'message': 'boom'})
+            self.make_due(email)
+            self.deliver_next()
+            email.refresh_from_db()
+            self.assertEqual(email.attempts, attempt)
+        self.assertEqual(email.status, 'failed')
+        self.assertEqual(len(self.mailgun.requests), email_delivery.MAX_ATTEMPTS)
+
+    def test_backoff_delay_grows_and_caps(self):
+        with mock.patch.object(email_delivery.random, 'uniform', return_value=1.0):
+            delays = [email_delivery.backoff_delay(attempt) for attempt in range(1, 10)]
+        self.assertEqual(delays[:3], [30, 60, 120])
+        self.assertEqual(delays[-1], email_delivery.MAX_BACKOFF_SECONDS)
+        self.assertEqual(email_delivery.backoff_delay(3, retry_after=5), 5)
+
+
+class DeferredRetryTests(TransactionTestCase):
+    """The pool wakes itself for deferred retries; no later enqueue is needed"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.mailgun = StandInMailgun()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mailgun.close()
+        super().tearDownClass()
+
+    def setUp(self):
+        client = MailgunClient('key-test', 'mg.example.com', api_base=self.mailgun.api_base, timeout=2)
+        self.pipeline = DeliveryPipeline(client, 'Finance Tracker <noreply@mg.example.com>', max_workers=1)
+        self.addCleanup(self.pipeline.executor.shutdown)
+
+    def wait_for(self, email, status, timeout=10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            email.refresh_from_db()
+            if email.status == status:
+                return
+            time.sleep(0.05)
+        self.fail(f"email stayed {email.status!r}, expected {status!r}")
+
+    def test_deferred_retry_is_sent_without_new_enqueue(self):
+        self.mailgun.reply(429, {'message': 'slow down'}, {'Retry-After': '1'})
+        self.mailgun.reply(200, {'id': '<retried@mg.example.com>'})
+
+        with self.assertLogs('accounts.email_delivery', 'WARNING'), \
+                mock.patch.object(background, 'call_at', wraps=background.call_at) as call_at:
+            email = self.pipeline.enqueue(['user@example.com'], 'Budget alert', '<p>Over budget</p>')
+            self.wait_for(email, 'sent')
+
+        self.assertEqual((email.attempts, email.message_id), (2, '<retried@mg.example.com>'))
+        self.assertEqual(len(self.mailgun.requests), 2)
+        self.assertEqual(call_at.call_args_list[0].args[:2], ('emails', self.pipeline.kick))
+
+    def test_lease_left_by_dead_sender_is_rescheduled(self):
+        email = OutboundEmail.objects.create(
+            recipients=['user@example.com'], subject='Reset', html_content='', status='sending', attempts=1,
+            next_attempt_at=timezone.now() + timedelta(seconds=1),
+        )
+        with mock.patch.object(background, 'call_at') as call_at:
+            self.pipeline.schedule_next()
+        call_at.assert_called_once_with('emails', self.pipeline.kick, email.next_attempt_at)
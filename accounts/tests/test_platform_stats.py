@@ -0,0 +1,53 @@
+"""
+Admin dashboard stats are served from snapshots, recomputed once stale.
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts import platform_stats
+from accounts.models import PlatformStats
+
+STATS_URL = '/api/admin/users/dashboard_stats/'
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_user(
+            username='admin', email='admin@example.com', is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_fresh_snapshot_is_served(self):
+        snapshot = platform_stats.refresh()
+        response = self.client.get(STATS_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['computed_at'], snapshot.computed_at)
+        self.assertEqual(response.data['age_seconds'], 0)
+        self.assertEqual(PlatformStats.objects.count(), 1)
+
+    def test_stale_snapshot_is_recomputed(self):
+        snapshot = platform_stats.refresh()
+        PlatformStats.objects.filter(pk=snapshot.pk).update(
+            computed_at=timezone.now() - timedelta(seconds=platform_stats.REFRESH_INTERVAL + 60)
+        )
+        get_user_model().objects.create_user(username='late', email='late@example.com')
+
+        response = self.client.get(STATS_URL)
+        self.assertEqual(response.data['total_users'], 2)
+        self.assertLess(response.data['age_seconds'], 5)
+        self.assertEqual(PlatformStats.objects.count(), 2)
+
+    def test_first_request_computes(self):
+        response = self.client.get(STATS_URL)
+        self.assertEqual(response.data['total_users'], 1)
+        self.assertTrue(PlatformStats.objects.exists())
+
+    def test_refresh_parameter_forces_a_snapshot(self):
+        platform_stats.refresh()
+        self.client.get(STATS_URL, {'refresh': 'true'})
+        self.assertEqual(PlatformStats.objects.count(), 2)
@@ -13,5 +13,5 @@ class ChatMessageAdmin(admin.ModelAdmin):
 
 @admin.register(BankStatement)
 class BankStatementAdmin(admin.ModelAdmin):
-    list_display = ['user', 'file_name', 'uploaded_at']
-    list_filter = ['uploaded_at']
+    list_display = ['user', 'file_name', 'status', 'stage', 'rows_created', 'uploaded_at']
+    list_filter = ['status', 'uploaded_at']
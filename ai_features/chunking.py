@@ -0,0 +1,38 @@
+"""
+Row-boundary chunking for long statements.
+
+Gemini prompts used to see only the first 3,000 characters of a statement.
+chunk_statement() instead splits the whole page stream into chunks of whole
+lines, each under a character budget, so every row is sent to exactly one
+call. CSV chunks repeat the header row so each chunk parses on its own.
+"""
+from decouple import config
+
+CHUNK_CHARS = config('GEMINI_CHUNK_CHARS', default=12000, cast=int)
+
+
+def chunk_statement(statement, max_chars=CHUNK_CHARS):
+    """List of chunk strings covering every non-blank line of the statement"""
+    lines = [
+        line for page in statement.pages for line in page.splitlines()
+        if line.strip()
+    ]
+    if not lines:
+        return []
+
+    header = ''
+    if statement.kind == 'csv':
+        header, lines = lines[0] + '\n', lines[1:]
+
+    chunks = []
+    current, size = [], len(header)
+    for line in lines:
+        # A single oversized line still gets a chunk of its own
+        if current and size + len(line) + 1 > max_chars:
+            chunks.append(header + '\n'.join(current))
+            current, size = [], len(header)
+        current.append(line)
+        size += len(line) + 1
+    if current or not chunks:
+        chunks.append(header + '\n'.join(current))
+    return chunks
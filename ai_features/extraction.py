@@ -0,0 +1,109 @@
+"""
+Extract-once statement text pipeline.
+
+An upload is hashed with SHA-256 and its text extracted a single time, then
+cached under that hash, so analysis and transaction extraction (and any
+re-upload of the same file) share one pass. PDFs are split into page ranges
+extracted in parallel on a process pool, with no page cap. The result is a
+page-indexed ExtractedStatement.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from decouple import config
+from django.core.cache import cache
+
+from . import pdf_pages
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'statement_text'
+CACHE_TIMEOUT = 60 * 60 * 24
+PDF_WORKERS = config('PDF_EXTRACT_WORKERS', default=min(4, os.cpu_count() or 1), cast=int)
+# Below this many pages a pool round-trip costs more than it saves
+PARALLEL_MIN_PAGES = 8
+
+ExtractedStatement = namedtuple('ExtractedStatement', ['sha256', 'kind', 'pages'])
+
+_pool = None
+
+
+def _get_pool():
+    """Process pool shared by this worker process, created on first use"""
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that already runs threads (email pool, DB) is unsafe
+        _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def statement_kind(file_name):
+    name = file_name.lower()
+    if name.endswith('.pdf'):
+        return 'pdf'
+    if name.endswith('.csv'):
+        return 'csv'
+    return None
+
+
+def file_digest(file_obj):
+    """SHA-256 of an upload, read in chunks; leaves the file at position 0"""
+    file_obj.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file_obj.read(1024 * 1024), b''):
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def extract_pdf_pages(data):
+    """Text for every page, extracted across the process pool for larger PDFs"""
+    total = pdf_pages.page_count(data)
+    if total < PARALLEL_MIN_PAGES or PDF_WORKERS < 2:
+        return pdf_pages.extract_pages(data, 0, total)
+
+    step = -(-total // PDF_WORKERS)
+    ranges = [(start, min(start + step, total)) for start in range(0, total, step)]
+    pool = _get_pool()
+    futures = [pool.submit(pdf_pages.extract_pages, data, start, stop) for start, stop in ranges]
+    pages = []
+    for future in futures:
+        pages.extend(future.result())
+    return pages
+
+
+def extract_statement(file_obj, file_name):
+    """
+    Page-indexed text for an uploaded statement, from cache when this exact
+    file has been seen before. Returns None for unsupported file types.
+    """
+    kind = statement_kind(file_name)
+    if kind is None:
+        return None
+
+    sha256 = file_digest(file_obj)
+    key = f"{CACHE_PREFIX}:{sha256}"
+    pages = cache.get(key)
+    if pages is None:
+        data = file_obj.read()
+        file_obj.seek(0)
+        try:
+            if kind == 'pdf':
+                pages = extract_pdf_pages(data)
+            else:
+                pages = [data.decode('utf-8-sig', errors='replace')]
+        except Exception as e:
+            logger.warning(f"Could not extract text from {file_name}: {e}")
+            return ExtractedStatement(sha256, kind, [])
+        cache.set(key, pages, CACHE_TIMEOUT)
+
+    return ExtractedStatement(sha256, kind, pages)
+
+
+def statement_text(statement):
+    """Whole statement as one string, pages separated by form feeds"""
+    return '\f'.join(statement.pages)
@@ -0,0 +1,134 @@
+"""
+Background processing for uploaded bank statements.
+
+upload_statement only stores the file and a queued BankStatement. The
+process_statements worker claims queued statements with SKIP LOCKED and runs
+them in stages (extract -> analyze -> import), saving the stage and row
+counts as it goes so clients can poll for progress. CSV statements with a
+recognised layout skip the analyze stage: they are imported locally and the
+AI write-up is added afterwards, best effort, once the job is completed. Without a worker process
+(BACKGROUND_WORKERS=False) the web process drains the queue itself, see
+finance_tracker/background.py.
+"""
+import io
+import logging
+from datetime import timedelta
+
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .extraction import extract_statement
+from .openai_helper import ai_helper
+from .statement_import import UnmappedLayout, import_rows, parse_csv
+
+logger = logging.getLogger(__name__)
+
+# A statement left 'processing' this long belonged to a worker that died
+PROCESSING_LEASE = timedelta(minutes=15)
+MAX_ATTEMPTS = 3
+
+
+def claim_next():
+    """Lease the oldest runnable statement to this worker"""
+    from .models import BankStatement
+
+    stale = timezone.now() - PROCESSING_LEASE
+    with db_transaction.atomic():
+        statement = BankStatement.objects.select_for_update(skip_locked=True).filter(
+            Q(status='queued') | Q(status='processing', started_at__lt=stale)
+        ).order_by('uploaded_at').select_related('user').first()
+        if statement is None:
+            return None
+        statement.status = 'processing'
+        statement.attempts += 1
+        statement.started_at = timezone.now()
+        statement.save(update_fields=['status', 'attempts', 'started_at'])
+    return statement
+
+
+def set_stage(statement, stage, **fields):
+    statement.stage = stage
+    for name, value in fields.items():
+        setattr(statement, name, value)
+    statement.save(update_fields=['stage', *fields])
+
+
+def process_statement(statement):
+    """Run every stage for one claimed statement"""
+    try:
+        set_stage(statement, 'extract')
+        with statement.file.open('rb') as file_obj:
+            extracted = extract_statement(file_obj, statement.file_name)
+
+        # CSV layouts we can map are parsed locally and imported without the AI
+        local_rows = None
+        if extracted and extracted.kind == 'csv' and extracted.pages:
+            try:
+                local_rows = parse_csv(io.StringIO(extracted.pages[0], newline=''))
+            except UnmappedLayout as e:
+                logger.info(f"Statement {statement.pk}: CSV layout not recognised ({e}), using AI extraction")
+
+        if local_rows is not None:
+            import_statement(statement, local_rows)
+        else:
+            set_stage(statement, 'analyze')
+            reading = ai_helper.read_statement(extracted, user=statement.user)
+            statement.ai_analysis = reading.analysis
+            error = f"{reading.failed_chunks} section(s) of the statement could not be read" if reading.failed_chunks else ''
+            import_statement(statement, reading.rows, error)
+    except Exception as e:
+        logger.exception(f"Statement {statement.pk} failed in stage {statement.stage}")
+        # Leave it for another attempt unless it keeps failing
+        status = 'failed' if statement.attempts >= MAX_ATTEMPTS else 'queued'
+        set_stage(statement, statement.stage, status=status, error=str(e),
+                  finished_at=timezone.now() if status == 'failed' else None)
+        return
+
+    if local_rows is not None:
+        summarize(statement, extracted)
+
+
+def import_statement(statement, rows, error=''):
+    set_stage(statement, 'import', ai_analysis=statement.ai_analysis)
+    result = import_rows(
+        statement.user, rows,
+        on_progress=lambda progress: set_stage(
+            statement, 'import', rows_parsed=progress.parsed, rows_created=progress.created
+        )
+    )
+    set_stage(statement, 'done', status='completed', error=error, finished_at=timezone.now(),
+              rows_parsed=result.parsed, rows_created=result.created)
+
+
+def summarize(statement, extracted):
+    """Add the AI write-up to a locally imported statement; the import stands without it"""
+    try:
+        reading = ai_helper.read_statement(extracted, extract_transactions=False, user=statement.user)
+    except Exception as e:
+        logger.warning(f"Statement {statement.pk}: write-up skipped ({e})")
+        return
+    statement.ai_analysis = reading.analysis
+    statement.save(update_fields=['ai_analysis'])
+
+
+def process_batch(limit=10):
+    """Process up to limit queued statements; returns how many were claimed"""
+    processed = 0
+    while processed < limit:
+        statement = claim_next()
+        if statement is None:
+            break
+        process_statement(statement)
+        processed += 1
+    return processed
+
+
+def drain(batch_size=10):
+    """Process statements until none are runnable; returns how many were claimed"""
+    total = 0
+    while True:
+        processed = process_batch(batch_size)
+        total += processed
+        if not processed:
+            return total
@@ -0,0 +1,30 @@
+"""
+Management command to process uploaded bank statements in the background
+"""
+import time
+from django.core.management.base import BaseCommand
+from ai_features.jobs import process_batch
+
+
+class Command(BaseCommand):
+    help = 'Extract, analyze and import queued bank statements'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10, help='Statements processed per batch')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for uploads instead of exiting when idle')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep between polls with --loop')
+
+    def handle(self, *args, **options):
+        total = 0
+
+        while True:
+            processed = process_batch(options['batch_size'])
+            total += processed
+
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Processed {total} statements'))
@@ -0,0 +1,66 @@
+# Generated by Django 6.0.2 on 2026-10-16 22:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_existing_completed(apps, schema_editor):
+    # Statements uploaded before background processing were handled inline
+    BankStatement = apps.get_model('ai_features', 'BankStatement')
+    BankStatement.objects.update(status='completed', stage='done')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_features', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankstatement',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bankstatement',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='bankstatement',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bankstatement',
+            name='rows_created',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bankstatement',
+            name='rows_parsed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bankstatement',
+            name='stage',
+            field=models.CharField(choices=[('queued', 'Queued'), ('extract', 'Extracting text'), ('analyze', 'Analyzing'), ('import', 'Importing transactions'), ('done', 'Done')], default='queued', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='bankstatement',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bankstatement',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='bankstatement',
+            index=models.Index(fields=['status', 'uploaded_at'], name='ai_features_status_44ece1_idx'),
+        ),
+        migrations.RunPython(mark_existing_completed, migrations.RunPython.noop),
+    ]
@@ -14,12 +14,37 @@ class ChatMessage(models.Model):
 
 
 class BankStatement(models.Model):
-    """Store uploaded bank statements"""
+    """Store uploaded bank statements; each upload is also a processing job"""
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+    STAGE_CHOICES = (
+        ('queued', 'Queued'),
+        ('extract', 'Extracting text'),
+        ('analyze', 'Analyzing'),
+        ('import', 'Importing transactions'),
+        ('done', 'Done'),
+    )
+    
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     file = models.FileField(upload_to='bank_statements/')
     file_name = models.CharField(max_length=255)
     ai_analysis = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    stage = models.CharField(max_length=10, choices=STAGE_CHOICES, default='queued')
+    rows_parsed = models.PositiveIntegerField(default=0)
+    rows_created = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
     
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            models.Index(fields=['status', 'uploaded_at']),
+        ]
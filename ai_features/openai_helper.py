@@ -3,10 +3,31 @@ Google Gemini AI helper for chat and file analysis
 """
 from google import genai
 from google.genai import types
+from asgiref.sync import sync_to_async
 from decouple import config
-import PyPDF2
-import csv
-import io
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from .chunking import chunk_statement
+from .response_cache import PromptCache
+from .statement_schema import StatementSection
+import json
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+MODEL = 'gemini-2.5-flash'
+# Upper bound on Gemini calls in flight from this process
+GEMINI_CONCURRENCY = config('GEMINI_CONCURRENCY', default=4, cast=int)
+# Extra attempts for a chunk whose call fails or whose reply fails validation
+CHUNK_RETRIES = 2
+# First retry waits about this long, doubling (with jitter) for each later one
+CHUNK_RETRY_BACKOFF_SECONDS = 1.0
+
+StatementReading = namedtuple('StatementReading', ['analysis', 'rows', 'failed_chunks'])
 
 
 class GeminiHelper:
@@ -16,165 +37,232 @@ class GeminiHelper:
             self.client = genai.Client(api_key=self.api_key)
         else:
             self.client = None
+        # Shared by every request so concurrent uploads can't exceed the limit together
+        self.executor = ThreadPoolExecutor(max_workers=GEMINI_CONCURRENCY, thread_name_prefix='gemini')
+        self.cache = PromptCache()
     
-    def chat(self, user_message, user_context=""):
-        """Chat with Gemini AI"""
-        if not self.api_key:
-            return "Please add GEMINI_API_KEY to your environment variables. Get it free at https://ai.google.dev/"
+    def _generate(self, prompt, scope=None, bypass_cache=False):
+        """Plain-text generation through the response cache (scope=user id for personal prompts)"""
+        def call():
+            response = self.client.models.generate_content(
+                model=MODEL,
+                contents=prompt
+            )
+            return response.text
         
-        try:
-            prompt = f"""You are a helpful financial advisor. 
+        key = self.cache.make_key(MODEL, prompt, scope)
+        return self.cache.fetch(key, call, bypass=bypass_cache)
+    
+    def _generate_section(self, prompt, scope=None, bypass_cache=False):
+        """One structured-output call, validated against StatementSection; retried on failure"""
+        def call():
+            response = self.client.models.generate_content(
+                model=MODEL,
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    response_mime_type='application/json',
+                    response_schema=StatementSection,
+                )
+            )
+            # Validate before caching so a bad reply is never served again
+            return StatementSection.model_validate_json(response.text).model_dump_json()
+        
+        key = self.cache.make_key(MODEL, prompt, scope, variant='statement_section')
+        for attempt in range(CHUNK_RETRIES + 1):
+            try:
+                return StatementSection.model_validate_json(self.cache.fetch(key, call, bypass=bypass_cache))
+            except Exception as e:  # API errors and replies that fail validation alike
+                error = e
+            if attempt == CHUNK_RETRIES:
+                break
+            delay = CHUNK_RETRY_BACKOFF_SECONDS * 2 ** attempt * random.uniform(0.8, 1.2)
+            logger.warning(f"Statement chunk attempt {attempt + 1} failed, retrying in {delay:.1f}s: {error}")
+            time.sleep(delay)
+        logger.error(f"Statement chunk failed after {CHUNK_RETRIES + 1} attempts: {error}")
+        raise error
+    
+    def _chat_prompt(self, user_message, user_context=""):
+        return f"""You are a helpful financial advisor. 
 Help users with their finances, budgeting, and money management.
 {user_context}
 Be friendly and give practical advice.
 
 User question: {user_message}"""
-            
-            response = self.client.models.generate_content(
-                model='gemini-2.5-flash',
-                contents=prompt
-            )
-            return response.text
+    
+    def _chat_cache(self, user_context, user, bypass_cache):
+        """(scope, bypass) for a chat prompt: personal context is scoped to its user"""
+        scope = user.pk if user_context and user is not None else None
+        return scope, bypass_cache or (bool(user_context) and user is None)
+    
+    def chat(self, user_message, user_context="", user=None, bypass_cache=False):
+        """
+        Chat with Gemini AI.
+        
+        Questions without user_context are cached for everyone; with it, the
+        cache is scoped to user (and skipped when no user is given).
+        """
+        if not self.api_key:
+            return "Please add GEMINI_API_KEY to your environment variables. Get it free at https://ai.google.dev/"
+        
+        try:
+            scope, bypass_cache = self._chat_cache(user_context, user, bypass_cache)
+            return self._generate(self._chat_prompt(user_message, user_context), scope=scope, bypass_cache=bypass_cache)
         except Exception as e:
             return f"Error: {str(e)}"
     
-    def analyze_bank_statement(self, file_obj, file_name):
-        """Analyze uploaded bank statement"""
+    async def chat_stream(self, user_message, user_context="", user=None, bypass_cache=False):
+        """
+        Async generator of response text pieces as Gemini produces them.
+        
+        A cached answer is yielded whole; a freshly streamed one is cached
+        once it completes.
+        """
         if not self.api_key:
-            return "Please add GEMINI_API_KEY to your environment variables. Get it free at https://ai.google.dev/"
+            yield "Please add GEMINI_API_KEY to your environment variables. Get it free at https://ai.google.dev/"
+            return
+        
+        prompt = self._chat_prompt(user_message, user_context)
+        scope, bypass_cache = self._chat_cache(user_context, user, bypass_cache)
+        key = self.cache.make_key(MODEL, prompt, scope)
+        
+        if not bypass_cache and self.cache.enabled:
+            cached = await sync_to_async(self.cache.get)(key)
+            if cached is not None:
+                yield cached
+                return
+        
+        pieces = []
+        stream = await self.client.aio.models.generate_content_stream(model=MODEL, contents=prompt)
+        async for chunk in stream:
+            if chunk.text:
+                pieces.append(chunk.text)
+                yield chunk.text
+        
+        if not bypass_cache and self.cache.enabled:
+            await sync_to_async(self.cache.set)(key, ''.join(pieces))
+    
+    def read_statement(self, statement, extract_transactions=True, user=None, bypass_cache=False):
+        """
+        Analyze an extracted statement and, optionally, pull out its transactions.
         
+        Each chunk is one structured call returning its transactions and totals
+        together; a single-chunk statement also gets its written analysis in that
+        same call, longer ones get one short write-up call over the merged totals.
+        Responses are cached per user, so re-reading the same statement is free.
+        Returns a StatementReading(analysis, rows, failed_chunks).
+        """
+        scope = user.pk if user is not None else None
+        # Statement text is personal; never share it through the global scope
+        bypass_cache = bypass_cache or user is None
+        
+        if not self.api_key:
+            return StatementReading(
+                "Please add GEMINI_API_KEY to your environment variables. Get it free at https://ai.google.dev/",
+                [], 0
+            )
+        
+        if statement is None:
+            return StatementReading("Unsupported file format. Please upload PDF or CSV.", [], 0)
+        
+        chunks = chunk_statement(statement)
+        if not chunks:
+            return StatementReading("Could not extract any text from this statement.", [], 0)
+        
+        single = len(chunks) == 1
+        futures = [
+            self.executor.submit(
+                self._generate_section, self._section_prompt(chunk, extract_transactions, single),
+                scope, bypass_cache
+            )
+            for chunk in chunks
+        ]
+        sections = []
+        failed = 0
+        for index, future in enumerate(futures):
+            try:
+                sections.append(future.result())
+            except Exception as e:
+                # Only this chunk is lost; the rest of the statement still imports
+                logger.warning(f"Chunk {index + 1}/{len(chunks)} failed: {e}")
+                failed += 1
+        
+        rows = self._section_rows(sections) if extract_transactions else []
+        
+        if not sections:
+            return StatementReading("Error analyzing file: the AI service did not return a usable result.", rows, failed)
+        if single:
+            return StatementReading(sections[0].analysis, rows, failed)
+        
+        merged = self._merge_sections(sections, failed)
         try:
-            # Extract text from file
-            if file_name.endswith('.pdf'):
-                text = self._extract_pdf_text(file_obj)
-            elif file_name.endswith('.csv'):
-                text = self._extract_csv_text(file_obj)
-            else:
-                return "Unsupported file format. Please upload PDF or CSV."
-            
-            # Send to Gemini for analysis
-            prompt = f"""Analyze this bank statement and provide:
+            analysis = self._generate(self._analysis_prompt(
+                "Bank statement totals, merged from every section of the statement:\n"
+                + json.dumps(merged, indent=2)
+            ), scope=scope, bypass_cache=bypass_cache)
+        except Exception as e:
+            analysis = f"Error analyzing file: {str(e)}"
+        return StatementReading(analysis, rows, failed)
+    
+    def _analysis_prompt(self, material):
+        return f"""Analyze this bank statement and provide:
 1. Total income
 2. Total expenses  
 3. Top spending categories
 4. Financial recommendations
 
-Bank Statement:
-{text[:3000]}
+{material}
 
 Provide a clear, formatted analysis."""
-            
-            response = self.client.models.generate_content(
-                model='gemini-2.5-flash',
-                contents=prompt
-            )
-            return response.text
-        except Exception as e:
-            return f"Error analyzing file: {str(e)}"
-    
-    def _extract_pdf_text(self, file_obj):
-        """Extract text from PDF"""
-        try:
-            pdf_reader = PyPDF2.PdfReader(file_obj)
-            text = ""
-            for page in pdf_reader.pages[:5]:  # First 5 pages only
-                text += page.extract_text()
-            return text
-        except:
-            return "Could not extract text from PDF"
     
-    def _extract_csv_text(self, file_obj):
-        """Extract text from CSV"""
-        try:
-            content = file_obj.read().decode('utf-8')
-            return content[:3000]  # First 3000 chars
-        except:
-            return "Could not read CSV file"
-    
-    def auto_create_transactions(self, user, file_obj, file_name):
-        """Auto-create transactions from bank statement using AI"""
-        from transactions.models import Transaction, Category
-        from datetime import datetime
+    def _section_prompt(self, chunk, extract_transactions, with_analysis):
+        asks = ["total income, total expenses, spending per category and any notable items"]
+        if extract_transactions:
+            asks.insert(0, "every transaction (date as YYYY-MM-DD, amount positive for income and negative for expenses, a short category)")
+        if with_analysis:
+            asks.append("an 'analysis': a clear, formatted write-up covering total income, total expenses, top spending categories and financial recommendations")
+        else:
+            asks.append("leave 'analysis' empty")
+        if not extract_transactions:
+            asks.append("leave 'transactions' empty")
         
-        try:
-            # Extract text
-            if file_name.endswith('.csv'):
-                text = self._extract_csv_text(file_obj)
-            elif file_name.endswith('.pdf'):
-                text = self._extract_pdf_text(file_obj)
-            else:
-                return 0
-            
-            # Ask AI to extract transactions in JSON format
-            prompt = f"""Extract all transactions from this bank statement and return them as a JSON array.
-Each transaction should have: date (YYYY-MM-DD), description, amount (positive for income, negative for expense), category.
+        return f"""You are reading a bank statement{'' if with_analysis else ' section'}. Return JSON with:
+- """ + "\n- ".join(asks) + f"""
 
 Bank Statement:
-{text[:3000]}
-
-Return ONLY valid JSON array, no other text. Example:
-[{{"date":"2026-02-01","description":"Salary","amount":5000,"category":"Income"}},{{"date":"2026-02-02","description":"Grocery","amount":-150,"category":"Food & Dining"}}]"""
-            
-            response = self.client.models.generate_content(
-                model='gemini-2.5-flash',
-                contents=prompt
-            )
-            
-            # Parse JSON response
-            import json
-            import re
-            
-            # Extract JSON from response
-            json_text = response.text.strip()
-            # Remove markdown code blocks if present
-            json_text = re.sub(r'```json\s*', '', json_text)
-            json_text = re.sub(r'```\s*$', '', json_text)
-            
-            transactions_data = json.loads(json_text)
-            
-            # Create transactions
-            created_count = 0
-            for trans in transactions_data:
+{chunk}"""
+    
+    def _section_rows(self, sections):
+        """Validated ParsedRows from every section; a malformed row only drops itself"""
+        from .statement_import import ParsedRow
+        
+        rows = []
+        for section in sections:
+            for trans in section.transactions:
                 try:
-                    # Get or create category
-                    category_name = trans.get('category', 'Other')
-                    trans_type = 'income' if trans['amount'] > 0 else 'expense'
-                    
-                    category, _ = Category.objects.get_or_create(
-                        user=user,
-                        name=category_name,
-                        defaults={'type': trans_type}
+                    row = ParsedRow(
+                        date=datetime.strptime(trans.date.strip(), '%Y-%m-%d').date(),
+                        description=trans.description.strip()[:255],
+                        amount=Decimal(str(trans.amount)).quantize(Decimal('0.01')),
+                        category=trans.category.strip()[:100] or None,
                     )
-                    
-                    # Parse date
-                    date = datetime.strptime(trans['date'], '%Y-%m-%d').date()
-                    
-                    # Check for duplicates
-                    exists = Transaction.objects.filter(
-                        user=user,
-                        date=date,
-                        amount=abs(trans['amount']),
-                        description=trans['description']
-                    ).exists()
-                    
-                    if not exists:
-                        Transaction.objects.create(
-                            user=user,
-                            category=category,
-                            amount=abs(trans['amount']),
-                            description=trans['description'],
-                            date=date,
-                            type=trans_type,
-                            currency=user.preferred_currency
-                        )
-                        created_count += 1
-                except:
+                except (ValueError, InvalidOperation):
                     continue
-            
-            return created_count
-        except Exception as e:
-            print(f"Auto-create error: {e}")
-            return 0
+                if row.amount:
+                    rows.append(row)
+        return rows
+    
+    def _merge_sections(self, sections, failed):
+        """Add up per-section totals and categories"""
+        merged = {'total_income': 0.0, 'total_expenses': 0.0, 'categories': {}, 'notable': [],
+                  'sections': len(sections) + failed, 'sections_failed': failed}
+        for section in sections:
+            merged['total_income'] += section.total_income
+            merged['total_expenses'] += abs(section.total_expenses)
+            for total in section.categories:
+                merged['categories'][total.category] = merged['categories'].get(total.category, 0.0) + abs(total.amount)
+            merged['notable'].extend(section.notable)
+        merged['categories'] = dict(sorted(merged['categories'].items(), key=lambda item: -item[1]))
+        return merged
 
 
 # Singleton
@@ -0,0 +1,24 @@
+"""
+PDF page text extraction, run inside process-pool workers.
+
+Kept free of Django imports so spawned workers start quickly.
+"""
+import io
+
+import PyPDF2
+
+
+def page_count(data):
+    return len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+
+
+def extract_pages(data, start, stop):
+    """Text of pages [start, stop) of the PDF bytes; unreadable pages come back empty"""
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    pages = []
+    for index in range(start, min(stop, len(reader.pages))):
+        try:
+            pages.append(reader.pages[index].extract_text() or '')
+        except Exception:
+            pages.append('')
+    return pages
@@ -0,0 +1,122 @@
+"""
+Two-tier cache for Gemini responses.
+
+Keys are a SHA-256 of the model, response variant, scope and the
+whitespace-normalised prompt. Prompts that carry personal data are scoped to
+the user, so only generic prompts (FAQ-style chat) are shared across users.
+Lookups go to a small in-process LRU with a TTL first, then to the Django
+cache named by GEMINI_CACHE_ALIAS, which every gunicorn worker shares.
+Set GEMINI_CACHE_ENABLED=False (or pass bypass_cache=True) to skip it.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from decouple import config
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = config('GEMINI_CACHE_ENABLED', default=True, cast=bool)
+CACHE_TTL = config('GEMINI_CACHE_TTL', default=60 * 60 * 24, cast=int)
+LOCAL_MAX_ENTRIES = config('GEMINI_CACHE_MAX_ENTRIES', default=256, cast=int)
+# Responses larger than this stay out of the in-process tier
+LOCAL_MAX_VALUE_CHARS = 64 * 1024
+SHARED_ALIAS = config('GEMINI_CACHE_ALIAS', default='default')
+KEY_PREFIX = 'gemini'
+
+
+def normalise_prompt(prompt):
+    return ' '.join(prompt.split())
+
+
+class PromptCache:
+    """In-process LRU/TTL tier in front of a shared Django cache tier"""
+
+    def __init__(self, max_entries=LOCAL_MAX_ENTRIES, ttl=CACHE_TTL, shared_alias=SHARED_ALIAS, enabled=CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self.enabled = enabled
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'bypassed': 0}
+
+    def make_key(self, model, prompt, scope=None, variant='text'):
+        scope = f"user:{scope}" if scope is not None else 'global'
+        raw = '\x00'.join((model, variant, scope, normalise_prompt(prompt)))
+        return f"{KEY_PREFIX}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._local.move_to_end(key)
+                    self._stats['local_hits'] += 1
+                    return value
+                del self._local[key]
+
+        try:
+            value = caches[self.shared_alias].get(key)
+        except Exception as e:
+            logger.warning(f"Shared Gemini cache unavailable: {e}")
+            value = None
+        if value is None:
+            self._count('misses')
+            return None
+
+        self._count('shared_hits')
+        self._store_local(key, value)
+        return value
+
+    def set(self, key, value):
+        self._store_local(key, value)
+        try:
+            caches[self.shared_alias].set(key, value, self.ttl)
+        except Exception as e:
+            logger.warning(f"Shared Gemini cache unavailable: {e}")
+        self._count('stores')
+
+    def _store_local(self, key, value):
+        if len(value) > LOCAL_MAX_VALUE_CHARS:
+            return
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def fetch(self, key, compute, bypass=False):
+        """Cached value for key, calling compute() (which must return a str) on a miss"""
+        if bypass or not self.enabled:
+            self._count('bypassed')
+            return compute()
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def stats(self):
+        """Hit/miss counters for this process plus the local tier's size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['local_entries'] = len(self._local)
+        lookups = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['local_hits'] + stats['shared_hits']) / lookups, 3) if lookups else None
+        stats['enabled'] = self.enabled
+        return stats
@@ -0,0 +1,291 @@
+"""
+Deterministic CSV bank statement importer.
+
+Sniffs the dialect, header mapping (date / description / amount, or a
+debit/credit split) and date format from the first few kilobytes, then
+streams the text row by row. Rows are written in batches: categories come
+from one prefetched map, duplicates are found with one fingerprint IN lookup
+per batch and new rows go in with bulk_create. Layouts it cannot map raise UnmappedLayout
+so the caller can fall back to Gemini.
+"""
+import csv
+import io
+import re
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+SNIFF_BYTES = 16 * 1024
+SNIFF_ROWS = 20
+BATCH_SIZE = 500
+DEFAULT_CATEGORY = 'Other'
+
+# Normalised header name -> role; the first column found for a role wins
+HEADER_ROLES = {
+    'date': ('date', 'transaction date', 'posting date', 'posted date', 'post date',
+             'value date', 'txn date', 'booking date', 'trans date'),
+    'description': ('description', 'details', 'memo', 'narrative', 'narration', 'payee',
+                    'merchant', 'particulars', 'transaction details', 'name', 'reference'),
+    'amount': ('amount', 'amt', 'transaction amount', 'value', 'net amount'),
+    'debit': ('debit', 'debits', 'withdrawal', 'withdrawals', 'money out', 'paid out',
+              'debit amount', 'amount debited'),
+    'credit': ('credit', 'credits', 'deposit', 'deposits', 'money in', 'paid in',
+               'credit amount', 'amount credited'),
+    'category': ('category', 'categories'),
+}
+
+# Tried in order; the first format that parses every sampled date is used
+DATE_FORMATS = (
+    '%Y-%m-%d', '%Y/%m/%d', '%m/%d/%Y', '%d/%m/%Y', '%m-%d-%Y', '%d-%m-%Y', '%d.%m.%Y',
+    '%m/%d/%y', '%d/%m/%y', '%d %b %Y', '%d-%b-%Y', '%b %d, %Y', '%d %B %Y', '%B %d, %Y',
+)
+
+ParsedRow = namedtuple('ParsedRow', ['date', 'description', 'amount', 'category'])
+ImportResult = namedtuple('ImportResult', ['parsed', 'created'])
+Layout = namedtuple('Layout', ['dialect', 'columns', 'date_format'])
+
+
+class UnmappedLayout(Exception):
+    """The statement's columns could not be mapped without help"""
+
+
+def normalise_header(value):
+    return re.sub(r'[^a-z ]', '', value.strip().lower()).strip()
+
+
+def parse_amount(value):
+    """Parse '1,234.50', '$-45', '(45.00)', '45.00 DR' and friends; None if blank"""
+    text = (value or '').strip()
+    if not text:
+        return None
+    negative = False
+    upper = text.upper()
+    if upper.endswith(('DR', 'CR')):
+        negative = upper.endswith('DR')
+        text = text[:-2]
+    if text.startswith('(') and text.endswith(')'):
+        negative, text = True, text[1:-1]
+    if text.endswith('-'):
+        negative, text = True, text[:-1]
+    # Decimal comma ('6,50', '1.234,56') vs thousands comma ('1,234.50')
+    if ',' in text and text.rfind(',') > text.rfind('.') and re.search(r',\d{1,2}\s*$', text):
+        text = text.replace('.', '').replace(',', '.')
+    text = re.sub(r'[^\d.\-]', '', text)
+    if text.startswith('-'):
+        negative, text = not negative, text[1:]
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}")
+    return -amount if negative else amount
+
+
+def map_columns(header):
+    """Map header cells to roles, or raise UnmappedLayout"""
+    columns = {}
+    names = [normalise_header(cell) for cell in header]
+    for role, aliases in HEADER_ROLES.items():
+        for index, name in enumerate(names):
+            if name in aliases and index not in columns.values():
+                columns[role] = index
+                break
+
+    if 'date' not in columns or 'description' not in columns:
+        raise UnmappedLayout('No date or description column')
+    if 'amount' not in columns and not ('debit' in columns and 'credit' in columns):
+        raise UnmappedLayout('No amount or debit/credit columns')
+    return columns
+
+
+def detect_date_format(values):
+    values = [value.strip() for value in values if value.strip()]
+    if not values:
+        raise UnmappedLayout('No dates to sniff')
+    for date_format in DATE_FORMATS:
+        try:
+            for value in values:
+                datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+        return date_format
+    raise UnmappedLayout(f"Unrecognised date format: {values[0]!r}")
+
+
+def sniff_layout(sample):
+    """Work out dialect, column mapping and date format from the start of the file"""
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+    except csv.Error:
+        dialect = csv.excel
+
+    rows = csv.reader(io.StringIO(sample), dialect)
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise UnmappedLayout('Empty file')
+    columns = map_columns(header)
+
+    dates = []
+    for row in rows:
+        if len(dates) >= SNIFF_ROWS:
+            break
+        if len(row) > columns['date']:
+            dates.append(row[columns['date']])
+    # The last sampled line may have been cut mid-row
+    return Layout(dialect, columns, detect_date_format(dates[:-1] or dates))
+
+
+def parse_rows(text_stream, layout):
+    """Yield ParsedRow for every data row, skipping blank and unparseable lines"""
+    columns = layout.columns
+    reader = csv.reader(text_stream, layout.dialect)
+    next(reader, None)  # header
+
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            date = datetime.strptime(row[columns['date']].strip(), layout.date_format).date()
+            if 'amount' in columns:
+                amount = parse_amount(row[columns['amount']])
+            else:
+                credit = parse_amount(row[columns['credit']]) or Decimal('0')
+                debit = parse_amount(row[columns['debit']]) or Decimal('0')
+                amount = credit - abs(debit)
+        except (IndexError, ValueError):
+            continue
+        if not amount:
+            continue
+
+        category = row[columns['category']].strip() if 'category' in columns and len(row) > columns['category'] else ''
+        yield ParsedRow(date, row[columns['description']].strip()[:255], amount, category or None)
+
+
+def row_type(row):
+    """Credits are income, debits expenses; amounts are stored unsigned"""
+    return 'income' if row.amount > 0 else 'expense'
+
+
+class TransactionWriter:
+    """Batches parsed rows into bulk inserts for one user"""
+
+    def __init__(self, user, batch_size=BATCH_SIZE, on_progress=None):
+        from transactions.models import Category
+
+        self.user = user
+        self.batch_size = batch_size
+        self.on_progress = on_progress
+        self.categories = {
+            (category.name.lower(), category.type): category
+            for category in Category.objects.filter(user=user)
+        }
+        self.seen = set()
+        self.pending = []
+        self.parsed = 0
+        self.created = 0
+        self.touched_categories = set()
+
+    def category_for(self, row, trans_type):
+        if row.category:
+            name = row.category
+        else:
+            # Use an existing category whose name appears in the description
+            description = row.description.lower()
+            name = next((
+                category.name for (key, kind), category in self.categories.items()
+                if kind == trans_type and key and re.search(rf'\b{re.escape(key)}\b', description)
+            ), DEFAULT_CATEGORY)
+
+        key = (name.lower(), trans_type)
+        if key not in self.categories:
+            from transactions.models import Category
+            self.categories[key], _ = Category.objects.get_or_create(
+                user=self.user, name=name[:100], type=trans_type
+            )
+        return self.categories[key]
+
+    def add(self, row):
+        self.parsed += 1
+        self.pending.append(row)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        from transactions.fingerprints import fingerprint
+        from transactions.models import Transaction
+
+        rows, self.pending = self.pending, []
+        if not rows:
+            return
+
+        currency = self.user.preferred_currency
+        keyed = [
+            (fingerprint(self.user.pk, row.date, row_type(row), row.amount, currency, row.description), row)
+            for row in rows
+        ]
+        # One indexed IN lookup per batch instead of one exists() per row
+        existing = set(Transaction.objects.filter(
+            user=self.user, fingerprint__in={key for key, _ in keyed}
+        ).values_list('fingerprint', flat=True))
+
+        new = []
+        for key, row in keyed:
+            if key in existing or key in self.seen:
+                continue
+            self.seen.add(key)
+            trans_type = row_type(row)
+            category = self.category_for(row, trans_type)
+            new.append(Transaction(
+                user=self.user,
+                category=category,
+                amount=abs(row.amount),
+                description=row.description,
+                date=row.date,
+                type=trans_type,
+                currency=currency,
+            ))
+            self.touched_categories.add(category.id)
+
+        Transaction.objects.bulk_create(new, batch_size=self.batch_size)
+        self.created += len(new)
+        if self.on_progress:
+            self.on_progress(ImportResult(self.parsed, self.created))
+
+    def close(self):
+        """Flush the last batch and queue budget checks; returns an ImportResult"""
+        from transactions.budget_alerts import mark_dirty
+
+        self.flush()
+        if self.touched_categories:
+            mark_dirty(self.user, self.touched_categories)
+        return ImportResult(self.parsed, self.created)
+
+
+def import_rows(user, rows, on_progress=None):
+    """
+    Insert an iterable of ParsedRow for the user; returns an ImportResult.
+
+    Each batch commits on its own so progress is visible while a long import
+    runs; a retried import skips the rows already stored by fingerprint.
+    """
+    writer = TransactionWriter(user, on_progress=on_progress)
+    for row in rows:
+        writer.add(row)
+    return writer.close()
+
+
+def parse_csv(text_stream):
+    """
+    Sniff a CSV statement and return a generator of its ParsedRows.
+
+    Raises UnmappedLayout straight away when the columns or date format can't
+    be mapped, before any row is read.
+    """
+    layout = sniff_layout(text_stream.read(SNIFF_BYTES))
+    text_stream.seek(0)
+    return parse_rows(text_stream, layout)
+
+
+def import_csv(user, text_stream, on_progress=None):
+    """Import a CSV statement from a seekable text stream without any network call"""
+    return import_rows(user, parse_csv(text_stream), on_progress)
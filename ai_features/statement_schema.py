@@ -0,0 +1,31 @@
+"""
+Response schema for structured statement reading.
+
+Gemini is asked for JSON matching StatementSection (response_schema mode) and
+every reply is validated against it, so one call returns both the section's
+transactions and its summary.
+"""
+from pydantic import BaseModel, Field
+
+
+class StatementTransaction(BaseModel):
+    date: str = Field(description='Transaction date as YYYY-MM-DD')
+    description: str
+    amount: float = Field(description='Positive for income, negative for expenses')
+    category: str = Field(description='Short spending or income category, e.g. Groceries')
+
+
+class CategoryTotal(BaseModel):
+    category: str
+    amount: float = Field(description='Total spent in this category, positive')
+
+
+class StatementSection(BaseModel):
+    transactions: list[StatementTransaction] = Field(
+        default_factory=list, description='Every transaction in this text, in order'
+    )
+    total_income: float
+    total_expenses: float = Field(description='Total expenses, positive')
+    categories: list[CategoryTotal] = Field(default_factory=list)
+    notable: list[str] = Field(default_factory=list, description='Short notes on unusual items')
+    analysis: str = Field(default='', description='Formatted analysis, only when asked for')
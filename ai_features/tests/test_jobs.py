@@ -0,0 +1,85 @@
+"""
+Statement jobs: CSV statements with a recognised layout import without the
+AI service, which only adds a best-effort write-up afterwards.
+"""
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from ai_features import jobs
+from ai_features.models import BankStatement
+from ai_features.openai_helper import StatementReading
+from transactions.models import Transaction
+
+CSV = (
+    "Date,Description,Amount\n"
+    "2026-03-01,Salary,5000.00\n"
+    "2026-03-02,Groceries,-42.50\n"
+    "2026-03-03,Coffee,-3.20\n"
+)
+
+
+class ProcessStatementTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media = tempfile.mkdtemp()
+        cls.settings_override = override_settings(MEDIA_ROOT=cls.media)
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.media, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='jobs', email='jobs@example.com')
+
+    def queue(self, content, name='statement.csv'):
+        statement = BankStatement(user=self.user, file_name=name)
+        statement.file.save(name, ContentFile(content.encode('utf-8')), save=True)
+        return jobs.claim_next()
+
+    def test_csv_imports_when_ai_fails(self):
+        statement = self.queue(CSV)
+        with mock.patch.object(jobs, 'ai_helper') as ai_helper:
+            ai_helper.read_statement.side_effect = RuntimeError('Gemini unavailable')
+            jobs.process_statement(statement)
+
+        statement.refresh_from_db()
+        self.assertEqual((statement.status, statement.stage), ('completed', 'done'))
+        self.assertEqual(statement.rows_created, 3)
+        self.assertEqual(statement.error, '')
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 3)
+
+    def test_csv_write_up_runs_after_import(self):
+        statement = self.queue(CSV)
+        imported_before_call = []
+
+        def read_statement(extracted, extract_transactions=True, user=None):
+            imported_before_call.append(Transaction.objects.filter(user=self.user).count())
+            self.assertFalse(extract_transactions)
+            return StatementReading('Spent 45.70', [], 0)
+
+        with mock.patch.object(jobs.ai_helper, 'read_statement', side_effect=read_statement):
+            jobs.process_statement(statement)
+
+        statement.refresh_from_db()
+        self.assertEqual(imported_before_call, [3])
+        self.assertEqual((statement.status, statement.ai_analysis), ('completed', 'Spent 45.70'))
+
+    def test_unmapped_csv_still_uses_ai_extraction(self):
+        statement = self.queue("foo;bar\nx;y\n")
+        with mock.patch.object(jobs.ai_helper, 'read_statement',
+                               return_value=StatementReading('No transactions', [], 0)) as read_statement:
+            jobs.process_statement(statement)
+
+        read_statement.assert_called_once()
+        self.assertNotIn('extract_transactions', read_statement.call_args.kwargs)
+        statement.refresh_from_db()
+        self.assertEqual((statement.status, statement.ai_analysis), ('completed', 'No transactions'))
@@ -3,7 +3,10 @@ from . import views
 
 urlpatterns = [
     path('chat/', views.chat, name='ai-chat'),
+    path('chat/stream/', views.chat_stream, name='ai-chat-stream'),
     path('chat/history/', views.chat_history, name='chat-history'),
     path('upload/', views.upload_statement, name='upload-statement'),
     path('statements/', views.statement_history, name='statement-history'),
+    path('statements/<int:pk>/', views.statement_status, name='statement-status'),
+    path('cache/stats/', views.cache_stats, name='ai-cache-stats'),
 ]
@@ -1,7 +1,17 @@
+import json
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.authtoken.models import Token
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from finance_tracker.background import drain_after_commit
+from transactions.retrieval import render_retrieval, retrieve
+from transactions.snapshot import get_snapshot
+from . import jobs
 from .models import ChatMessage, BankStatement
 from .openai_helper import ai_helper
 
@@ -15,8 +25,8 @@ def chat(request):
     if not message:
         return Response({'error': 'Message required'}, status=400)
     
-    # Get AI response
-    response_text = ai_helper.chat(message)
+    # Get AI response, grounded in the user's snapshot and matching transactions
+    response_text = ai_helper.chat(message, user_context=chat_context(request.user, message), user=request.user)
     
     # Save to database
     ChatMessage.objects.create(
@@ -31,6 +41,74 @@ def chat(request):
     })
 
 
+@csrf_exempt
+@require_POST
+async def chat_stream(request):
+    """
+    Chat with AI bot, streaming the reply as server-sent events.
+    
+    Emits {"type": "token", "text": ...} events as Gemini generates, then
+    {"type": "done", "id": ...} once the ChatMessage is saved, or
+    {"type": "error", "error": ...}. Token auth only, hence no CSRF check.
+    """
+    user = await token_user(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    
+    try:
+        message = (json.loads(request.body or b'{}').get('message') or '').strip()
+    except (ValueError, AttributeError):
+        message = ''
+    if not message:
+        return JsonResponse({'error': 'Message required'}, status=400)
+    
+    user_context = await sync_to_async(chat_context)(user, message)
+    
+    async def events():
+        pieces = []
+        try:
+            async for text in ai_helper.chat_stream(message, user_context=user_context, user=user):
+                pieces.append(text)
+                yield sse_event({'type': 'token', 'text': text})
+        except Exception as e:
+            yield sse_event({'type': 'error', 'error': str(e)})
+            return
+        
+        # Persist only a completed reply
+        chat_message = await ChatMessage.objects.acreate(
+            user=user,
+            message=message,
+            response=''.join(pieces)
+        )
+        yield sse_event({'type': 'done', 'id': chat_message.id})
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let a proxy buffer the stream
+    return response
+
+
+def chat_context(user, message):
+    """Cached financial snapshot plus the transactions the question is about"""
+    return get_snapshot(user) + render_retrieval(retrieve(user, message), user.preferred_currency)
+
+
+async def token_user(request):
+    """User for an 'Authorization: Token <key>' header, or None"""
+    header = request.headers.get('Authorization', '').split()
+    if len(header) != 2 or header[0] != 'Token':
+        return None
+    try:
+        token = await Token.objects.select_related('user').aget(key=header[1])
+    except Token.DoesNotExist:
+        return None
+    return token.user if token.user.is_active else None
+
+
+def sse_event(data):
+    return f"data: {json.dumps(data)}\n\n"
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def chat_history(request):
@@ -48,7 +126,7 @@ def chat_history(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def upload_statement(request):
-    """Upload and analyze bank statement - Auto-create transactions"""
+    """Queue a bank statement for background analysis and transaction import"""
     if 'file' not in request.FILES:
         return Response({'error': 'No file uploaded'}, status=400)
     
@@ -59,28 +137,52 @@ def upload_statement(request):
     if not (file_name.endswith('.pdf') or file_name.endswith('.csv')):
         return Response({'error': 'Only PDF and CSV files allowed'}, status=400)
     
-    # Analyze with AI
-    analysis = ai_helper.analyze_bank_statement(file_obj, file_name)
-    
-    # Auto-create transactions from statement
-    file_obj.seek(0)  # Reset file pointer
-    transactions_created = ai_helper.auto_create_transactions(request.user, file_obj, file_name)
-    
-    # Save to database
+    # Persist the upload; the process_statements worker does the slow part
     statement = BankStatement.objects.create(
         user=request.user,
         file=file_obj,
         file_name=file_name,
-        ai_analysis=analysis
     )
+    drain_after_commit('statements', jobs.drain)
     
-    return Response({
+    return Response(statement_data(statement), status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def statement_status(request, pk):
+    """Get processing status of an uploaded statement"""
+    try:
+        statement = BankStatement.objects.get(pk=pk, user=request.user)
+    except BankStatement.DoesNotExist:
+        return Response({'error': 'Statement not found'}, status=404)
+    if statement.status in ('queued', 'processing'):
+        # Picks up uploads left behind when the process that queued them restarted
+        drain_after_commit('statements', jobs.drain)
+    return Response(statement_data(statement))
+
+
+def statement_data(statement):
+    return {
         'id': statement.id,
-        'file_name': file_name,
-        'analysis': analysis,
-        'transactions_created': transactions_created,
-        'uploaded_at': statement.uploaded_at
-    })
+        'file_name': statement.file_name,
+        'status': statement.status,
+        'stage': statement.stage,
+        'rows_parsed': statement.rows_parsed,
+        'rows_created': statement.rows_created,
+        'transactions_created': statement.rows_created,
+        'analysis': statement.ai_analysis,
+        'error': statement.error,
+        'uploaded_at': statement.uploaded_at,
+        'finished_at': statement.finished_at,
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """Get Gemini response cache hit/miss counters for this worker"""
+    return Response(ai_helper.cache.stats())
 
 
 @api_view(['GET'])
@@ -88,10 +190,5 @@ def upload_statement(request):
 def statement_history(request):
     """Get uploaded statements"""
     statements = BankStatement.objects.filter(user=request.user)[:10]
-    data = [{
-        'id': s.id,
-        'file_name': s.file_name,
-        'analysis': s.ai_analysis,
-        'uploaded_at': s.uploaded_at
-    } for s in statements]
+    data = [statement_data(s) for s in statements]
     return Response(data)
@@ -41,12 +41,37 @@ export default function AIChat() {
 
     try {
       const token = localStorage.getItem('token');
-      const res = await axios.post(`${API_URL}/ai/chat/`, 
-        { message: userMessage },
-        { headers: { Authorization: `Token ${token}` }}
-      );
-      
-      setMessages(prev => [...prev, { text: res.data.response, isUser: false }]);
+      const res = await fetch(`${API_URL}/ai/chat/stream/`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', Authorization: `Token ${token}` },
+        body: JSON.stringify({ message: userMessage })
+      });
+      if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+
+      // Append the reply as server-sent token events arrive
+      setMessages(prev => [...prev, { text: '', isUser: false }]);
+      setLoading(false);
+      const appendText = (text) => setMessages(prev => {
+        const last = prev[prev.length - 1];
+        return [...prev.slice(0, -1), { ...last, text: last.text + text }];
+      });
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const event of events) {
+          if (!event.startsWith('data: ')) continue;
+          const data = JSON.parse(event.slice(6));
+          if (data.type === 'token') appendText(data.text);
+          if (data.type === 'error') throw new Error(data.error);
+        }
+      }
     } catch (err) {
       setMessages(prev => [...prev, { 
         text: 'Sorry, I encountered an error. Please try again.', 
@@ -1855,7 +1855,11 @@ function AdminDashboard() {
           <div className="hidden md:block">
             <div className="text-right">
               <p className="text-white/80 text-sm">Last Updated</p>
-              <p className="text-white font-semibold">{new Date().toLocaleTimeString()}</p>
+              <p className="text-white font-semibold">
+                {stats?.computed_at ? new Date(stats.computed_at).toLocaleTimeString() : 'N/A'}
+                {stats?.age_seconds != null && ` (${stats.age_seconds < 60 ? `${stats.age_seconds}s` : `${Math.round(stats.age_seconds / 60)} min`} ago)`}
+                {stats?.estimated && ' (estimated)'}
+              </p>
             </div>
           </div>
         </div>
@@ -1959,14 +1963,20 @@ function AdminUserManagement() {
   const [selectedUser, setSelectedUser] = useState(null);
   const [loading, setLoading] = useState(true);
   const [showDetails, setShowDetails] = useState(false);
+  const [page, setPage] = useState(1);
+  const [totalUsers, setTotalUsers] = useState(0);
+  const [hasNext, setHasNext] = useState(false);
   useEffect(() => {
-    loadUsers();
+    loadUsers(1);
   }, []);
-  const loadUsers = () => {
+  const loadUsers = (pageNumber = page) => {
     setLoading(true);
-    api.get('/admin/users/user_list_detailed/')
+    api.get('/admin/users/user_list_detailed/', { params: { page: pageNumber } })
       .then(res => {
-        setUsers(res.data);
+        setUsers(res.data.results);
+        setTotalUsers(res.data.count);
+        setHasNext(Boolean(res.data.next));
+        setPage(pageNumber);
         setLoading(false);
       })
       .catch(err => {
@@ -2031,7 +2041,7 @@ function AdminUserManagement() {
           <div className="hidden md:block">
             <div className="text-right">
               <p className="text-white/80 text-sm">Total Users</p>
-              <p className="text-white font-bold text-2xl">{users.length}</p>
+              <p className="text-white font-bold text-2xl">{totalUsers}</p>
             </div>
           </div>
         </div>
@@ -2198,6 +2208,24 @@ function AdminUserManagement() {
             </tbody>
           </table>
         </div>
+        {/* Pagination */}
+        <div className="flex items-center justify-between px-6 py-4 border-t border-gray-100">
+          <button
+            onClick={() => loadUsers(page - 1)}
+            disabled={page <= 1}
+            className="px-4 py-2 rounded-lg text-sm font-medium bg-gray-100 hover:bg-gray-200 disabled:opacity-50 transition-colors"
+          >
+            Previous
+          </button>
+          <span className="text-sm text-gray-600">Page {page}</span>
+          <button
+            onClick={() => loadUsers(page + 1)}
+            disabled={!hasNext}
+            className="px-4 py-2 rounded-lg text-sm font-medium bg-gray-100 hover:bg-gray-200 disabled:opacity-50 transition-colors"
+          >
+            Next
+          </button>
+        </div>
       </div>
     </div>
   );
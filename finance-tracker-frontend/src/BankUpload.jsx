@@ -2,12 +2,23 @@ import { useState } from 'react';
 import axios from 'axios';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
+const POLL_INTERVAL_MS = 1500;
+
+const STAGE_LABELS = {
+  queued: 'Queued...',
+  extract: 'Reading statement...',
+  analyze: 'Analyzing...',
+  import: 'Importing transactions...',
+};
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
 
 export default function BankUpload() {
   const [file, setFile] = useState(null);
   const [uploading, setUploading] = useState(false);
   const [result, setResult] = useState(null);
   const [dragActive, setDragActive] = useState(false);
+  const [progress, setProgress] = useState(null);
 
   const handleDrag = (e) => {
     e.preventDefault();
@@ -46,14 +57,20 @@ export default function BankUpload() {
 
     try {
       const token = localStorage.getItem('token');
+      const headers = { 'Authorization': `Token ${token}` };
       const res = await axios.post(`${API_URL}/ai/upload/`, formData, {
-        headers: {
-          'Authorization': `Token ${token}`,
-          'Content-Type': 'multipart/form-data'
-        }
+        headers: { ...headers, 'Content-Type': 'multipart/form-data' }
       });
-      
-      setResult(res.data);
+
+      // Processing happens in the background; poll until it finishes
+      let job = res.data;
+      while (job.status === 'queued' || job.status === 'processing') {
+        setProgress(job);
+        await sleep(POLL_INTERVAL_MS);
+        job = (await axios.get(`${API_URL}/ai/statements/${job.id}/`, { headers })).data;
+      }
+
+      setResult(job.status === 'failed' ? { error: job.error || 'Processing failed. Please try again.' } : job);
       setFile(null);
     } catch (err) {
       setResult({
@@ -61,6 +78,7 @@ export default function BankUpload() {
       });
     } finally {
       setUploading(false);
+      setProgress(null);
     }
   };
 
@@ -132,7 +150,8 @@ export default function BankUpload() {
                   <circle className="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" strokeWidth="4" fill="none"></circle>
                   <path className="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path>
                 </svg>
-                Analyzing...
+                {STAGE_LABELS[progress?.stage] || 'Uploading...'}
+                {progress?.rows_parsed > 0 && ` (${progress.rows_created}/${progress.rows_parsed} rows)`}
               </span>
             ) : 'Upload & Analyze'}
           </button>
@@ -0,0 +1,107 @@
+"""
+In-process fallback for the queue workers.
+
+Budget alerts and uploaded statements are queued in the database and drained
+by management commands running with --loop (Procfile "worker" and
+"statements"). Deployments that run those processes set
+BACKGROUND_WORKERS=True. Deployments that only run the web service, like the
+Render blueprint, leave it False: the web process then drains each queue
+itself on a small thread pool once the enqueuing transaction commits, and
+resume() picks up whatever a previous server process left queued. Work that
+only comes due later (email retries, expired leases) is woken by call_at().
+
+Claims use SKIP LOCKED, so drains in several web processes (or alongside a
+worker) never process the same row twice.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from decouple import config
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND_WORKERS = config('BACKGROUND_WORKERS', default=False, cast=bool)
+MAX_THREADS = config('INPROCESS_JOB_THREADS', default=2, cast=int)
+
+_executor = ThreadPoolExecutor(max_workers=MAX_THREADS, thread_name_prefix='jobs')
+_lock = threading.Lock()
+_running = set()
+_rerun = set()
+_timers = {}
+
+
+def drain_after_commit(name, drain):
+    """Run drain() on the in-process pool after commit, unless dedicated workers own the queue"""
+    if BACKGROUND_WORKERS:
+        return
+    db_transaction.on_commit(lambda: _submit(name, drain))
+
+
+def call_at(name, callback, when):
+    """Call callback() from a timer thread at datetime when; only the earliest pending call per name is kept"""
+    if BACKGROUND_WORKERS:
+        return
+    with _lock:
+        pending = _timers.get(name)
+        if pending is not None and pending[0] <= when:
+            return
+        if pending is not None:
+            pending[1].cancel()
+        timer = threading.Timer(max(0, (when - timezone.now()).total_seconds()), _fire, (name, callback))
+        timer.daemon = True
+        _timers[name] = (when, timer)
+    timer.start()
+
+
+def _fire(name, callback):
+    with _lock:
+        if _timers.get(name, (None, None))[1] is threading.current_thread():
+            del _timers[name]
+    try:
+        callback()
+    except Exception:
+        logger.exception(f"Scheduled {name} wake-up failed")
+
+
+def resume():
+    """Drain queues a previous server process left behind; called once per web server process"""
+    if BACKGROUND_WORKERS:
+        return
+    from accounts.mailgun_service import email_service
+    from ai_features import jobs
+    from transactions import budget_alerts
+
+    if email_service.is_configured:
+        email_service.pipeline.kick()
+    _submit('statements', jobs.drain)
+    _submit('budget_alerts', budget_alerts.drain)
+
+
+def _submit(name, drain):
+    with _lock:
+        if name in _running:
+            # The running drain goes round once more and picks the new rows up
+            _rerun.add(name)
+            return
+        _running.add(name)
+    _executor.submit(_run, name, drain)
+
+
+def _run(name, drain):
+    try:
+        while True:
+            try:
+                drain()
+            except Exception:
+                logger.exception(f"In-process {name} drain failed")
+            with _lock:
+                if name not in _rerun:
+                    _running.discard(name)
+                    return
+                _rerun.discard(name)
+    finally:
+        # Pool threads must not hold on to their own DB connection
+        connection.close()
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finance_tracker.settings')
 
 application = get_wsgi_application()
+
+# Pick up queued work the previous server process left behind
+from finance_tracker import background  # noqa: E402
+
+background.resume()
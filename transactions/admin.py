@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.db.models import Q
 from .models import Category, Transaction, Budget, RecurringTransaction
+from .search import search_transactions
 
 
 @admin.register(Category)
@@ -15,11 +17,20 @@ class CategoryAdmin(admin.ModelAdmin):
 class TransactionAdmin(admin.ModelAdmin):
     list_display = ['description', 'amount', 'currency', 'type', 'category', 'user', 'date', 'created_at']
     list_filter = ['type', 'currency', 'date', 'category', 'created_at']
-    search_fields = ['description', 'notes', 'user__username', 'category__name']
+    # description and notes are matched through the full-text index below
+    search_fields = ['user__username', 'category__name']
     ordering = ['-date', '-created_at']
     date_hierarchy = 'date'
     list_per_page = 25
     
+    def get_search_results(self, request, queryset, search_term):
+        by_owner, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if not search_term:
+            return by_owner, may_have_duplicates
+        
+        by_text = search_transactions(queryset, search_term)
+        return queryset.filter(Q(pk__in=by_text.values('pk')) | Q(pk__in=by_owner.values('pk'))), False
+    
     fieldsets = (
         ('Basic Information', {
             'fields': ('user', 'category', 'type', 'date')
@@ -2,24 +2,36 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction as db_transaction
 from django.db.models import Sum, Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
+from dateutil.relativedelta import relativedelta
 from .models import Category, Transaction, Budget, RecurringTransaction
+from . import budget_alerts, exports, rollups, timeseries
+from .budget_status import compute_budget_statuses
+from .conditional import ConditionalGetMixin
+from .pagination import TransactionKeysetPagination
+from .response_cache import cached_response
+from .search import TransactionSearchFilter
 from .serializers import (
     CategorySerializer, TransactionSerializer, BudgetSerializer,
-    RecurringTransactionSerializer, DashboardStatsSerializer
+    RecurringTransactionSerializer, DashboardStatsSerializer,
+    BulkTransactionRowSerializer
 )
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """API endpoint for categories"""
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description']
-    ordering_fields = ['name', 'type', 'created_at']
+    ordering_fields = ['name', 'type', 'created_at', 'transaction_count', 'total_amount']
     ordering = ['type', 'name']
     
     def get_queryset(self):
@@ -28,6 +40,10 @@ class CategoryViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
     
+    @cached_response('categories')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
     @action(detail=False, methods=['get'])
     def by_type(self, request):
         """Get categories filtered by type"""
@@ -41,17 +57,18 @@ class CategoryViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """API endpoint for transactions"""
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.OrderingFilter, TransactionSearchFilter]
     search_fields = ['description', 'notes']
     ordering_fields = ['date', 'amount', 'created_at']
     ordering = ['-date', '-created_at']
+    MAX_BULK_ROWS = 1000
     
     def get_queryset(self):
-        queryset = Transaction.objects.filter(user=self.request.user)
+        queryset = Transaction.objects.filter(user=self.request.user).select_related('category')
         
         # Filter by type
         transaction_type = self.request.query_params.get('type', None)
@@ -74,64 +91,208 @@ class TransactionViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    @property
+    def paginator(self):
+        # ?pagination=cursor opts into keyset pages that stay fast at any depth
+        if self.request is not None and self.request.query_params.get('pagination') == 'cursor':
+            self.pagination_class = TransactionKeysetPagination
+        return super().paginator
+    
+    def get_count_estimate(self):
+        """Count of the filtered list from monthly rollups, or None when a search is applied"""
+        params = self.request.query_params
+        if params.get('search'):
+            return None
+        transaction_type = params.get('type', None)
+        return rollups.summarize(rollups.category_totals(
+            self.request.user,
+            start_date=params.get('start_date') or None,
+            end_date=params.get('end_date') or None,
+            type=transaction_type if transaction_type in ['income', 'expense'] else None,
+            category_id=params.get('category') or None,
+        ))['count']
+    
     def perform_create(self, serializer):
         transaction = serializer.save(user=self.request.user)
         
         # Check budgets and send alerts if needed
         if transaction.type == 'expense':
-            from accounts.notifications import email_service
-            
-            # Get active budgets for this category
-            budgets = Budget.objects.filter(
-                user=self.request.user,
-                category=transaction.category,
-                is_active=True
-            )
-            
-            for budget in budgets:
-                # Check if budget alert should be sent
-                if budget.should_alert() or budget.is_over_budget():
-                    email_service.send_budget_alert(self.request.user, budget)
+            self.check_budget_alerts([transaction.category_id])
     
     def perform_update(self, serializer):
         transaction = serializer.save()
         
         # Check budgets and send alerts if needed (after update)
         if transaction.type == 'expense':
-            from accounts.notifications import email_service
-            
-            # Get active budgets for this category
-            budgets = Budget.objects.filter(
-                user=self.request.user,
-                category=transaction.category,
-                is_active=True
+            self.check_budget_alerts([transaction.category_id])
+    
+    def check_budget_alerts(self, category_ids):
+        """Queue the user's budgets for these categories; the alert worker sends any emails"""
+        budget_alerts.mark_dirty(self.request.user, category_ids)
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Create, update and delete many transactions in one atomic request.
+        
+        Body: {"create": [...], "update": [{"id": ..., ...}], "delete": [ids]}.
+        Invalid rows are reported in "errors" and skipped; valid rows are written.
+        """
+        user = request.user
+        create_rows = request.data.get('create') or []
+        update_rows = request.data.get('update') or []
+        delete_ids = request.data.get('delete') or []
+        
+        if not all(isinstance(rows, list) for rows in (create_rows, update_rows, delete_ids)):
+            return Response(
+                {'error': 'create, update and delete must be lists'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        if len(create_rows) + len(update_rows) + len(delete_ids) > self.MAX_BULK_ROWS:
+            return Response(
+                {'error': f'At most {self.MAX_BULK_ROWS} rows per bulk request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        errors = []
+        
+        if not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in delete_ids):
+            return Response(
+                {'error': 'delete must be a list of transaction ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        def validate_rows(rows, operation, partial=False):
+            valid = []
+            for index, row in enumerate(rows):
+                serializer = BulkTransactionRowSerializer(data=row, partial=partial)
+                if not serializer.is_valid():
+                    errors.append({'operation': operation, 'index': index, 'errors': serializer.errors})
+                elif partial and 'id' not in serializer.validated_data:
+                    errors.append({'operation': operation, 'index': index, 'errors': {'id': ['This field is required.']}})
+                else:
+                    valid.append((index, serializer.validated_data))
+            return valid
+        
+        valid_creates = validate_rows(create_rows, 'create')
+        valid_updates = validate_rows(update_rows, 'update', partial=True)
+        
+        # One ownership query for every category referenced in the batch
+        category_ids = {data['category'] for _, data in valid_creates + valid_updates if 'category' in data}
+        categories = Category.objects.filter(user=user, id__in=category_ids).in_bulk()
+        existing = Transaction.objects.filter(
+            user=user, id__in=[data['id'] for _, data in valid_updates]
+        ).select_related('category').in_bulk()
+        
+        to_create = []
+        for index, data in valid_creates:
+            data.pop('id', None)
+            category = categories.get(data.pop('category'))
+            if category is None:
+                errors.append({'operation': 'create', 'index': index, 'errors': {'category': ['Invalid category.']}})
+                continue
+            to_create.append(Transaction(user=user, category=category, type=category.type, **data))
+        
+        to_update = []
+        update_fields = {'updated_at'}
+        affected_categories = {transaction.category_id for transaction in to_create}
+        now = timezone.now()
+        for index, data in valid_updates:
+            transaction = existing.get(data.pop('id'))
+            if transaction is None:
+                errors.append({'operation': 'update', 'index': index, 'errors': {'id': ['Not found.']}})
+                continue
+            if 'category' in data:
+                category = categories.get(data.pop('category'))
+                if category is None:
+                    errors.append({'operation': 'update', 'index': index, 'errors': {'category': ['Invalid category.']}})
+                    continue
+                affected_categories.add(transaction.category_id)
+                transaction.category = category
+                transaction.type = category.type
+                update_fields.update(['category', 'type'])
+            for field, value in data.items():
+                setattr(transaction, field, value)
+            update_fields.update(data)
+            transaction.updated_at = now
+            affected_categories.add(transaction.category_id)
+            to_update.append(transaction)
+        
+        with db_transaction.atomic():
+            created = Transaction.objects.bulk_create(to_create)
+            if to_update:
+                Transaction.objects.bulk_update(to_update, sorted(update_fields))
             
-            for budget in budgets:
-                # Check if budget alert should be sent
-                if budget.should_alert() or budget.is_over_budget():
-                    email_service.send_budget_alert(self.request.user, budget)
+            deleted = 0
+            if delete_ids:
+                doomed = Transaction.objects.filter(user=user, id__in=delete_ids)
+                found = dict(doomed.values_list('id', 'category_id'))
+                for index, pk in enumerate(delete_ids):
+                    if pk not in found:
+                        errors.append({'operation': 'delete', 'index': index, 'errors': {'id': ['Not found.']}})
+                affected_categories.update(found.values())
+                deleted = len(found)
+                doomed.delete()
+        
+        # One budget pass for the whole batch instead of one per row
+        if affected_categories:
+            self.check_budget_alerts(affected_categories)
+        
+        operation_order = {'create': 0, 'update': 1, 'delete': 2}
+        errors.sort(key=lambda error: (operation_order[error['operation']], error['index']))
+        
+        return Response({
+            'created': TransactionSerializer(created, many=True, context={'request': request}).data,
+            'updated': TransactionSerializer(to_update, many=True, context={'request': request}).data,
+            'deleted': deleted,
+            'errors': errors,
+        }, status=status.HTTP_200_OK if not errors else status.HTTP_207_MULTI_STATUS)
+    
+    @action(detail=False, methods=['get'], renderer_classes=[
+        exports.CSVExportRenderer, exports.NDJSONExportRenderer, JSONRenderer
+    ])
+    def export(self, request):
+        """Stream all matching transactions as CSV or NDJSON (?format=csv|ndjson)"""
+        export_format = request.accepted_renderer.format
+        if export_format not in exports.STREAMERS:
+            export_format = 'csv'
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            exports.streaming_content(
+                export_format, queryset, asynchronous=isinstance(request._request, ASGIRequest)
+            ),
+            content_type=exports.CONTENT_TYPES[export_format]
+        )
+        filename = f"transactions-{timezone.now().date():%Y%m%d}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
     
     @action(detail=False, methods=['get'])
+    @cached_response('transactions.summary')
     def summary(self, request):
         """Get transaction summary"""
-        queryset = self.get_queryset()
-        
-        total_income = queryset.filter(type='income').aggregate(
-            total=Sum('amount'))['total'] or Decimal('0.00')
-        
-        total_expenses = queryset.filter(type='expense').aggregate(
-            total=Sum('amount'))['total'] or Decimal('0.00')
+        params = request.query_params
+        transaction_type = params.get('type', None)
+        
+        # Served from monthly rollups; only partial months at the edges hit the raw table
+        totals = rollups.summarize(rollups.category_totals(
+            request.user,
+            start_date=params.get('start_date') or None,
+            end_date=params.get('end_date') or None,
+            type=transaction_type if transaction_type in ['income', 'expense'] else None,
+            category_id=params.get('category') or None,
+        ))
         
         return Response({
-            'total_income': float(total_income),
-            'total_expenses': float(total_expenses),
-            'net_savings': float(total_income - total_expenses),
-            'transaction_count': queryset.count()
+            'total_income': float(totals['income']),
+            'total_expenses': float(totals['expense']),
+            'net_savings': float(totals['income'] - totals['expense']),
+            'transaction_count': totals['count']
         })
 
 
-class BudgetViewSet(viewsets.ModelViewSet):
+class BudgetViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """API endpoint for budgets"""
     serializer_class = BudgetSerializer
     permission_classes = [IsAuthenticated]
@@ -140,7 +301,7 @@ class BudgetViewSet(viewsets.ModelViewSet):
     ordering = ['-created_at']
     
     def get_queryset(self):
-        queryset = Budget.objects.filter(user=self.request.user)
+        queryset = Budget.objects.filter(user=self.request.user).select_related('category')
         
         # Filter by active status
         is_active = self.request.query_params.get('is_active', None)
@@ -160,9 +321,13 @@ class BudgetViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def alerts(self, request):
         """Get budgets that need alerts"""
-        queryset = self.get_queryset().filter(is_active=True)
-        alert_budgets = [budget for budget in queryset if budget.should_alert()]
-        serializer = self.get_serializer(alert_budgets, many=True)
+        queryset = list(self.get_queryset().filter(is_active=True))
+        statuses = compute_budget_statuses(queryset)
+        alert_budgets = [budget for budget in queryset if statuses[budget.id].should_alert]
+        
+        context = self.get_serializer_context()
+        context['budget_status'] = statuses
+        serializer = self.get_serializer(alert_budgets, many=True, context=context)
         return Response(serializer.data)
 
 
@@ -179,10 +344,11 @@ class RecurringTransactionViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-class DashboardViewSet(viewsets.ViewSet):
+class DashboardViewSet(ConditionalGetMixin, viewsets.ViewSet):
     """API endpoint for dashboard data"""
     permission_classes = [IsAuthenticated]
     
+    @cached_response('dashboard')
     def list(self, request):
         """Get dashboard statistics"""
         user = request.user
@@ -212,24 +378,27 @@ class DashboardViewSet(viewsets.ViewSet):
             date__lte=end_date
         )
         
-        # Calculate totals
-        total_income = transactions.filter(type='income').aggregate(
-            total=Sum('amount'))['total'] or Decimal('0.00')
-        
-        total_expenses = transactions.filter(type='expense').aggregate(
-            total=Sum('amount'))['total'] or Decimal('0.00')
+        # Calculate totals and category-wise breakdown from the monthly rollups
+        category_rows = sorted(
+            rollups.category_totals(user, start_date, end_date),
+            key=lambda row: row['total'], reverse=True
+        )
+        totals = rollups.summarize(category_rows)
+        total_income = totals['income']
+        total_expenses = totals['expense']
         
-        # Get category-wise breakdown
-        expense_by_category = list(transactions.filter(type='expense').values(
-            'category__name', 'category__color'
-        ).annotate(total=Sum('amount')).order_by('-total')[:10])
+        expense_by_category = [
+            {'category__name': row['category__name'], 'category__color': row['category__color'], 'total': row['total']}
+            for row in category_rows if row['type'] == 'expense'
+        ][:10]
         
-        income_by_category = list(transactions.filter(type='income').values(
-            'category__name', 'category__color'
-        ).annotate(total=Sum('amount')).order_by('-total')[:10])
+        income_by_category = [
+            {'category__name': row['category__name'], 'category__color': row['category__color'], 'total': row['total']}
+            for row in category_rows if row['type'] == 'income'
+        ][:10]
         
         # Get recent transactions
-        recent_transactions = transactions.order_by('-date', '-created_at')[:10]
+        recent_transactions = transactions.select_related('category').order_by('-date', '-created_at')[:10]
         
         # Get counts
         category_count = Category.objects.filter(user=user, is_active=True).count()
@@ -239,7 +408,7 @@ class DashboardViewSet(viewsets.ViewSet):
             'total_income': float(total_income),
             'total_expenses': float(total_expenses),
             'net_savings': float(total_income - total_expenses),
-            'transaction_count': transactions.count(),
+            'transaction_count': totals['count'],
             'category_count': category_count,
             'budget_count': budget_count,
             'expense_by_category': expense_by_category,
@@ -311,16 +480,18 @@ class DashboardViewSet(viewsets.ViewSet):
         ).annotate(total=Sum('amount')).order_by('-total')[:5])
         
         # Get budget status
-        budgets = Budget.objects.filter(user=user, is_active=True)
+        budgets = list(Budget.objects.filter(user=user, is_active=True).select_related('category'))
+        statuses = compute_budget_statuses(budgets)
         budget_alerts = []
         for budget in budgets:
-            if budget.should_alert() or budget.is_over_budget():
+            budget_status = statuses[budget.id]
+            if budget_status.should_alert or budget_status.is_over_budget:
                 budget_alerts.append({
                     'category': budget.category.name,
                     'amount': budget.amount,
-                    'spent': budget.get_spent_amount(),
-                    'percentage': budget.get_percentage_used(),
-                    'is_exceeded': budget.is_over_budget()
+                    'spent': budget_status.spent,
+                    'percentage': budget_status.percentage_used,
+                    'is_exceeded': budget_status.is_over_budget
                 })
         
         # Send email report to custom email or user's email
@@ -479,40 +650,73 @@ class DashboardViewSet(viewsets.ViewSet):
 
     
     @action(detail=False, methods=['get'])
+    def timeseries(self, request):
+        """Get income, expenses and net per day/week/month/quarter/year bucket"""
+        params = request.query_params
+        today = timezone.now().date()
+        
+        granularity = params.get('granularity', 'month')
+        if granularity not in timeseries.GRANULARITIES:
+            return Response(
+                {'error': f"granularity must be one of: {', '.join(timeseries.GRANULARITIES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            end_date = datetime.strptime(params['end_date'], '%Y-%m-%d').date() if params.get('end_date') else today
+            if params.get('start_date'):
+                start_date = datetime.strptime(params['start_date'], '%Y-%m-%d').date()
+            else:
+                # Default to the last 12 buckets
+                step = timeseries.GRANULARITIES[granularity][1]
+                start_date = timeseries.bucket_start(end_date, granularity) - step * 11
+        except ValueError:
+            return Response(
+                {'error': 'Dates must use the YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if start_date > end_date:
+            return Response(
+                {'error': 'start_date must be on or before end_date'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(timeseries.bucket_starts(start_date, end_date, granularity)) > timeseries.MAX_BUCKETS:
+            return Response(
+                {'error': f'Range too large: at most {timeseries.MAX_BUCKETS} {granularity} buckets'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        transaction_type = params.get('type', None)
+        series = timeseries.timeseries(
+            request.user, granularity, start_date, end_date,
+            category_id=params.get('category') or None,
+            type=transaction_type if transaction_type in ['income', 'expense'] else None,
+        )
+        
+        return Response({
+            'granularity': granularity,
+            'start_date': start_date,
+            'end_date': end_date,
+            'buckets': series,
+        })
+    
+    @action(detail=False, methods=['get'])
+    @cached_response('dashboard.monthly_report')
     def monthly_report(self, request):
         """Get monthly income vs expenses report"""
-        user = request.user
         today = timezone.now().date()
         
-        months_data = []
-        for i in range(11, -1, -1):
-            month_date = today - timedelta(days=30 * i)
-            month_start = month_date.replace(day=1)
-            if month_date.month == 12:
-                month_end = month_date.replace(day=31)
-            else:
-                month_end = (month_date.replace(month=month_date.month + 1, day=1) - timedelta(days=1))
-            
-            income = Transaction.objects.filter(
-                user=user,
-                type='income',
-                date__gte=month_start,
-                date__lte=month_end
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-            
-            expenses = Transaction.objects.filter(
-                user=user,
-                type='expense',
-                date__gte=month_start,
-                date__lte=month_end
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-            
-            months_data.append({
-                'month': month_start.strftime('%B %Y'),
-                'month_short': month_start.strftime('%b %Y'),
-                'income': float(income),
-                'expenses': float(expenses),
-                'savings': float(income - expenses),
-            })
+        # Last 12 calendar months as one monthly timeseries
+        first_month = today.replace(day=1) - relativedelta(months=11)
+        series = timeseries.timeseries(request.user, 'month', first_month, rollups.month_end(today))
+        
+        months_data = [{
+            'month': bucket['period_start'].strftime('%B %Y'),
+            'month_short': bucket['label'],
+            'income': bucket['income'],
+            'expenses': bucket['expenses'],
+            'savings': bucket['net'],
+        } for bucket in series]
         
         return Response(months_data)
@@ -1,5 +1,25 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 
 class TransactionsConfig(AppConfig):
     name = 'transactions'
+    
+    def ready(self):
+        from .search import ensure_sqlite_triggers
+        from . import user_stats, versioning
+        post_migrate.connect(ensure_sqlite_triggers, sender=self)
+        
+        # Category / budget counts on UserStats; transaction totals come from rollups
+        post_save.connect(user_stats.user_created, sender=settings.AUTH_USER_MODEL)
+        post_save.connect(user_stats.category_saved, sender=self.get_model('Category'))
+        post_delete.connect(user_stats.category_deleted, sender=self.get_model('Category'))
+        post_save.connect(user_stats.budget_saved, sender=self.get_model('Budget'))
+        post_delete.connect(user_stats.budget_deleted, sender=self.get_model('Budget'))
+        
+        # Data versions key the response cache and chat snapshot; transaction writes bump through data_changed()
+        post_save.connect(versioning.user_created, sender=settings.AUTH_USER_MODEL)
+        for model in ('Budget', 'RecurringTransaction', 'Category'):
+            post_save.connect(versioning.instance_changed, sender=self.get_model(model))
+            post_delete.connect(versioning.instance_changed, sender=self.get_model(model))
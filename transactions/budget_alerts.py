@@ -0,0 +1,106 @@
+"""
+Deferred budget alerts.
+
+Transaction writes only mark the affected budgets dirty in BudgetAlertOutbox.
+The process_budget_alerts worker drains the outbox in batches, computes spend
+once per budget with the batched status engine and sends at most one email per
+budget period and alert level, recorded in BudgetAlertLog.
+"""
+import logging
+
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from finance_tracker.background import drain_after_commit
+
+from .budget_status import compute_budget_statuses
+
+logger = logging.getLogger(__name__)
+
+
+def mark_dirty(user, category_ids):
+    """Queue the user's active budgets for these categories for re-evaluation"""
+    from .models import Budget, BudgetAlertOutbox
+
+    budget_ids = Budget.objects.filter(
+        user=user, category_id__in=category_ids, is_active=True
+    ).values_list('id', flat=True)
+    now = timezone.now()
+    # Re-marking a queued budget bumps marked_at, so a worker that claimed the
+    # row before this write keeps it queued instead of deleting it
+    BudgetAlertOutbox.objects.bulk_create(
+        [BudgetAlertOutbox(budget_id=budget_id, marked_at=now) for budget_id in budget_ids],
+        update_conflicts=True, unique_fields=['budget'], update_fields=['marked_at']
+    )
+    drain_after_commit('budget_alerts', drain)
+
+
+def alert_level(status):
+    """Highest alert level a status has reached, or None"""
+    if status.is_over_budget:
+        return 'exceeded'
+    if status.should_alert:
+        return 'threshold'
+    return None
+
+
+def process_batch(batch_size=100):
+    """Evaluate up to batch_size dirty budgets; returns (processed, alerts_sent)"""
+    from accounts.notifications import email_service
+    from .models import Budget, BudgetAlertLog, BudgetAlertOutbox
+
+    with db_transaction.atomic():
+        claimed_at = timezone.now()
+        entries = list(
+            BudgetAlertOutbox.objects.select_for_update(skip_locked=True)
+            .order_by('marked_at')
+            .values_list('id', 'budget_id')[:batch_size]
+        )
+        if not entries:
+            return 0, 0
+
+        budgets = list(
+            Budget.objects.filter(id__in=[budget_id for _, budget_id in entries], is_active=True)
+            .select_related('category', 'user')
+        )
+        statuses = compute_budget_statuses(budgets)
+        already_sent = set(
+            BudgetAlertLog.objects.filter(budget__in=budgets).values_list('budget_id', 'period_start', 'level')
+        )
+
+        logs = []
+        for budget in budgets:
+            status = statuses[budget.id]
+            level = alert_level(status)
+            if level is None or (budget.id, budget.start_date, level) in already_sent:
+                continue
+
+            email_service.send_budget_alert(budget.user, budget, status=status)
+            # Crossing straight past 100% also settles the threshold alert
+            levels = ['threshold', 'exceeded'] if level == 'exceeded' else ['threshold']
+            logs.extend(
+                BudgetAlertLog(budget=budget, period_start=budget.start_date, level=alert,
+                               percentage_used=round(status.percentage_used, 2))
+                for alert in levels
+            )
+
+        BudgetAlertLog.objects.bulk_create(logs, ignore_conflicts=True)
+        # Rows marked again since the claim still need a pass with the newer spend
+        BudgetAlertOutbox.objects.filter(
+            id__in=[entry_id for entry_id, _ in entries], marked_at__lte=claimed_at
+        ).delete()
+
+    sent = len({log.budget_id for log in logs})
+    logger.info(f"Processed {len(entries)} dirty budgets, sent {sent} alerts")
+    return len(entries), sent
+
+
+def drain(batch_size=100):
+    """Process batches until the outbox is empty; returns (processed, alerts_sent)"""
+    total_processed = total_sent = 0
+    while True:
+        processed, sent = process_batch(batch_size)
+        total_processed += processed
+        total_sent += sent
+        if not processed:
+            return total_processed, total_sent
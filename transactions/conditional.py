@@ -0,0 +1,88 @@
+"""
+Conditional GET for per-user API endpoints.
+
+Every response from these viewsets is a function of the user's data, today's
+date and the request itself, so the user's DataVersion row is enough to
+validate it. ConditionalGetMixin loads it with one primary-key lookup right
+after authentication and derives a strong ETag from (user, version, date,
+path, normalised query params, media type) and Last-Modified from the
+version's changed_at. A matching If-None-Match or If-Modified-Since returns
+304 before any handler, queryset, aggregate or serializer runs.
+
+Responses carry Cache-Control: private, no-cache, so browsers keep them and
+revalidate on each poll while shared caches never store them.
+"""
+import hashlib
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.exceptions import APIException
+
+from . import versioning
+
+CONDITIONAL_METHODS = ('GET', 'HEAD')
+
+
+class ConditionalResponse(APIException):
+    """Raised from initial() to skip the handler; carries the ready 304 (or 412) response"""
+    status_code = 304
+
+    def __init__(self, response):
+        self.response = response
+
+
+def make_etag(request, version):
+    """Strong ETag for a request against a user's data version"""
+    params = sorted(
+        (name, value) for name in request.query_params for value in request.query_params.getlist(name)
+    )
+    parts = [
+        str(request.user.pk), str(version), timezone.now().date().isoformat(), request.get_host(),
+        request.path, repr(params), getattr(request, 'accepted_media_type', ''),
+    ]
+    digest = hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def last_modified(changed_at):
+    """Timestamp for Last-Modified; never before today's start since responses depend on the date"""
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return int(max(filter(None, (changed_at, today))).timestamp())
+
+
+class ConditionalGetMixin:
+    """Adds ETag / Last-Modified to GET responses and answers matching revalidations with 304"""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method not in CONDITIONAL_METHODS:
+            return
+
+        version, changed_at = versioning.current(request.user.pk)
+        # The versioned response cache reuses this instead of loading it again
+        request.data_version = (version, changed_at)
+        self.etag = make_etag(request, version)
+        self.last_modified = last_modified(changed_at)
+
+        response = get_conditional_response(request, etag=self.etag, last_modified=self.last_modified)
+        if response is not None:
+            raise ConditionalResponse(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, ConditionalResponse):
+            return self.add_validators(exc.response)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'etag', None) and response.status_code == 200:
+            self.add_validators(response)
+        return response
+
+    def add_validators(self, response):
+        if response.status_code in (200, 304):
+            response['ETag'] = self.etag
+            response['Last-Modified'] = http_date(self.last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
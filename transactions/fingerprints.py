@@ -0,0 +1,71 @@
+"""
+Content fingerprints for transaction de-duplication.
+
+A fingerprint is a SHA-256 of the normalised user, date, type, amount,
+currency and description, stored on every Transaction and indexed per user. Importers
+compute fingerprints for a batch and find the ones already stored with a
+single indexed IN lookup instead of a per-row match on the description text.
+Amounts are stored unsigned, so the type is what tells a refund from the
+purchase it reverses.
+"""
+import hashlib
+from decimal import Decimal
+
+from django.db.models import Case, CharField, Value, When
+
+from .rollups import _as_date
+
+FINGERPRINT_FIELDS = {'user', 'user_id', 'date', 'type', 'amount', 'currency', 'description'}
+
+
+def fingerprint(user_id, date, type, amount, currency, description):
+    """Stable hex digest for a transaction's identifying content"""
+    # ISO strings and datetimes hash the same as the date they are stored as
+    date = _as_date(date)
+    amount = abs(Decimal(str(amount))).quantize(Decimal('0.01'))
+    text = ' '.join((description or '').lower().split())
+    key = f"{user_id}|{date.isoformat()}|{type}|{amount}|{(currency or '').upper()}|{text}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def transaction_fingerprint(transaction):
+    return fingerprint(
+        transaction.user_id, transaction.date, transaction.type, transaction.amount,
+        transaction.currency, transaction.description
+    )
+
+
+def refresh_fingerprints(queryset, batch_size=1000):
+    """Recompute stored fingerprints after a queryset.update() touched their inputs"""
+    rows = queryset.values_list('pk', 'user_id', 'date', 'type', 'amount', 'currency', 'description')
+    batch = []
+    for pk, *values in rows.iterator(chunk_size=batch_size):
+        batch.append((pk, fingerprint(*values)))
+        if len(batch) >= batch_size:
+            _write(queryset.model, batch)
+            batch = []
+    if batch:
+        _write(queryset.model, batch)
+
+
+def _write(model, batch):
+    model.objects.filter(pk__in=[pk for pk, _ in batch]).update(fingerprint=Case(
+        *[When(pk=pk, then=Value(value)) for pk, value in batch],
+        output_field=CharField()
+    ))
+
+
+def refresh_stale_fingerprints(model, batch_size=2000):
+    """Rehash every row of a Transaction model whose stored fingerprint no longer matches; for migrations"""
+    fields = ('user_id', 'date', 'type', 'amount', 'currency', 'description')
+    batch = []
+    for row in model.objects.only(*fields, 'fingerprint').iterator(chunk_size=batch_size):
+        value = fingerprint(*(getattr(row, field) for field in fields))
+        if value != row.fingerprint:
+            row.fingerprint = value
+            batch.append(row)
+        if len(batch) >= batch_size:
+            model.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, ['fingerprint'])
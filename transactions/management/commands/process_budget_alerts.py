@@ -0,0 +1,33 @@
+"""
+Management command to drain the budget alert outbox
+"""
+import time
+from django.core.management.base import BaseCommand
+from transactions.budget_alerts import process_batch
+
+
+class Command(BaseCommand):
+    help = 'Evaluate budgets marked dirty by transaction writes and send due alerts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Budgets evaluated per batch')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox instead of exiting when empty')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between polls with --loop')
+
+    def handle(self, *args, **options):
+        total_processed = total_sent = 0
+
+        while True:
+            processed, sent = process_batch(options['batch_size'])
+            total_processed += processed
+            total_sent += sent
+
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Evaluated {total_processed} budgets, sent {total_sent} alerts'
+        ))
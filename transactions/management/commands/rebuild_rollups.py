@@ -0,0 +1,60 @@
+"""
+Management command to rebuild and verify the monthly transaction rollups
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction as db_transaction
+from transactions.models import MonthlyRollup, Transaction
+from transactions.rollups import ROLLUP_KEY_FIELDS, deltas_for_queryset, rollups_from_transactions
+
+
+class Command(BaseCommand):
+    help = 'Rebuild monthly rollups from raw transactions and verify them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only rebuild rollups for this user id')
+        parser.add_argument(
+            '--verify-only', action='store_true',
+            help='Compare rollups with raw transactions without rebuilding'
+        )
+
+    def handle(self, *args, **options):
+        transactions = Transaction.objects.all()
+        existing = MonthlyRollup.objects.all()
+        if options['user']:
+            transactions = transactions.filter(user_id=options['user'])
+            existing = existing.filter(user_id=options['user'])
+
+        if not options['verify_only']:
+            with db_transaction.atomic():
+                deleted, _ = existing.delete()
+                created = MonthlyRollup.objects.bulk_create(
+                    rollups_from_transactions(transactions), batch_size=1000
+                )
+            self.stdout.write(f"Replaced {deleted} rollup rows with {len(created)}")
+
+        mismatches = self.verify(transactions, existing)
+        if mismatches:
+            for key, expected, actual in mismatches[:20]:
+                self.stdout.write(self.style.WARNING(
+                    f"  {dict(zip(ROLLUP_KEY_FIELDS, key))}: expected {expected}, found {actual}"
+                ))
+            raise CommandError(f'{len(mismatches)} rollup buckets do not match raw transactions')
+
+        self.stdout.write(self.style.SUCCESS('✅ Rollups match raw transactions'))
+
+    def verify(self, transactions, rollups):
+        """Return (key, expected, actual) for every bucket that disagrees"""
+        expected = {
+            key: (total, count)
+            for key, (total, count) in deltas_for_queryset(transactions).items()
+        }
+        actual = {
+            tuple(row[field] for field in ROLLUP_KEY_FIELDS): (row['total'], row['count'])
+            for row in rollups.values(*ROLLUP_KEY_FIELDS, 'total', 'count')
+        }
+
+        mismatches = []
+        for key in expected.keys() | actual.keys():
+            if expected.get(key) != actual.get(key):
+                mismatches.append((key, expected.get(key), actual.get(key)))
+        return mismatches
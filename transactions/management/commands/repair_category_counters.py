@@ -0,0 +1,43 @@
+"""
+Management command to recompute drifted category transaction counters
+"""
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from transactions.models import Category
+from transactions.rollups import category_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute Category.transaction_count and total_amount from raw transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only repair categories owned by this user id')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        categories = Category.objects.all()
+        if options['user']:
+            categories = categories.filter(user_id=options['user'])
+
+        counters = category_counters(
+            list(categories.values_list('id', flat=True)) if options['user'] else None
+        )
+
+        repaired = 0
+        for category in categories.only('id', 'name', 'transaction_count', 'total_amount').iterator():
+            count, total = counters.get(category.id, (0, Decimal('0.00')))
+            if (category.transaction_count, category.total_amount) == (count, total):
+                continue
+
+            self.stdout.write(
+                f"  {category.name} (#{category.id}): "
+                f"{category.transaction_count}/{category.total_amount} -> {count}/{total}"
+            )
+            if not options['dry_run']:
+                Category.objects.filter(pk=category.id).update(transaction_count=count, total_amount=total)
+            repaired += 1
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{repaired} categories have drifted counters'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Repaired {repaired} categories'))
@@ -0,0 +1,43 @@
+"""
+Management command to recompute the per-user statistics behind the admin user list
+"""
+from django.core.management.base import BaseCommand
+from transactions.models import UserStats
+from transactions.user_stats import rebuild, stats_from_db
+
+BATCH_SIZE = 1000
+STAT_FIELDS = ('transaction_count', 'total_income', 'total_expenses', 'net_savings', 'category_count', 'budget_count')
+
+
+class Command(BaseCommand):
+    help = 'Recompute UserStats from raw transactions, categories and budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only repair this user id')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        user_ids = [options['user']] if options['user'] else None
+
+        if options['dry_run']:
+            stored = UserStats.objects.all()
+            if user_ids:
+                stored = stored.filter(pk__in=user_ids)
+            drifted = 0
+            entries = list(stored.order_by('pk'))
+            for start in range(0, len(entries), BATCH_SIZE):
+                batch = entries[start:start + BATCH_SIZE]
+                expected = stats_from_db([entry.pk for entry in batch])
+                for entry in batch:
+                    changes = [
+                        f"{field} {getattr(entry, field)} -> {getattr(expected[entry.pk], field)}"
+                        for field in STAT_FIELDS if getattr(entry, field) != getattr(expected[entry.pk], field)
+                    ]
+                    if changes:
+                        drifted += 1
+                        self.stdout.write(f"  user #{entry.pk}: {', '.join(changes)}")
+            self.stdout.write(self.style.WARNING(f'{drifted} users have drifted statistics'))
+            return
+
+        count = rebuild(user_ids)
+        self.stdout.write(self.style.SUCCESS(f'✅ Recomputed statistics for {count} users'))
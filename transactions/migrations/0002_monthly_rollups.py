@@ -0,0 +1,63 @@
+# Generated by Django 6.0.2 on 2026-10-16 22:21
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    MonthlyRollup = apps.get_model('transactions', 'MonthlyRollup')
+    
+    grouped = Transaction.objects.order_by().annotate(month=TruncMonth('date')).values(
+        'user_id', 'category_id', 'type', 'month', 'currency'
+    ).annotate(total=Sum('amount'), rows=Count('id'))
+    
+    MonthlyRollup.objects.bulk_create([
+        MonthlyRollup(
+            user_id=row['user_id'],
+            category_id=row['category_id'],
+            type=row['type'],
+            month=row['month'],
+            currency=row['currency'],
+            total=row['total'],
+            count=row['rows'],
+        )
+        for row in grouped.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=10)),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('currency', models.CharField(max_length=3)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='transactions.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Monthly Rollup',
+                'verbose_name_plural': 'Monthly Rollups',
+                'db_table': 'transaction_monthly_rollups',
+                'ordering': ['-month'],
+                'indexes': [models.Index(fields=['user', 'month'], name='transaction_user_id_c8ef6f_idx')],
+                'unique_together': {('user', 'category', 'type', 'month', 'currency')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
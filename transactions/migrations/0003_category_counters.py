@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-16 22:24
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_counters(apps, schema_editor):
+    Category = apps.get_model('transactions', 'Category')
+    Transaction = apps.get_model('transactions', 'Transaction')
+    
+    grouped = Transaction.objects.order_by().values('category_id').annotate(
+        row_count=Count('id'), sum_total=Sum('amount')
+    )
+    for row in grouped.iterator():
+        Category.objects.filter(pk=row['category_id']).update(
+            transaction_count=row['row_count'], total_amount=row['sum_total']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_monthly_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='transaction_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
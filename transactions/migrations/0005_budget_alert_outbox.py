@@ -0,0 +1,46 @@
+# Generated by Django 6.0.2 on 2026-10-16 22:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_transaction_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BudgetAlertOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marked_at', models.DateTimeField(auto_now_add=True)),
+                ('budget', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='alert_outbox', to='transactions.budget')),
+            ],
+            options={
+                'verbose_name': 'Budget Alert Outbox Entry',
+                'verbose_name_plural': 'Budget Alert Outbox',
+                'db_table': 'budget_alert_outbox',
+                'ordering': ['marked_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BudgetAlertLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('level', models.CharField(choices=[('threshold', 'Threshold reached'), ('exceeded', 'Budget exceeded')], max_length=10)),
+                ('percentage_used', models.DecimalField(decimal_places=2, max_digits=9)),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_logs', to='transactions.budget')),
+            ],
+            options={
+                'verbose_name': 'Budget Alert Log',
+                'verbose_name_plural': 'Budget Alert Logs',
+                'db_table': 'budget_alert_log',
+                'ordering': ['-sent_at'],
+                'unique_together': {('budget', 'period_start', 'level')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-16 22:34
+
+from django.db import migrations
+
+from transactions import search
+
+
+def install_search_index(apps, schema_editor):
+    search.install(schema_editor)
+
+
+def uninstall_search_index(apps, schema_editor):
+    search.uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0005_budget_alert_outbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-16 22:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+from transactions.fingerprints import fingerprint
+
+
+def backfill_fingerprints(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    
+    batch = []
+    for row in Transaction.objects.only('user_id', 'date', 'amount', 'currency', 'description').iterator(chunk_size=2000):
+        row.fingerprint = fingerprint(row.user_id, row.date, row.amount, row.currency, row.description)
+        batch.append(row)
+        if len(batch) >= 2000:
+            Transaction.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    if batch:
+        Transaction.objects.bulk_update(batch, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_transaction_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'fingerprint'], name='transaction_user_id_fccfba_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 6.0.2 on 2026-10-16 22:53
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def backfill_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserStats = apps.get_model('transactions', 'UserStats')
+    Transaction = apps.get_model('transactions', 'Transaction')
+    Category = apps.get_model('transactions', 'Category')
+    Budget = apps.get_model('transactions', 'Budget')
+    
+    stats = {pk: UserStats(user_id=pk) for pk in User.objects.values_list('pk', flat=True)}
+    for row in Transaction.objects.order_by().values('user_id', 'type').annotate(
+        row_count=Count('id'), sum_total=Sum('amount'), latest=Max('updated_at')
+    ).iterator():
+        entry = stats[row['user_id']]
+        entry.transaction_count += row['row_count']
+        setattr(entry, 'total_income' if row['type'] == 'income' else 'total_expenses', row['sum_total'])
+        entry.last_activity_at = max(filter(None, (entry.last_activity_at, row['latest'])))
+    for model, field in ((Category, 'category_count'), (Budget, 'budget_count')):
+        for row in model.objects.order_by().values('user_id').annotate(rows=Count('id')).iterator():
+            setattr(stats[row['user_id']], field, row['rows'])
+    for entry in stats.values():
+        entry.net_savings = entry.total_income - entry.total_expenses
+    UserStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_outbound_email'),
+        ('transactions', '0007_transaction_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('total_income', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('total_expenses', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('net_savings', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('category_count', models.IntegerField(default=0)),
+                ('budget_count', models.IntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField(blank=True, help_text='Last transaction write', null=True)),
+            ],
+            options={
+                'verbose_name': 'User Statistics',
+                'verbose_name_plural': 'User Statistics',
+                'db_table': 'user_stats',
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from transactions.fingerprints import refresh_stale_fingerprints
+
+
+def refresh_fingerprints(apps, schema_editor):
+    # Rows saved with datetime values were hashed with the time of day included
+    refresh_stale_fingerprints(apps.get_model('transactions', 'Transaction'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0009_data_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(refresh_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from transactions.fingerprints import refresh_stale_fingerprints
+
+
+def refresh_fingerprints(apps, schema_editor):
+    # Fingerprints now include the type so a refund no longer matches its purchase
+    refresh_stale_fingerprints(apps.get_model('transactions', 'Transaction'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0010_refresh_fingerprints'),
+    ]
+
+    operations = [
+        migrations.RunPython(refresh_fingerprints, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction as db_transaction
 from django.conf import settings
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
 
 
@@ -18,9 +19,14 @@ class Category(models.Model):
     icon = models.CharField(max_length=50, blank=True, null=True)
     color = models.CharField(max_length=7, default='#000000')
     is_active = models.BooleanField(default=True)
+    # Maintained with F() updates on every transaction write (see rollups.apply_deltas)
+    transaction_count = models.IntegerField(default=0, editable=False)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    COUNTER_FIELDS = ('transaction_count', 'total_amount')
+    
     class Meta:
         db_table = 'categories'
         verbose_name = 'Category'
@@ -30,6 +36,86 @@ class Category(models.Model):
     
     def __str__(self):
         return f"{self.name} ({self.get_type_display()})"
+    
+    def save(self, *args, **kwargs):
+        # Never write back in-memory counters over concurrent F() increments
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+class TransactionQuerySet(models.QuerySet):
+    """QuerySet that keeps monthly rollups and category counters in step with bulk writes"""
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        from .rollups import deltas_for_rows, apply_deltas, rebuild_buckets, recount_categories, rollup_row
+        
+        from .fingerprints import transaction_fingerprint
+        from .versioning import data_changed
+        
+        objs = list(objs)
+        for obj in objs:
+            obj.fingerprint = transaction_fingerprint(obj)
+        with db_transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+                # Skipped/merged rows are unknown here, so recount the touched buckets
+                rebuild_buckets({(row[0][0], row[0][3]) for row in map(rollup_row, objs)})
+                recount_categories({obj.category_id for obj in objs})
+            else:
+                apply_deltas(deltas_for_rows(map(rollup_row, created)))
+            data_changed({obj.user_id for obj in objs})
+        for obj in created:
+            obj._rollup_row = rollup_row(obj)
+        return created
+    
+    def update(self, **kwargs):
+        # bulk_update() also lands here, once per batch
+        from .fingerprints import FINGERPRINT_FIELDS, refresh_fingerprints
+        from .versioning import data_changed
+        from .rollups import ROLLUP_SOURCE_FIELDS
+        
+        touches_rollups = bool(ROLLUP_SOURCE_FIELDS.intersection(kwargs))
+        touches_fingerprints = bool(FINGERPRINT_FIELDS.intersection(kwargs))
+        if not touches_rollups and not touches_fingerprints:
+            return super().update(**kwargs)
+        
+        # update() skips auto_now; the retrieval index catches up on updated_at
+        kwargs.setdefault('updated_at', timezone.now())
+        rows = list(self.values_list('pk', 'user_id'))
+        pks = [pk for pk, _ in rows]
+        write = lambda: super(TransactionQuerySet, self).update(**kwargs)
+        with db_transaction.atomic(using=self.db):
+            result = self._with_rollup_swap(pks, write) if touches_rollups else write()
+            if touches_fingerprints:
+                refresh_fingerprints(self.model.objects.filter(pk__in=pks))
+            data_changed({user_id for _, user_id in rows})
+        return result
+    
+    def delete(self):
+        from .versioning import data_changed
+        from .rollups import deltas_for_queryset, apply_deltas
+        
+        with db_transaction.atomic(using=self.db):
+            deltas = deltas_for_queryset(self, sign=-1)
+            result = super().delete()
+            apply_deltas(deltas)
+            data_changed(key[0] for key in deltas)
+        return result
+    
+    def _with_rollup_swap(self, pks, write):
+        """Take rows out of the rollups, run the write, then add them back"""
+        from .rollups import deltas_for_queryset, apply_deltas
+        
+        affected = self.model.objects.filter(pk__in=pks)
+        with db_transaction.atomic(using=self.db):
+            apply_deltas(deltas_for_queryset(affected, sign=-1))
+            result = write()
+            apply_deltas(deltas_for_queryset(affected))
+        return result
 
 
 class Transaction(models.Model):
@@ -49,9 +135,13 @@ class Transaction(models.Model):
     receipt = models.FileField(upload_to='receipts/%Y/%m/', blank=True, null=True)
     is_recurring = models.BooleanField(default=False)
     notes = models.TextField(blank=True, null=True)
+    # Hash of user, date, type, amount, currency and description (see fingerprints.py)
+    fingerprint = models.CharField(max_length=64, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = TransactionQuerySet.as_manager()
+    
     class Meta:
         db_table = 'transactions'
         verbose_name = 'Transaction'
@@ -61,16 +151,130 @@ class Transaction(models.Model):
             models.Index(fields=['user', 'date']),
             models.Index(fields=['user', 'type']),
             models.Index(fields=['category']),
+            # Backs keyset pagination (see pagination.TransactionKeysetPagination)
+            models.Index(fields=['user', '-date', '-created_at', '-id']),
+            models.Index(fields=['user', 'fingerprint']),
         ]
     
     def __str__(self):
         return f"{self.get_type_display()} - {self.amount} {self.currency} on {self.date}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        from .rollups import ROLLUP_SOURCE_FIELDS, rollup_row
+        
+        instance = super().from_db(db, field_names, values)
+        # Remember what this row contributes to the rollups so saves can apply a delta
+        if not ROLLUP_SOURCE_FIELDS.intersection(instance.get_deferred_fields()):
+            instance._rollup_row = rollup_row(instance)
+        return instance
+    
     def save(self, *args, **kwargs):
+        from .rollups import deltas_for_rows, apply_deltas, rollup_row
+        
+        from .fingerprints import FINGERPRINT_FIELDS, transaction_fingerprint
+        from .versioning import data_changed
+        
         # Ensure type matches category type
         if self.category:
             self.type = self.category.type
-        super().save(*args, **kwargs)
+        
+        self.fingerprint = transaction_fingerprint(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and FINGERPRINT_FIELDS.intersection(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'fingerprint'}
+        
+        previous = getattr(self, '_rollup_row', None)
+        if previous is None and not self._state.adding and self.pk:
+            stored = Transaction.objects.filter(pk=self.pk).first()
+            previous = stored._rollup_row if stored else None
+        
+        with db_transaction.atomic():
+            super().save(*args, **kwargs)
+            current = rollup_row(self)
+            if current != previous:
+                deltas = deltas_for_rows([current])
+                if previous:
+                    deltas = deltas_for_rows([previous], sign=-1, deltas=deltas)
+                apply_deltas(deltas)
+            data_changed([self.user_id])
+        self._rollup_row = current
+    
+    def delete(self, *args, **kwargs):
+        from .versioning import data_changed
+        from .rollups import deltas_for_rows, apply_deltas, rollup_row
+        
+        row = getattr(self, '_rollup_row', None) or rollup_row(self)
+        with db_transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            apply_deltas(deltas_for_rows([row], sign=-1))
+            data_changed([row[0][0]])
+        self._rollup_row = None
+        return result
+
+
+class MonthlyRollup(models.Model):
+    """Per-user monthly transaction totals, maintained on every transaction write"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='monthly_rollups')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='monthly_rollups')
+    type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    month = models.DateField(help_text='First day of the month')
+    currency = models.CharField(max_length=3)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'transaction_monthly_rollups'
+        verbose_name = 'Monthly Rollup'
+        verbose_name_plural = 'Monthly Rollups'
+        ordering = ['-month']
+        unique_together = ['user', 'category', 'type', 'month', 'currency']
+        indexes = [
+            models.Index(fields=['user', 'month']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} {self.month:%Y-%m} {self.type}: {self.total} {self.currency} ({self.count})"
+
+
+class UserStats(models.Model):
+    """
+    Per-user totals for the admin user list, maintained like the category counters.
+    
+    Transaction counts and sums follow rollups.apply_deltas(); category and
+    budget counts follow post_save / post_delete (see user_stats.py).
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    transaction_count = models.IntegerField(default=0)
+    total_income = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    total_expenses = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    net_savings = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    category_count = models.IntegerField(default=0)
+    budget_count = models.IntegerField(default=0)
+    last_activity_at = models.DateTimeField(blank=True, null=True, help_text='Last transaction write')
+    
+    class Meta:
+        db_table = 'user_stats'
+        verbose_name = 'User Statistics'
+        verbose_name_plural = 'User Statistics'
+    
+    def __str__(self):
+        return f"Stats for user {self.user_id}: {self.transaction_count} transactions"
+
+
+class DataVersion(models.Model):
+    """Per-user generation counter, bumped in the same transaction as any write to the user's data"""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='data_version')
+    version = models.PositiveBigIntegerField(default=1)
+    changed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'data_versions'
+        verbose_name = 'Data Version'
+        verbose_name_plural = 'Data Versions'
+    
+    def __str__(self):
+        return f"User {self.user_id} data version {self.version}"
 
 
 class Budget(models.Model):
@@ -102,31 +306,29 @@ class Budget(models.Model):
     def __str__(self):
         return f"{self.category.name} - {self.amount} {self.currency} ({self.period})"
     
-    def get_spent_amount(self):
-        """Calculate total spent in this budget period"""
-        from django.db.models import Sum
+    def get_period_end(self):
+        """Last day of this budget period (end_date if set, otherwise derived from period)"""
         from datetime import timedelta
         from dateutil.relativedelta import relativedelta
         
-        # Calculate end date based on period if not set
         if self.end_date:
-            end_date = self.end_date
-        else:
-            if self.period == 'daily':
-                end_date = self.start_date
-            elif self.period == 'weekly':
-                end_date = self.start_date + timedelta(days=7)
-            elif self.period == 'monthly':
-                end_date = self.start_date + relativedelta(months=1) - timedelta(days=1)
-            elif self.period == 'yearly':
-                end_date = self.start_date + relativedelta(years=1) - timedelta(days=1)
-            else:
-                end_date = self.start_date
+            return self.end_date
+        if self.period == 'weekly':
+            return self.start_date + timedelta(days=7)
+        if self.period == 'monthly':
+            return self.start_date + relativedelta(months=1) - timedelta(days=1)
+        if self.period == 'yearly':
+            return self.start_date + relativedelta(years=1) - timedelta(days=1)
+        return self.start_date
+    
+    def get_spent_amount(self):
+        """Calculate total spent in this budget period"""
+        from django.db.models import Sum
         
         spent = self.category.transactions.filter(
             user=self.user,
             date__gte=self.start_date,
-            date__lte=end_date
+            date__lte=self.get_period_end()
         ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
         return spent
     
@@ -150,6 +352,45 @@ class Budget(models.Model):
         return self.get_percentage_used() >= self.alert_threshold
 
 
+class BudgetAlertOutbox(models.Model):
+    """Budgets whose spend changed since the alert worker last evaluated them"""
+    budget = models.OneToOneField(Budget, on_delete=models.CASCADE, related_name='alert_outbox')
+    marked_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'budget_alert_outbox'
+        verbose_name = 'Budget Alert Outbox Entry'
+        verbose_name_plural = 'Budget Alert Outbox'
+        ordering = ['marked_at']
+    
+    def __str__(self):
+        return f"Budget {self.budget_id} marked at {self.marked_at}"
+
+
+class BudgetAlertLog(models.Model):
+    """Budget alerts already sent, at most one per budget period and level"""
+    ALERT_LEVELS = (
+        ('threshold', 'Threshold reached'),
+        ('exceeded', 'Budget exceeded'),
+    )
+    
+    budget = models.ForeignKey(Budget, on_delete=models.CASCADE, related_name='alert_logs')
+    period_start = models.DateField()
+    level = models.CharField(max_length=10, choices=ALERT_LEVELS)
+    percentage_used = models.DecimalField(max_digits=9, decimal_places=2)
+    sent_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'budget_alert_log'
+        verbose_name = 'Budget Alert Log'
+        verbose_name_plural = 'Budget Alert Logs'
+        ordering = ['-sent_at']
+        unique_together = ['budget', 'period_start', 'level']
+    
+    def __str__(self):
+        return f"{self.get_level_display()} for budget {self.budget_id} ({self.period_start})"
+
+
 class RecurringTransaction(models.Model):
     """Model for recurring transactions"""
     FREQUENCY_CHOICES = (
@@ -0,0 +1,153 @@
+"""
+Keyset (cursor) pagination for transactions.
+
+Pages are addressed by the (date, created_at, id) of the boundary row instead of
+an OFFSET, so fetching page 5,000 costs the same index range scan as page 1 and
+pages stay stable while new transactions are inserted. The total count is
+optional: ?count=exact runs COUNT(*), ?count=estimate reads the monthly rollups.
+
+The cursor only encodes that newest-first position, so any other requested
+ordering (?ordering=amount, or the relevance order ?search= applies unless
+?ordering=-date is given) is rejected with a 400 instead of being dropped.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class TransactionKeysetPagination(BasePagination):
+    """Newest-first keyset pagination ordered on (date, created_at, id)"""
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = ('-date', '-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+    unsupported_ordering_message = (
+        'Cursor pagination only supports newest-first date order. '
+        'Drop ?ordering= (with ?search=, pass ?ordering=-date) or use page pagination.'
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.check_ordering(queryset)
+        self.page_size = self.get_page_size(request)
+        self.count = self.get_count(queryset, request, view)
+
+        position, reverse = self.decode_cursor(request)
+        if reverse:
+            queryset = queryset.order_by('date', 'created_at', 'id')
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if position:
+            date, created_at, pk = position
+            if reverse:
+                queryset = queryset.filter(
+                    Q(date__gt=date) |
+                    Q(date=date, created_at__gt=created_at) |
+                    Q(date=date, created_at=created_at, id__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(date__lt=date) |
+                    Q(date=date, created_at__lt=created_at) |
+                    Q(date=date, created_at=created_at, id__lt=pk)
+                )
+
+        # Fetch one extra row to learn whether another page exists
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else bool(position)
+        self.has_previous = bool(position) if not reverse else has_more
+        self.rows = rows
+        return rows
+
+    def check_ordering(self, queryset):
+        """Refuse orderings the cursor can't resume; its own key columns in its direction are fine"""
+        requested = tuple(queryset.query.order_by)
+        if requested != self.ordering[:len(requested)]:
+            raise ValidationError({'ordering': [self.unsupported_ordering_message]})
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_count(self, queryset, request, view):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate' and hasattr(view, 'get_count_estimate'):
+            return view.get_count_estimate()
+        return None
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            date = parse_date(payload['d'])
+            created_at = parse_datetime(payload['c'])
+            pk = int(payload['i'])
+            reverse = bool(payload.get('r'))
+        except (KeyError, TypeError, ValueError, json.JSONDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if date is None or created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (date, created_at, pk), reverse
+
+    def encode_cursor(self, row, reverse=False):
+        payload = {'d': row.date.isoformat(), 'c': row.created_at.isoformat(), 'i': row.pk}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.rows:
+            return None
+        return self.encode_cursor(self.rows[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.rows:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.rows[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
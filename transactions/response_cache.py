@@ -0,0 +1,199 @@
+"""
+Versioned response cache for read-heavy per-user endpoints.
+
+Keys are (user, endpoint, normalised query params, user data version), so a
+write to the user's data moves every later lookup to a fresh key: stale
+entries are never served and nothing is ever deleted, old generations simply
+age out. Lookups go to a small in-process LRU with a TTL first, then to the
+Django cache named by RESPONSE_CACHE_ALIAS (Redis when REDIS_URL is set).
+
+Concurrent misses on one key compute once: threads in a process queue on a
+striped lock, and processes take a short add()-based lock in the shared tier
+while the others poll it for the result. Decorate a view method with
+@cached_response('name') to serve its 200 responses from the cache.
+"""
+import functools
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from decouple import config
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.response import Response
+
+from . import versioning
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = config('RESPONSE_CACHE_ENABLED', default=True, cast=bool)
+CACHE_TTL = config('RESPONSE_CACHE_TTL', default=60 * 10, cast=int)
+LOCAL_MAX_ENTRIES = config('RESPONSE_CACHE_MAX_ENTRIES', default=1024, cast=int)
+SHARED_ALIAS = config('RESPONSE_CACHE_ALIAS', default='default')
+KEY_PREFIX = 'response'
+LOCK_STRIPES = 64
+# How long another process may spend computing before waiters compute themselves
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+
+
+class ResponseCache:
+    """In-process LRU/TTL tier in front of a shared Django cache tier, with a stampede guard"""
+
+    def __init__(self, max_entries=LOCAL_MAX_ENTRIES, ttl=CACHE_TTL, shared_alias=SHARED_ALIAS, enabled=CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self.enabled = enabled
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'computed': 0, 'waited': 0}
+
+    def make_key(self, user_id, endpoint, params, version):
+        """Key for a user's endpoint call; params is a {name: [values]} mapping"""
+        normalised = '&'.join(
+            f"{name}={value}" for name in sorted(params) for value in sorted(params[name])
+        )
+        digest = hashlib.sha256(normalised.encode('utf-8')).hexdigest()[:32]
+        return f"{KEY_PREFIX}:{user_id}:{endpoint}:{version}:{digest}"
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _shared(self):
+        return caches[self.shared_alias]
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._local.move_to_end(key)
+                    self._stats['local_hits'] += 1
+                    return value
+                del self._local[key]
+
+        try:
+            value = self._shared().get(key)
+        except Exception as e:
+            logger.warning(f"Shared response cache unavailable: {e}")
+            value = None
+        if value is not None:
+            self._count('shared_hits')
+            self._store_local(key, value)
+        return value
+
+    def set(self, key, value):
+        self._store_local(key, value)
+        try:
+            self._shared().set(key, value, self.ttl)
+        except Exception as e:
+            logger.warning(f"Shared response cache unavailable: {e}")
+
+    def _store_local(self, key, value):
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def _wait_for_shared(self, key):
+        """Take the cross-process compute lock, or wait for its holder's result"""
+        lock_key = f"{key}:lock"
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        try:
+            while not self._shared().add(lock_key, 1, LOCK_TIMEOUT):
+                if time.monotonic() >= deadline:
+                    return None, None
+                time.sleep(LOCK_POLL_INTERVAL)
+                value = self._shared().get(key)
+                if value is not None:
+                    self._count('waited')
+                    return value, None
+        except Exception as e:
+            logger.warning(f"Shared response cache lock unavailable: {e}")
+            return None, None
+        return None, lock_key
+
+    def fetch(self, key, compute):
+        """Cached value for key, calling compute() once across concurrent misses"""
+        if not self.enabled:
+            return compute()
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._stripes[hash(key) % LOCK_STRIPES]:
+            # Another thread may have filled it while this one queued
+            value = self.get(key)
+            if value is not None:
+                return value
+            self._count('misses')
+
+            value, lock_key = self._wait_for_shared(key)
+            if value is not None:
+                self._store_local(key, value)
+                return value
+            try:
+                value = compute()
+                self._count('computed')
+                self.set(key, value)
+            finally:
+                if lock_key:
+                    try:
+                        self._shared().delete(lock_key)
+                    except Exception:
+                        pass
+            return value
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['local_entries'] = len(self._local)
+        stats['enabled'] = self.enabled
+        return stats
+
+
+response_cache = ResponseCache()
+
+
+class Uncacheable(Exception):
+    """Carries a non-200 response out of the cache's compute step"""
+
+    def __init__(self, response):
+        self.response = response
+
+
+def cached_response(endpoint):
+    """Serve a view method's 200 responses from the versioned response cache"""
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if not response_cache.enabled:
+                return view_method(self, request, *args, **kwargs)
+
+            # Already loaded by ConditionalGetMixin on GET requests
+            version, _ = getattr(request, 'data_version', None) or versioning.current(request.user.pk)
+            params = {name: request.query_params.getlist(name) for name in request.query_params}
+            # Default date ranges depend on today; links in paginated bodies on the host
+            params['@'] = [timezone.now().date().isoformat(), request.get_host(), str(sorted(kwargs.items()))]
+            key = response_cache.make_key(request.user.pk, endpoint, params, version)
+
+            def compute():
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    raise Uncacheable(response)
+                return response.data
+
+            try:
+                return Response(response_cache.fetch(key, compute))
+            except Uncacheable as e:
+                return e.response
+        return wrapper
+    return decorator
@@ -0,0 +1,427 @@
+"""
+In-process retrieval index over a user's transactions for chat grounding.
+
+Each distinct description-and-category text (reference numbers dropped) is
+turned into a hashed bag of words and character trigrams (crc32 into HASH_DIM
+buckets, L2-normalised) and stored sparsely: only its non-zero buckets and
+weights, a few hundred bytes per text. Transactions point at their text row,
+so repeated merchants cost one vector. A question is vectorised the same way,
+weighted by IDF, scored against every text in one pass over the non-zeros and
+narrowed by any month / year / income-or-expense words it contains.
+
+retrieve() returns the top-k matching transactions plus exact totals over all
+strong matches, so the model gets "Swiggy in March: 14 expenses, 3,210.00"
+instead of the whole history. Indexes live in a per-process LRU capped at
+RETRIEVAL_MAX_BYTES in total. Each lookup compares the index with the user's
+DataVersion (one primary-key read), so writes made by any process are seen;
+on a change it re-reads only the rows updated since its last sync, or whose
+category was (renames), plus an id diff when rows were deleted.
+"""
+import re
+import threading
+import zlib
+from collections import OrderedDict, namedtuple
+from datetime import date, timedelta
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from decouple import config
+from django.db.models import Q
+from django.utils import timezone
+
+from . import versioning
+
+HASH_DIM = 1024
+TRIGRAM_WEIGHT = 0.5
+TOP_K = config('RETRIEVAL_TOP_K', default=8, cast=int)
+MAX_INDEXES = config('RETRIEVAL_MAX_INDEXES', default=64, cast=int)
+# Budget for every cached index in this process; bigger indexes serve one request and are dropped
+MAX_BYTES = config('RETRIEVAL_MAX_BYTES', default=64 * 1024 * 1024, cast=int)
+# Rough per-entry overhead of the Python dicts mapping ids and texts to rows
+DICT_ENTRY_BYTES = 100
+# Matches must score at least this, and at least RELATIVE_SCORE of the best match
+MIN_SCORE = 0.1
+RELATIVE_SCORE = 0.5
+# Overlap when re-reading rows updated since the last sync (clock skew between hosts)
+SYNC_OVERLAP = timedelta(seconds=5)
+
+MONTHS = {
+    name: number
+    for number in range(1, 13)
+    for name in (date(2000, number, 1).strftime('%B').lower(), date(2000, number, 1).strftime('%b').lower())
+}
+MONTHS['sept'] = 9
+# Month names that are also everyday words: months only next to a year or after a MONTH_CUES word
+AMBIGUOUS_MONTHS = {'may', 'mar', 'jun', 'dec'}
+MONTH_CUES = {'in', 'for', 'during'}
+
+EXPENSE_WORDS = {'spend', 'spent', 'spending', 'paid', 'pay', 'cost', 'costs', 'expense', 'expenses', 'bought', 'buy'}
+INCOME_WORDS = {'earn', 'earned', 'earning', 'earnings', 'income', 'received', 'receive', 'salary', 'paycheck'}
+
+# Question words that say nothing about which transactions are meant
+STOPWORDS = {
+    'a', 'about', 'all', 'am', 'an', 'and', 'any', 'are', 'at', 'be', 'by', 'can', 'did', 'do', 'does',
+    'during', 'for', 'from', 'get', 'give', 'got', 'had', 'has', 'have', 'how', 'i', 'in', 'is', 'it',
+    'last', 'list', 'many', 'may', 'me', 'month', 'much', 'my', 'of', 'on', 'or', 'past', 'show', 'so', 'than',
+    'that', 'the', 'this', 'to', 'total', 'transactions', 'was', 'we', 'were', 'what', 'when', 'where',
+    'which', 'with', 'year', 'you', 'your',
+} | EXPENSE_WORDS | INCOME_WORDS | (set(MONTHS) - AMBIGUOUS_MONTHS)
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+YEAR_RE = re.compile(r'\b(19|20)\d{2}\b')
+
+Match = namedtuple('Match', ['id', 'date', 'description', 'category', 'type', 'amount', 'score'])
+Retrieval = namedtuple('Retrieval', ['terms', 'start_date', 'end_date', 'type', 'matches', 'totals'])
+
+
+def tokens(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def text_tokens(text):
+    # Bare numbers in descriptions are order / reference ids, not subjects
+    return [word for word in tokens(text) if not word.isdigit()]
+
+
+def features(words):
+    """{bucket: weight} for the words and their boundary-marked trigrams"""
+    weights = {}
+    for word in words:
+        bucket = zlib.crc32(word.encode('utf-8')) % HASH_DIM
+        weights[bucket] = weights.get(bucket, 0.0) + 1.0
+        marked = f"^{word}$"
+        for i in range(len(marked) - 2):
+            bucket = zlib.crc32(f"#{marked[i:i + 3]}".encode('utf-8')) % HASH_DIM
+            weights[bucket] = weights.get(bucket, 0.0) + TRIGRAM_WEIGHT
+    return weights
+
+
+def sparse_vector(words):
+    """(buckets, weights) of the L2-normalised hashed vector for the words"""
+    weights = features(words)
+    buckets = np.fromiter(weights, dtype=np.int16, count=len(weights))
+    values = 1.0 + np.log(np.fromiter(weights.values(), dtype=np.float32, count=len(weights)))  # sublinear tf
+    norm = np.linalg.norm(values)
+    return buckets, (values / norm if norm else values).astype(np.float32)
+
+
+def vectorize(words):
+    vector = np.zeros(HASH_DIM, dtype=np.float32)
+    buckets, weights = sparse_vector(words)
+    vector[buckets] = weights
+    return vector
+
+
+def month_words(words):
+    """The words of a question that name a month ("may i" is not one, "in may" and "may 2026" are)"""
+    found = []
+    for i, word in enumerate(words):
+        if word not in MONTHS:
+            continue
+        if word in AMBIGUOUS_MONTHS:
+            cued = i > 0 and words[i - 1] in MONTH_CUES
+            next_to_year = any(YEAR_RE.fullmatch(other) for other in words[max(0, i - 1):i + 2])
+            if not cued and not next_to_year:
+                continue
+        found.append(word)
+    return found
+
+
+def parse_period(words, today):
+    """(start_date, end_date) named by month / year words in a question, or (None, None)"""
+    years = [int(word) for word in words if YEAR_RE.fullmatch(word)]
+    month = next((MONTHS[word] for word in month_words(words)), None)
+    text = ' '.join(words)
+
+    if month:
+        year = years[0] if years else today.year
+        start = date(year, month, 1)
+        if not years and start > today:
+            start = start.replace(year=year - 1)  # "in March" means the latest March
+        return start, start + relativedelta(months=1) - timedelta(days=1)
+    if years:
+        return date(min(years), 1, 1), date(max(years), 12, 31)
+    if 'last month' in text:
+        start = today.replace(day=1) - relativedelta(months=1)
+        return start, today.replace(day=1) - timedelta(days=1)
+    if 'this month' in text:
+        return today.replace(day=1), today
+    if 'last year' in text:
+        return date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)
+    if 'this year' in text:
+        return date(today.year, 1, 1), today
+    return None, None
+
+
+def parse_type(words):
+    words = set(words)
+    if words & EXPENSE_WORDS and not words & INCOME_WORDS:
+        return 'expense'
+    if words & INCOME_WORDS and not words & EXPENSE_WORDS:
+        return 'income'
+    return None
+
+
+class TransactionIndex:
+    """Sparse hashed n-gram vectors for one user's transactions, kept in NumPy arrays"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.lock = threading.Lock()
+        self.version = None
+        self.synced_at = None
+        self.clear()
+
+    def clear(self):
+        self.texts = {}  # normalised description and category words -> text row
+        self.text_bytes = 0
+        # Non-zero entries of every text vector: owning text row, bucket, weight
+        self.nz_text = np.zeros(0, dtype=np.int32)
+        self.nz_bucket = np.zeros(0, dtype=np.int16)
+        self.nz_weight = np.zeros(0, dtype=np.float32)
+        self.document_frequency = np.zeros(HASH_DIM, dtype=np.float32)
+        self.positions = {}  # transaction id -> row
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.dates = np.zeros(0, dtype='datetime64[D]')
+        self.amounts = np.zeros(0, dtype=np.float64)
+        self.is_income = np.zeros(0, dtype=bool)
+        self.text_rows = np.zeros(0, dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+
+    @property
+    def size(self):
+        return len(self.positions)
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the index"""
+        arrays = (self.nz_text, self.nz_bucket, self.nz_weight, self.document_frequency, self.ids,
+                  self.dates, self.amounts, self.is_income, self.text_rows, self.alive)
+        return (sum(array.nbytes for array in arrays) + self.text_bytes
+                + DICT_ENTRY_BYTES * (len(self.positions) + len(self.texts)))
+
+    def _text_row(self, description, category, pending):
+        words = text_tokens(description) + text_tokens(category)
+        key = ' '.join(words)
+        if key not in self.texts:
+            self.texts[key] = len(self.texts)
+            self.text_bytes += len(key)
+            pending.append(sparse_vector(words))
+        return self.texts[key]
+
+    def upsert(self, rows):
+        """Add or replace (id, date, amount, type, description, category) rows"""
+        first_text = len(self.texts)
+        pending_vectors = []
+        new = {'ids': [], 'dates': [], 'amounts': [], 'is_income': [], 'text_rows': []}
+        for pk, day, amount, type, description, category in rows:
+            text_row = self._text_row(description, category or '', pending_vectors)
+            position = self.positions.get(pk)
+            if position is not None:
+                self.dates[position] = np.datetime64(day, 'D')
+                self.amounts[position] = float(amount)
+                self.is_income[position] = type == 'income'
+                self.text_rows[position] = text_row
+                continue
+            self.positions[pk] = len(self.ids) + len(new['ids'])
+            new['ids'].append(pk)
+            new['dates'].append(day)
+            new['amounts'].append(float(amount))
+            new['is_income'].append(type == 'income')
+            new['text_rows'].append(text_row)
+
+        if pending_vectors:
+            buckets = [vector[0] for vector in pending_vectors]
+            self.nz_text = np.concatenate([self.nz_text, np.repeat(
+                np.arange(first_text, len(self.texts), dtype=np.int32), [len(bucket) for bucket in buckets]
+            )])
+            self.nz_bucket = np.concatenate([self.nz_bucket, *buckets])
+            self.nz_weight = np.concatenate([self.nz_weight, *(vector[1] for vector in pending_vectors)])
+            self.document_frequency += np.bincount(np.concatenate(buckets), minlength=HASH_DIM)
+        if new['ids']:
+            self.ids = np.concatenate([self.ids, np.array(new['ids'], dtype=np.int64)])
+            self.dates = np.concatenate([self.dates, np.array(new['dates'], dtype='datetime64[D]')])
+            self.amounts = np.concatenate([self.amounts, np.array(new['amounts'], dtype=np.float64)])
+            self.is_income = np.concatenate([self.is_income, np.array(new['is_income'], dtype=bool)])
+            self.text_rows = np.concatenate([self.text_rows, np.array(new['text_rows'], dtype=np.int32)])
+            self.alive = np.concatenate([self.alive, np.ones(len(new['ids']), dtype=bool)])
+
+    def remove(self, pks):
+        for pk in pks:
+            position = self.positions.pop(pk, None)
+            if position is not None:
+                self.alive[position] = False
+
+    def needs_rebuild(self):
+        """Deleted rows, or texts no live row uses any more, outnumber the live ones"""
+        if len(self.ids) > 2 * self.size + 1000:
+            return True
+        if len(self.texts) > 1000:
+            return len(self.texts) > 2 * len(np.unique(self.text_rows[self.alive])) + 1000
+        return False
+
+    def sync(self, version):
+        """Bring the index up to date with the database (full load or catch-up)"""
+        from .models import Transaction
+
+        transactions = Transaction.objects.filter(user_id=self.user_id).order_by()
+        fields = ('id', 'date', 'amount', 'type', 'description', 'category__name')
+        started = timezone.now()
+
+        if self.synced_at is None or self.needs_rebuild():
+            self.clear()
+            self.upsert(transactions.values_list(*fields).iterator(chunk_size=2000))
+        else:
+            since = self.synced_at - SYNC_OVERLAP
+            # Category names are baked into the vectors, so a rename re-reads its rows
+            self.upsert(transactions.filter(
+                Q(updated_at__gte=since) | Q(category__updated_at__gte=since)
+            ).values_list(*fields))
+            if transactions.count() != self.size:
+                stored = set(transactions.values_list('id', flat=True))
+                self.remove([pk for pk in self.positions if pk not in stored])
+
+        self.version, self.synced_at = version, started
+
+    def search(self, question, k=TOP_K, today=None):
+        """Retrieval for a free-text question against this index"""
+        today = today or timezone.localdate()
+        words = tokens(question)
+        months = set(month_words(words))
+        terms = [word for word in text_tokens(question) if word not in STOPWORDS and word not in months]
+        start_date, end_date = parse_period(words, today)
+        type = parse_type(words)
+
+        mask = self.alive.copy()
+        if start_date:
+            mask &= (self.dates >= np.datetime64(start_date, 'D')) & (self.dates <= np.datetime64(end_date, 'D'))
+        if type:
+            mask &= self.is_income == (type == 'income')
+
+        if terms and len(self.texts):
+            idf = np.log((1.0 + len(self.texts)) / (1.0 + self.document_frequency)) + 1.0
+            query = vectorize(terms) * idf
+            norm = np.linalg.norm(query)
+            if norm:
+                text_scores = np.bincount(
+                    self.nz_text, weights=self.nz_weight * (query / norm)[self.nz_bucket], minlength=len(self.texts)
+                )
+            else:
+                text_scores = np.zeros(len(self.texts))
+            scores = text_scores[self.text_rows]
+            best = scores[mask].max() if mask.any() else 0.0
+            mask &= scores >= max(MIN_SCORE, RELATIVE_SCORE * best)
+        else:
+            # No subject words: the period / type filter alone picks the rows
+            scores = np.ones(len(self.ids), dtype=np.float32)
+
+        selected = np.flatnonzero(mask)
+        # Best score first, newest first among equals
+        order = selected[np.lexsort((-self.dates[selected].astype(np.int64), -scores[selected]))][:k]
+        # Display text is read back for the top k only rather than kept for every row
+        labels = load_labels([int(self.ids[position]) for position in order])
+        matches = []
+        for position in order:
+            description, category = labels.get(int(self.ids[position]), ('', ''))
+            matches.append(Match(
+                int(self.ids[position]), self.dates[position].item(), description, category,
+                'income' if self.is_income[position] else 'expense',
+                self.amounts[position], float(scores[position]),
+            ))
+
+        income = self.is_income[selected]
+        totals = {
+            'count': len(selected),
+            'income': float(self.amounts[selected][income].sum()),
+            'income_count': int(income.sum()),
+            'expenses': float(self.amounts[selected][~income].sum()),
+            'expense_count': int((~income).sum()),
+            'first_date': self.dates[selected].min().item() if len(selected) else None,
+            'last_date': self.dates[selected].max().item() if len(selected) else None,
+        }
+        return Retrieval(terms, start_date, end_date, type, matches, totals)
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def load_labels(pks):
+    """{id: (description, category name)} for a few transactions"""
+    from .models import Transaction
+
+    if not pks:
+        return {}
+    return {
+        pk: (description, category or '')
+        for pk, description, category in Transaction.objects.filter(pk__in=pks).values_list(
+            'id', 'description', 'category__name'
+        )
+    }
+
+
+def _evict():
+    """Drop least recently used indexes until the cache fits MAX_INDEXES and MAX_BYTES"""
+    with _indexes_lock:
+        total = sum(index.nbytes for index in _indexes.values())
+        for user_id in list(_indexes):
+            if len(_indexes) <= MAX_INDEXES and total <= MAX_BYTES:
+                break
+            # An index bigger than the whole budget still serves the caller holding it
+            total -= _indexes.pop(user_id).nbytes
+
+
+def index_for(user_id):
+    """The up-to-date index for a user, building or catching it up as needed"""
+    with _indexes_lock:
+        index = _indexes.get(user_id)
+        if index is None:
+            index = _indexes[user_id] = TransactionIndex(user_id)
+        _indexes.move_to_end(user_id)
+
+    # Read the version before the rows so a write committed meanwhile is seen next time
+    version, _ = versioning.current(user_id)
+    with index.lock:
+        if index.synced_at is None or version != index.version:
+            index.sync(version)
+    _evict()
+    return index
+
+
+def retrieve(user, question, k=TOP_K):
+    index = index_for(user.pk)
+    with index.lock:
+        return index.search(question, k)
+
+
+def render_retrieval(retrieval, currency):
+    """Prompt lines for a Retrieval; empty when the question named nothing specific"""
+    if not retrieval.terms and not retrieval.start_date:
+        return ''
+
+    totals = retrieval.totals
+    scope = []
+    if retrieval.terms:
+        scope.append(f"matching \"{' '.join(retrieval.terms)}\"")
+    if retrieval.start_date:
+        scope.append(f"from {retrieval.start_date:%b %d, %Y} to {retrieval.end_date:%b %d, %Y}")
+    if retrieval.type:
+        scope.append(f"{retrieval.type} only")
+
+    lines = [f"Transactions {', '.join(scope)}:"]
+    if not totals['count']:
+        lines.append('- None found.')
+        return '\n'.join(lines) + '\n'
+
+    lines.append(
+        f"- Totals: {totals['expense_count']} expenses {totals['expenses']:,.2f} {currency}, "
+        f"{totals['income_count']} income {totals['income']:,.2f} {currency}, "
+        f"between {totals['first_date']:%b %d, %Y} and {totals['last_date']:%b %d, %Y}"
+    )
+    lines.append(f"- Most relevant ({len(retrieval.matches)} of {totals['count']}):")
+    for match in retrieval.matches:
+        lines.append(
+            f"  - {match.date:%Y-%m-%d} {match.type} {match.amount:,.2f} {currency} "
+            f"{' '.join(match.description.split())[:60]} [{match.category}]"
+        )
+    return '\n'.join(lines) + '\n'
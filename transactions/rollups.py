@@ -0,0 +1,285 @@
+"""
+Monthly rollups of transaction totals.
+
+MonthlyRollup keeps one row per (user, category, type, month, currency) with the
+sum and count of matching transactions. Every write path on Transaction feeds
+its change through apply_deltas(), so dashboard aggregates read a few rollup
+rows for whole months and only scan raw transactions for partial-month edges.
+The same deltas keep Category.transaction_count and total_amount, and the
+per-user UserStats totals, current.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils.dateparse import parse_date
+
+# Transaction fields that decide which rollup bucket a row lands in (or how much it adds)
+ROLLUP_SOURCE_FIELDS = {'user', 'user_id', 'category', 'category_id', 'type', 'date', 'currency', 'amount'}
+
+ROLLUP_KEY_FIELDS = ('user_id', 'category_id', 'type', 'month', 'currency')
+
+CENT = Decimal('0.01')
+
+
+def _as_date(value):
+    """Normalize date-ish values (datetime, ISO string) to a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return parse_date(value)
+    return value
+
+
+def _as_amount(value):
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value)).quantize(CENT)
+
+
+def month_start(value):
+    return _as_date(value).replace(day=1)
+
+
+def month_end(value):
+    return month_start(value) + relativedelta(months=1) - timedelta(days=1)
+
+
+def rollup_row(transaction):
+    """Return ((user_id, category_id, type, month, currency), amount) for a transaction"""
+    key = (
+        transaction.user_id,
+        transaction.category_id,
+        transaction.type,
+        month_start(transaction.date),
+        transaction.currency,
+    )
+    return key, _as_amount(transaction.amount)
+
+
+def deltas_for_rows(rows, sign=1, deltas=None):
+    """Group (key, amount) rows into {key: [amount, count]} deltas"""
+    if deltas is None:
+        deltas = defaultdict(lambda: [Decimal('0.00'), 0])
+    for key, amount in rows:
+        deltas[key][0] += sign * amount
+        deltas[key][1] += sign
+    return deltas
+
+
+def deltas_for_queryset(queryset, sign=1):
+    """Grouped deltas for every transaction in the queryset (one query)"""
+    deltas = defaultdict(lambda: [Decimal('0.00'), 0])
+    grouped = queryset.order_by().annotate(month=TruncMonth('date')).values(
+        *ROLLUP_KEY_FIELDS
+    ).annotate(total=Sum('amount'), rows=Count('id'))
+    for row in grouped:
+        key = tuple(row[field] for field in ROLLUP_KEY_FIELDS)
+        deltas[key][0] += sign * row['total']
+        deltas[key][1] += sign * row['rows']
+    return deltas
+
+
+def apply_deltas(deltas):
+    """Add grouped deltas to the rollup table, creating and dropping buckets as needed"""
+    from .models import MonthlyRollup
+    from .user_stats import apply_rollup_deltas
+
+    with db_transaction.atomic():
+        for key, (amount, count) in deltas.items():
+            if not amount and not count:
+                continue
+            bucket = dict(zip(ROLLUP_KEY_FIELDS, key))
+            updated = MonthlyRollup.objects.filter(**bucket).update(
+                total=F('total') + amount, count=F('count') + count
+            )
+            if not updated:
+                try:
+                    with db_transaction.atomic():
+                        MonthlyRollup.objects.create(total=amount, count=count, **bucket)
+                except IntegrityError:
+                    # Another writer created the bucket first
+                    MonthlyRollup.objects.filter(**bucket).update(
+                        total=F('total') + amount, count=F('count') + count
+                    )
+            if count < 0:
+                MonthlyRollup.objects.filter(count__lte=0, **bucket).delete()
+
+        apply_category_deltas(deltas)
+        apply_rollup_deltas(deltas)
+
+
+def apply_category_deltas(deltas):
+    """Fold rollup deltas into the denormalized Category counters"""
+    from .models import Category
+
+    by_category = defaultdict(lambda: [Decimal('0.00'), 0])
+    for key, (amount, count) in deltas.items():
+        by_category[key[1]][0] += amount
+        by_category[key[1]][1] += count
+
+    for category_id, (amount, count) in by_category.items():
+        if amount or count:
+            Category.objects.filter(pk=category_id).update(
+                transaction_count=F('transaction_count') + count,
+                total_amount=F('total_amount') + amount,
+            )
+
+
+def category_counters(category_ids=None):
+    """Return {category_id: (count, total)} recomputed from raw transactions"""
+    from .models import Transaction
+
+    transactions = Transaction.objects.order_by()
+    if category_ids is not None:
+        transactions = transactions.filter(category_id__in=category_ids)
+    return {
+        row['category_id']: (row['row_count'], row['sum_total'])
+        for row in transactions.values('category_id').annotate(
+            row_count=Count('id'), sum_total=Sum('amount')
+        )
+    }
+
+
+def recount_categories(category_ids):
+    """Reset the counters of the given categories from raw transactions"""
+    from .models import Category
+
+    counters = category_counters(category_ids)
+    for category_id in category_ids:
+        count, total = counters.get(category_id, (0, Decimal('0.00')))
+        Category.objects.filter(pk=category_id).update(transaction_count=count, total_amount=total)
+
+
+def rollups_from_transactions(queryset):
+    """Build unsaved MonthlyRollup rows from a transaction queryset"""
+    from .models import MonthlyRollup
+
+    return [
+        MonthlyRollup(total=total, count=count, **dict(zip(ROLLUP_KEY_FIELDS, key)))
+        for key, (total, count) in deltas_for_queryset(queryset).items()
+    ]
+
+
+def rebuild_buckets(user_months):
+    """Recount the rollups for a set of (user_id, month) pairs from raw transactions"""
+    from .models import MonthlyRollup, Transaction
+    from .user_stats import rebuild
+
+    if not user_months:
+        return
+
+    rollup_filter = Q()
+    transaction_filter = Q()
+    for user_id, month in user_months:
+        rollup_filter |= Q(user_id=user_id, month=month)
+        transaction_filter |= Q(user_id=user_id, date__gte=month, date__lte=month_end(month))
+
+    with db_transaction.atomic():
+        MonthlyRollup.objects.filter(rollup_filter).delete()
+        MonthlyRollup.objects.bulk_create(
+            rollups_from_transactions(Transaction.objects.filter(transaction_filter))
+        )
+        rebuild({user_id for user_id, _ in user_months})
+
+
+def split_range(start_date=None, end_date=None):
+    """
+    Split an inclusive date range into whole months and partial-month edges.
+
+    Returns (months, edges): months is (first_month, last_month) with either
+    bound possibly None for open ranges, or None when no whole month is covered;
+    edges is a list of (start, end) ranges that must be scanned raw.
+    """
+    start_date = _as_date(start_date) if start_date else None
+    end_date = _as_date(end_date) if end_date else None
+
+    if start_date and end_date and start_date > end_date:
+        return None, []
+
+    edges = []
+    first_month = last_month = None
+
+    if start_date:
+        first_month = month_start(start_date)
+        if start_date != first_month:
+            head_end = month_end(start_date)
+            if end_date and end_date <= head_end:
+                return None, [(start_date, end_date)]
+            edges.append((start_date, head_end))
+            first_month = first_month + relativedelta(months=1)
+
+    if end_date:
+        last_month = month_start(end_date)
+        if end_date != month_end(end_date):
+            edges.append((max(last_month, start_date) if start_date else last_month, end_date))
+            last_month = last_month - relativedelta(months=1)
+
+    if first_month and last_month and first_month > last_month:
+        return None, edges
+    return (first_month, last_month), edges
+
+
+def category_totals(user, start_date=None, end_date=None, type=None, category_id=None):
+    """
+    Per-category totals for a date range, read from rollups plus raw edge scans.
+
+    Returns a list of dicts with category_id, category__name, category__color,
+    type, total and count. Costs at most two queries regardless of history size.
+    """
+    from .models import MonthlyRollup, Transaction
+
+    months, edges = split_range(start_date, end_date)
+    group_fields = ('category_id', 'category__name', 'category__color', 'type')
+    merged = {}
+
+    def merge(rows):
+        for row in rows:
+            key = (row['category_id'], row['type'])
+            if key not in merged:
+                merged[key] = {field: row[field] for field in group_fields}
+                merged[key].update(total=Decimal('0.00'), count=0)
+            merged[key]['total'] += row['sum_total']
+            merged[key]['count'] += row['row_count']
+
+    filters = {}
+    if type:
+        filters['type'] = type
+    if category_id:
+        filters['category_id'] = category_id
+
+    if months:
+        rollups = MonthlyRollup.objects.filter(user=user, **filters)
+        first_month, last_month = months
+        if first_month:
+            rollups = rollups.filter(month__gte=first_month)
+        if last_month:
+            rollups = rollups.filter(month__lte=last_month)
+        merge(rollups.order_by().values(*group_fields).annotate(
+            sum_total=Sum('total'), row_count=Sum('count')
+        ))
+
+    if edges:
+        edge_filter = Q()
+        for edge_start, edge_end in edges:
+            edge_filter |= Q(date__gte=edge_start, date__lte=edge_end)
+        raw = Transaction.objects.filter(edge_filter, user=user, **filters)
+        merge(raw.order_by().values(*group_fields).annotate(
+            sum_total=Sum('amount'), row_count=Count('id')
+        ))
+
+    return list(merged.values())
+
+
+def summarize(rows):
+    """Collapse category_totals() rows into income/expense totals and a count"""
+    totals = {'income': Decimal('0.00'), 'expense': Decimal('0.00'), 'count': 0}
+    for row in rows:
+        totals[row['type']] += row['total']
+        totals['count'] += row['count']
+    return totals
+
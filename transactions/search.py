@@ -0,0 +1,199 @@
+"""
+Full-text search over transaction description and notes.
+
+PostgreSQL keeps a generated, GIN-indexed ``search_vector`` tsvector column on
+the transactions table; SQLite keeps an external-content FTS5 table in sync
+with triggers. Both are maintained by the database on every write, so a search
+is an index lookup instead of an ILIKE scan over a user's whole history.
+Other backends fall back to icontains.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+SEARCH_CONFIG = 'english'
+
+POSTGRES_INSTALL = [
+    f"""
+    ALTER TABLE transactions ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(notes, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX transactions_search_vector_idx ON transactions USING gin (search_vector)",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS transactions_search_vector_idx",
+    "ALTER TABLE transactions DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+        description, notes, content='transactions', content_rowid='id', tokenize='porter unicode61'
+    )
+"""
+
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts(rowid, description, notes) VALUES (new.id, new.description, new.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description, notes)
+        VALUES ('delete', old.id, old.description, old.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF description, notes ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description, notes)
+        VALUES ('delete', old.id, old.description, old.notes);
+        INSERT INTO transactions_fts(rowid, description, notes) VALUES (new.id, new.description, new.notes);
+    END
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS transactions_fts_insert",
+    "DROP TRIGGER IF EXISTS transactions_fts_delete",
+    "DROP TRIGGER IF EXISTS transactions_fts_update",
+    "DROP TABLE IF EXISTS transactions_fts",
+]
+
+
+def install(schema_editor):
+    """Create the vendor-specific search index (used by the migration)"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for sql in POSTGRES_INSTALL:
+            schema_editor.execute(sql)
+    elif vendor == 'sqlite':
+        schema_editor.execute(SQLITE_TABLE)
+        for sql in SQLITE_TRIGGERS:
+            schema_editor.execute(sql)
+        schema_editor.execute("INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')")
+
+
+def uninstall(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for sql in POSTGRES_UNINSTALL:
+            schema_editor.execute(sql)
+    elif vendor == 'sqlite':
+        for sql in SQLITE_UNINSTALL:
+            schema_editor.execute(sql)
+
+
+def ensure_sqlite_triggers(using='default', **kwargs):
+    """
+    Reinstall the FTS5 triggers after migrations on SQLite.
+
+    SQLite applies most ALTER TABLEs by rebuilding the table, which silently
+    drops its triggers, so any later migration on transactions would otherwise
+    leave the index stale.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        tables = connection.introspection.table_names(cursor)
+        if 'transactions_fts' not in tables:
+            return
+        cursor.execute(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'transactions_fts_%%'"
+        )
+        if cursor.fetchone()[0] == len(SQLITE_TRIGGERS):
+            return
+        for sql in SQLITE_TRIGGERS:
+            cursor.execute(sql)
+        cursor.execute("INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')")
+
+
+def search_tokens(terms):
+    """Lower-cased word tokens of a search string; punctuation never reaches the query parser"""
+    return re.findall(r'\w+', terms.lower())
+
+
+def tsquery(tokens):
+    """PostgreSQL tsquery text matching every token as a prefix"""
+    return ' & '.join(f'{token}:*' for token in tokens)
+
+
+def postgres_match(tokens):
+    """
+    (condition, rank) expressions for PostgreSQL.
+
+    The condition is a WHERE on the caller's own queryset, so the GIN probe is
+    combined with its user filter instead of matching every user's rows in a
+    subquery. A query the text search config reduces to nothing (only stop
+    words) matches no rows.
+    """
+    query = f"to_tsquery('{SEARCH_CONFIG}', %s)"
+    text = tsquery(tokens)
+    condition = RawSQL(
+        f"(numnode({query}) > 0 AND transactions.search_vector @@ {query})",
+        [text, text], output_field=BooleanField()
+    )
+    rank = RawSQL(f"ts_rank_cd(transactions.search_vector, {query})", [text], output_field=FloatField())
+    return condition, rank
+
+
+def sqlite_match(tokens):
+    """(condition, rank) expressions for SQLite FTS5"""
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    condition = Q(id__in=RawSQL("SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH %s", [match]))
+    # bm25() is lower-is-better; negate so every backend ranks descending
+    rank = RawSQL(
+        "SELECT -bm25(transactions_fts, 2.0, 1.0) FROM transactions_fts "
+        "WHERE transactions_fts MATCH %s AND rowid = transactions.id",
+        [match], output_field=FloatField()
+    )
+    return condition, rank
+
+
+def search_transactions(queryset, terms):
+    """
+    Filter a Transaction queryset to rows matching every term (as a prefix)
+    and annotate ``search_rank``, higher meaning more relevant. Terms with no
+    searchable words match nothing.
+    """
+    tokens = search_tokens(terms)
+    if not tokens:
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        condition, rank = postgres_match(tokens)
+    elif vendor == 'sqlite':
+        condition, rank = sqlite_match(tokens)
+    else:
+        condition = Q()
+        for token in tokens:
+            condition &= Q(description__icontains=token) | Q(notes__icontains=token)
+        rank = Value(0.0, output_field=FloatField())
+
+    return queryset.filter(condition).annotate(search_rank=rank)
+
+
+class TransactionSearchFilter(SearchFilter):
+    """
+    ?search= backed by the full-text index, ranked by relevance.
+
+    List it after OrderingFilter: an explicit ?ordering= wins, otherwise
+    results are ordered by rank with the view ordering as the tie-breaker.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = ' '.join(self.get_search_terms(request))
+        if not terms or not getattr(view, 'search_fields', None):
+            return queryset
+
+        queryset = search_transactions(queryset, terms)
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get('ordering'):
+            queryset = queryset.order_by('-search_rank', *queryset.query.order_by)
+        return queryset
@@ -1,21 +1,18 @@
 from rest_framework import serializers
+from django.db import models
 from .models import Category, Transaction, Budget, RecurringTransaction
+from .budget_status import compute_budget_statuses
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
 class CategorySerializer(serializers.ModelSerializer):
-    transaction_count = serializers.SerializerMethodField()
-    
     class Meta:
         model = Category
         fields = ['id', 'name', 'type', 'description', 'icon', 'color', 'is_active', 
-                  'created_at', 'updated_at', 'transaction_count']
-        read_only_fields = ['created_at', 'updated_at']
-    
-    def get_transaction_count(self, obj):
-        return obj.transactions.count()
+                  'created_at', 'updated_at', 'transaction_count', 'total_amount']
+        read_only_fields = ['created_at', 'updated_at', 'transaction_count', 'total_amount']
 
 
 class TransactionSerializer(serializers.ModelSerializer):
@@ -41,6 +38,38 @@ class TransactionSerializer(serializers.ModelSerializer):
         return value
 
 
+class BulkTransactionRowSerializer(serializers.ModelSerializer):
+    """
+    Validates one row of a bulk request without touching the database.
+    
+    The category is taken as a plain id; ownership is checked by the view against
+    a single prefetched map of the user's categories.
+    """
+    id = serializers.IntegerField(required=False)
+    category = serializers.IntegerField()
+    
+    class Meta:
+        model = Transaction
+        fields = ['id', 'category', 'amount', 'currency', 'description', 'date', 
+                  'is_recurring', 'notes']
+    
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be greater than zero.")
+        return value
+
+
+class BudgetListSerializer(serializers.ListSerializer):
+    """Computes spend for every budget in the list with one grouped query"""
+    
+    def to_representation(self, data):
+        budgets = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        statuses = self.context.setdefault('budget_status', {})
+        missing = [budget for budget in budgets if budget.id not in statuses]
+        statuses.update(compute_budget_statuses(missing))
+        return super().to_representation(budgets)
+
+
 class BudgetSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     spent_amount = serializers.SerializerMethodField()
@@ -56,21 +85,29 @@ class BudgetSerializer(serializers.ModelSerializer):
                   'spent_amount', 'remaining_amount', 'percentage_used', 
                   'is_over_budget', 'should_alert', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
+        list_serializer_class = BudgetListSerializer
+    
+    def get_status(self, obj):
+        """Precomputed status from the context, computed once per budget otherwise"""
+        statuses = self.context.setdefault('budget_status', {})
+        if obj.id not in statuses:
+            statuses.update(compute_budget_statuses([obj]))
+        return statuses[obj.id]
     
     def get_spent_amount(self, obj):
-        return float(obj.get_spent_amount())
+        return float(self.get_status(obj).spent)
     
     def get_remaining_amount(self, obj):
-        return float(obj.get_remaining_amount())
+        return float(self.get_status(obj).remaining)
     
     def get_percentage_used(self, obj):
-        return round(obj.get_percentage_used(), 2)
+        return round(self.get_status(obj).percentage_used, 2)
     
     def get_is_over_budget(self, obj):
-        return obj.is_over_budget()
+        return self.get_status(obj).is_over_budget
     
     def get_should_alert(self, obj):
-        return obj.should_alert()
+        return self.get_status(obj).should_alert
     
     def validate_category(self, value):
         user = self.context['request'].user
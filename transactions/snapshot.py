@@ -0,0 +1,164 @@
+"""
+Compact per-user financial snapshot for AI chat context.
+
+build_snapshot() gathers month-to-date totals, top spending categories,
+current budget utilisation, recurring commitments and the change against the
+same days of last month in a handful of grouped queries (rollups, one budget
+status query). render_snapshot() turns that into a few short lines capped at
+SNAPSHOT_MAX_CHARS. get_snapshot() caches the text per user, data version and
+day. Every write to the user's transactions, budgets, recurring transactions
+and categories bumps the version (see versioning.py), so a write in any
+process moves readers to a fresh key and chat messages normally read the
+snapshot for the cost of the version lookup.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from decouple import config
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import rollups, versioning
+from .budget_status import compute_budget_statuses
+
+SNAPSHOT_TTL = config('SNAPSHOT_TTL', default=60 * 60 * 6, cast=int)
+SNAPSHOT_MAX_CHARS = config('SNAPSHOT_MAX_CHARS', default=1200, cast=int)
+TOP_CATEGORIES = 5
+MAX_BUDGETS = 5
+MAX_RECURRING = 5
+NAME_CHARS = 30
+KEY_PREFIX = 'financial_snapshot'
+
+# Multiplier turning one occurrence into a monthly amount
+MONTHLY_FACTORS = {
+    'daily': Decimal('30'),
+    'weekly': Decimal('52') / Decimal('12'),
+    'monthly': Decimal('1'),
+    'yearly': Decimal('1') / Decimal('12'),
+}
+
+
+def snapshot_key(user_id, version, day=None):
+    # The day is part of the key so month-to-date figures roll over on their own
+    day = day or timezone.localdate()
+    return f"{KEY_PREFIX}:{user_id}:{version}:{day.isoformat()}"
+
+
+def short(name):
+    name = ' '.join((name or '').split())
+    return name if len(name) <= NAME_CHARS else name[:NAME_CHARS - 1] + '…'
+
+
+def percent_change(current, previous):
+    if not previous:
+        return None
+    return float((current - previous) / previous * 100)
+
+
+def build_snapshot(user, today=None):
+    """Gather the snapshot figures for a user as a plain dict"""
+    from .models import Budget, RecurringTransaction
+
+    today = today or timezone.localdate()
+    month = rollups.month_start(today)
+    previous_month = month - relativedelta(months=1)
+    # Same number of days into last month, clamped to its last day
+    previous_end = min(previous_month + timedelta(days=today.day - 1), rollups.month_end(previous_month))
+
+    category_rows = rollups.category_totals(user, month, today)
+    totals = rollups.summarize(category_rows)
+    previous = rollups.summarize(rollups.category_totals(user, previous_month, previous_end))
+
+    top_categories = sorted(
+        (row for row in category_rows if row['type'] == 'expense'),
+        key=lambda row: row['total'], reverse=True
+    )[:TOP_CATEGORIES]
+
+    budgets = list(Budget.objects.filter(
+        user=user, is_active=True, start_date__lte=today
+    ).select_related('category').order_by('start_date'))
+    budgets = [budget for budget in budgets if budget.get_period_end() >= today]
+    statuses = compute_budget_statuses(budgets)
+    budget_rows = sorted(
+        ((budget, statuses[budget.id]) for budget in budgets),
+        key=lambda item: item[1].percentage_used, reverse=True
+    )
+
+    recurring = []
+    for item in RecurringTransaction.objects.filter(user=user, is_active=True).only(
+        'description', 'amount', 'type', 'frequency'
+    ):
+        monthly = item.amount * MONTHLY_FACTORS.get(item.frequency, Decimal('1'))
+        recurring.append((item, monthly))
+    recurring.sort(key=lambda entry: entry[1], reverse=True)
+
+    return {
+        'as_of': today,
+        'currency': user.preferred_currency,
+        'income': totals['income'],
+        'expenses': totals['expense'],
+        'count': totals['count'],
+        'income_change': percent_change(totals['income'], previous['income']),
+        'expense_change': percent_change(totals['expense'], previous['expense']),
+        'top_categories': [(row['category__name'], row['total']) for row in top_categories],
+        'budgets': [
+            (budget.category.name, budget.period, budget.amount, status.spent, float(status.percentage_used))
+            for budget, status in budget_rows
+        ],
+        'recurring_income': sum((monthly for item, monthly in recurring if item.type == 'income'), Decimal('0.00')),
+        'recurring_expenses': sum((monthly for item, monthly in recurring if item.type == 'expense'), Decimal('0.00')),
+        'recurring': [
+            (item.description, item.type, item.amount, item.frequency)
+            for item, monthly in recurring
+        ],
+    }
+
+
+def render_snapshot(data, max_chars=SNAPSHOT_MAX_CHARS):
+    """Render build_snapshot() output as short prompt lines, at most max_chars long"""
+    currency = data['currency']
+
+    def money(value):
+        return f"{value:,.2f} {currency}"
+
+    def change(value):
+        return f" ({value:+.0f}% vs same days last month)" if value is not None else ''
+
+    lines = [
+        f"User's financial snapshot as of {data['as_of']:%b %d, %Y}:",
+        f"- Month to date: income {money(data['income'])}{change(data['income_change'])}, "
+        f"expenses {money(data['expenses'])}{change(data['expense_change'])}, "
+        f"net {money(data['income'] - data['expenses'])}, {data['count']} transactions",
+    ]
+    if data['top_categories']:
+        lines.append('- Top spending: ' + ', '.join(
+            f"{short(name)} {money(total)}" for name, total in data['top_categories']
+        ))
+    for name, period, amount, spent, percentage in data['budgets'][:MAX_BUDGETS]:
+        lines.append(f"- Budget {short(name)} ({period}): {money(spent)} of {money(amount)} used ({percentage:.0f}%)")
+    if data['recurring']:
+        lines.append(
+            f"- Recurring per month: income {money(data['recurring_income'])}, "
+            f"commitments {money(data['recurring_expenses'])}"
+        )
+        for description, type, amount, frequency in data['recurring'][:MAX_RECURRING]:
+            lines.append(f"  - {short(description)}: {money(amount)} {frequency} {type}")
+
+    text = ''
+    for line in lines:
+        if len(text) + len(line) + 1 > max_chars:
+            break
+        text += line + '\n'
+    return text
+
+
+def get_snapshot(user):
+    """Cached snapshot text for a user's current data version; built on a miss"""
+    version, _ = versioning.current(user.pk)
+    key = snapshot_key(user.pk, version)
+    text = cache.get(key)
+    if text is None:
+        text = render_snapshot(build_snapshot(user))
+        cache.set(key, text, SNAPSHOT_TTL)
+    return text
@@ -0,0 +1,48 @@
+"""
+Budget alert outbox: marks that land while the worker is evaluating a budget
+must survive the worker's cleanup.
+"""
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from transactions import budget_alerts
+from transactions.models import Budget, BudgetAlertOutbox
+
+from .test_rollups import RollupTestCase
+
+
+class BudgetAlertOutboxTests(RollupTestCase):
+    def setUp(self):
+        self.budget = Budget.objects.create(
+            user=self.user, category=self.food, amount=Decimal('100.00'), start_date=date(2024, 1, 1)
+        )
+
+    def test_mark_is_idempotent_and_bumps_marked_at(self):
+        budget_alerts.mark_dirty(self.user, [self.food.pk])
+        first = BudgetAlertOutbox.objects.get(budget=self.budget).marked_at
+        budget_alerts.mark_dirty(self.user, [self.food.pk, self.rent.pk])
+        self.assertEqual(BudgetAlertOutbox.objects.count(), 1)
+        self.assertGreater(BudgetAlertOutbox.objects.get(budget=self.budget).marked_at, first)
+
+    def test_processed_marks_are_cleared(self):
+        budget_alerts.mark_dirty(self.user, [self.food.pk])
+        self.assertEqual(budget_alerts.process_batch(), (1, 0))
+        self.assertFalse(BudgetAlertOutbox.objects.exists())
+
+    def test_mark_during_processing_is_kept(self):
+        budget_alerts.mark_dirty(self.user, [self.food.pk])
+        evaluate = budget_alerts.compute_budget_statuses
+
+        def write_while_evaluating(budgets):
+            statuses = evaluate(budgets)
+            # Spending recorded after the worker read it
+            budget_alerts.mark_dirty(self.user, [self.food.pk])
+            return statuses
+
+        with mock.patch.object(budget_alerts, 'compute_budget_statuses', write_while_evaluating):
+            budget_alerts.process_batch()
+        self.assertTrue(BudgetAlertOutbox.objects.filter(budget=self.budget).exists())
+
+        budget_alerts.process_batch()
+        self.assertFalse(BudgetAlertOutbox.objects.exists())
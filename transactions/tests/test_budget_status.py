@@ -0,0 +1,90 @@
+"""
+Batched budget status: compute_budget_statuses() agrees with the per-budget
+model methods for every period type, and budget lists cost a fixed number of
+queries however many budgets they hold.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from transactions.budget_status import compute_budget_statuses
+from transactions.models import Budget, Category
+
+from .test_rollups import RollupTestCase
+
+
+class BudgetStatusTests(RollupTestCase):
+    def setUp(self):
+        # Spend inside and just outside the windows below
+        self.add(self.food, '10.00', date(2024, 2, 29))
+        self.add(self.food, '20.00', date(2024, 3, 1))
+        self.add(self.food, '30.00', date(2024, 3, 8))
+        self.add(self.food, '40.00', date(2024, 3, 31))
+        self.add(self.food, '50.00', date(2024, 4, 1))
+        self.add(self.rent, '900.00', date(2024, 3, 5))
+        self.budgets = [
+            self.budget(self.food, '100.00', 'daily'),
+            self.budget(self.food, '100.00', 'weekly'),
+            self.budget(self.food, '100.00', 'monthly'),
+            self.budget(self.food, '100.00', 'yearly', start_date=date(2024, 1, 1)),
+            self.budget(self.food, '25.00', 'monthly', start_date=date(2024, 3, 8), end_date=date(2024, 4, 1)),
+            self.budget(self.rent, '1000.00', 'monthly', alert_threshold=95),
+        ]
+
+    def budget(self, category, amount, period, start_date=date(2024, 3, 1), **extra):
+        return Budget.objects.create(
+            user=self.user, category=category, amount=Decimal(amount), period=period, start_date=start_date, **extra
+        )
+
+    def test_matches_model_methods(self):
+        statuses = compute_budget_statuses(self.budgets)
+        for budget in self.budgets:
+            status = statuses[budget.id]
+            self.assertEqual(
+                (status.spent, status.remaining, status.is_over_budget, status.should_alert),
+                (budget.get_spent_amount(), budget.get_remaining_amount(), budget.is_over_budget(),
+                 budget.should_alert()),
+                budget.period,
+            )
+            self.assertAlmostEqual(float(status.percentage_used), float(budget.get_percentage_used()))
+
+    def test_window_edges(self):
+        statuses = compute_budget_statuses(self.budgets)
+        spent = [statuses[budget.id].spent for budget in self.budgets]
+        # daily: Mar 1 only; weekly: Mar 1-8; monthly: Mar 1-31; yearly: 2024; end_date: Mar 8 - Apr 1
+        self.assertEqual(spent, [Decimal('20.00'), Decimal('50.00'), Decimal('90.00'), Decimal('150.00'),
+                                 Decimal('120.00'), Decimal('900.00')])
+        self.assertFalse(statuses[self.budgets[5].id].should_alert)
+        self.assertTrue(statuses[self.budgets[4].id].is_over_budget)
+
+    def test_other_users_spend_is_ignored(self):
+        other = get_user_model().objects.create_user(username='other', email='other@example.com')
+        other_food = Category.objects.create(user=other, name='Food', type='expense')
+        Budget.objects.create(user=other, category=other_food, amount=Decimal('5.00'), start_date=date(2024, 3, 1))
+        other_food.transactions.create(user=other, amount=Decimal('70.00'), description='x', date=date(2024, 3, 2))
+
+        statuses = compute_budget_statuses(Budget.objects.all())
+        self.assertEqual(statuses[self.budgets[2].id].spent, Decimal('90.00'))
+        self.assertEqual(len(statuses), len(self.budgets) + 1)
+
+    def test_one_query_for_any_number_of_budgets(self):
+        with self.assertNumQueries(1):
+            compute_budget_statuses(self.budgets)
+        self.assertEqual(compute_budget_statuses([]), {})
+
+    def test_list_queries_do_not_grow_with_budgets(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(client.get('/api/budgets/').status_code, 200)
+        for month in range(5, 13):
+            self.budget(self.food, '100.00', 'monthly', start_date=date(2024, month, 1))
+        with CaptureQueriesContext(connection) as many:
+            response = client.get('/api/budgets/')
+        self.assertEqual(response.data['count'], len(self.budgets) + 8)
+        self.assertEqual(len(many), len(few))
@@ -0,0 +1,122 @@
+"""
+Bulk transaction endpoint: partial success with per-row errors, and the
+aggregates it leaves behind.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from transactions.models import Budget, BudgetAlertOutbox, Category, MonthlyRollup, Transaction, UserStats
+
+from .test_rollups import RollupTestCase
+
+BULK_URL = '/api/transactions/bulk/'
+
+
+class BulkEndpointTests(RollupTestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def row(self, category, amount, day='2024-01-10', **extra):
+        return {'category': category.pk, 'amount': amount, 'description': 'bulk row', 'date': day, **extra}
+
+    def test_create_updates_rollups_and_counters(self):
+        response = self.client.post(BULK_URL, {'create': [
+            self.row(self.food, '10.00'),
+            self.row(self.food, '2.50', '2024-02-01'),
+            self.row(self.salary, '300.00'),
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['created']), 3)
+        self.assertEqual(response.data['errors'], [])
+
+        self.food.refresh_from_db()
+        self.assertEqual((self.food.transaction_count, self.food.total_amount), (2, Decimal('12.50')))
+        self.assertEqual(
+            MonthlyRollup.objects.get(category=self.food, month=date(2024, 1, 1)).total, Decimal('10.00')
+        )
+        stats = UserStats.objects.get(pk=self.user.pk)
+        self.assertEqual(
+            (stats.transaction_count, stats.total_income, stats.total_expenses),
+            (3, Decimal('300.00'), Decimal('12.50')),
+        )
+        self.assertRollupsMatch()
+
+    def test_invalid_rows_return_207_with_per_row_errors(self):
+        existing = self.add(self.food, '5.00')
+        other_user = get_user_model().objects.create_user(username='other', email='other@example.com')
+        foreign = Category.objects.create(user=other_user, name='Theirs', type='expense')
+
+        response = self.client.post(BULK_URL, {
+            'create': [
+                self.row(self.food, '1.00'),
+                self.row(self.food, '-3.00'),
+                self.row(foreign, '4.00'),
+            ],
+            'update': [
+                {'id': existing.pk, 'amount': '6.00'},
+                {'id': 999999, 'amount': '1.00'},
+                {'amount': '1.00'},
+            ],
+            'delete': [999998],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(len(response.data['created']), 1)
+        self.assertEqual(len(response.data['updated']), 1)
+        self.assertEqual(response.data['deleted'], 0)
+        self.assertEqual(
+            [(error['operation'], error['index'], sorted(error['errors'])) for error in response.data['errors']],
+            [
+                ('create', 1, ['amount']),
+                ('create', 2, ['category']),
+                ('update', 1, ['id']),
+                ('update', 2, ['id']),
+                ('delete', 0, ['id']),
+            ],
+        )
+
+        self.assertEqual(Transaction.objects.filter(category=foreign).count(), 0)
+        self.food.refresh_from_db()
+        self.assertEqual((self.food.transaction_count, self.food.total_amount), (2, Decimal('7.00')))
+        self.assertRollupsMatch()
+
+    def test_update_category_and_delete(self):
+        moved = self.add(self.food, '5.00')
+        doomed = self.add(self.food, '3.00')
+
+        response = self.client.post(BULK_URL, {
+            'update': [{'id': moved.pk, 'category': self.salary.pk}],
+            'delete': [doomed.pk],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['deleted'], 1)
+        moved.refresh_from_db()
+        self.assertEqual(moved.type, 'income')
+        self.food.refresh_from_db()
+        self.salary.refresh_from_db()
+        self.assertEqual(self.food.transaction_count, 0)
+        self.assertEqual((self.salary.transaction_count, self.salary.total_amount), (1, Decimal('5.00')))
+        self.assertRollupsMatch()
+
+    def test_queues_budget_alerts_once_per_budget(self):
+        budget = Budget.objects.create(
+            user=self.user, category=self.food, amount=Decimal('10.00'), start_date=date(2024, 1, 1)
+        )
+        response = self.client.post(BULK_URL, {'create': [
+            self.row(self.food, '4.00'), self.row(self.food, '9.00'),
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(BudgetAlertOutbox.objects.values_list('budget_id', flat=True)), [budget.pk])
+
+    def test_too_many_rows(self):
+        rows = [self.row(self.food, '1.00')] * 1001
+        response = self.client.post(BULK_URL, {'create': rows}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Transaction.objects.exists())
@@ -0,0 +1,97 @@
+"""
+Denormalized Category counters: moving transactions between categories keeps
+transaction_count and total_amount exact on both sides, stale Category
+instances never write old counters back, and repair_category_counters fixes
+drift.
+"""
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from transactions.models import Category, Transaction
+from transactions.response_cache import response_cache
+
+from .test_rollups import RollupTestCase
+
+
+class CategoryCounterTests(RollupTestCase):
+    def setUp(self):
+        self.lunch = self.add(self.food, '12.50', description='lunch')
+        self.dinner = self.add(self.food, '30.00', date(2024, 2, 1), description='dinner')
+        self.add(self.rent, '900.00')
+
+    def counters(self, category):
+        category.refresh_from_db()
+        return category.transaction_count, category.total_amount
+
+    def test_save_with_new_category(self):
+        self.lunch.category = self.rent
+        self.lunch.save()
+        self.assertEqual(self.counters(self.food), (1, Decimal('30.00')))
+        self.assertEqual(self.counters(self.rent), (2, Decimal('912.50')))
+        self.assertRollupsMatch()
+
+    def test_category_change_across_types(self):
+        self.dinner.category = self.salary
+        self.dinner.amount = Decimal('31.00')
+        self.dinner.save()
+        self.assertEqual(self.counters(self.food), (1, Decimal('12.50')))
+        self.assertEqual(self.counters(self.salary), (1, Decimal('31.00')))
+        self.assertRollupsMatch()
+
+    def test_queryset_and_bulk_category_changes(self):
+        Transaction.objects.filter(pk=self.lunch.pk).update(category=self.rent)
+        self.assertEqual(self.counters(self.food), (1, Decimal('30.00')))
+
+        self.dinner.category = self.rent
+        Transaction.objects.bulk_update([self.dinner], ['category'])
+        self.assertEqual(self.counters(self.food), (0, Decimal('0.00')))
+        self.assertEqual(self.counters(self.rent), (3, Decimal('942.50')))
+        self.assertRollupsMatch()
+
+    def test_api_recategorisation(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.patch(f'/api/transactions/{self.lunch.pk}/', {'category': self.rent.pk}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counters(self.food), (1, Decimal('30.00')))
+        self.assertRollupsMatch()
+
+    def test_stale_instance_does_not_overwrite_counters(self):
+        stale = Category.objects.get(pk=self.food.pk)
+        self.add(self.food, '7.50')
+        stale.name = 'Groceries'
+        stale.save()
+        self.assertEqual(self.counters(self.food), (3, Decimal('50.00')))
+        self.assertEqual(self.food.name, 'Groceries')
+        self.assertRollupsMatch()
+
+    def test_list_reads_counters_in_one_query(self):
+        response_cache._local.clear()
+        cache.clear()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/categories/', {'ordering': '-transaction_count', 'page_size': 50})
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual([row['name'] for row in rows][:1], ['Food'])
+        self.assertEqual(rows[0]['transaction_count'], 2)
+        self.assertFalse([query for query in queries if 'FROM "transactions"' in query['sql']])
+
+    def test_repair_command(self):
+        Category.objects.filter(pk=self.food.pk).update(transaction_count=9, total_amount=Decimal('1.00'))
+
+        out = StringIO()
+        call_command('repair_category_counters', '--dry-run', stdout=out)
+        self.assertIn('1 categories have drifted counters', out.getvalue())
+        self.assertEqual(self.counters(self.food), (9, Decimal('1.00')))
+
+        call_command('repair_category_counters', '--user', str(self.user.pk), stdout=StringIO())
+        self.assertEqual(self.counters(self.food), (2, Decimal('42.50')))
+        self.assertRollupsMatch()
@@ -0,0 +1,80 @@
+"""
+Conditional GET: validators on per-user responses, 304 before the handler
+runs on a matching If-None-Match / If-Modified-Since, and fresh validators
+after any write.
+"""
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from transactions.api_views import TransactionViewSet
+from transactions.response_cache import response_cache
+
+from .test_rollups import RollupTestCase
+
+SUMMARY_URL = '/api/transactions/summary/'
+
+
+class ConditionalGetTests(RollupTestCase):
+    def setUp(self):
+        response_cache._local.clear()
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.add(self.food, '10.00', date(2024, 1, 5))
+
+    def test_validators_and_cache_control(self):
+        response = self.client.get(SUMMARY_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['ETag'], r'^"[0-9a-f]{32}"$')
+        self.assertIn('Last-Modified', response)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_matching_etag_returns_304_before_the_handler(self):
+        etag = self.client.get(SUMMARY_URL)['ETag']
+        with mock.patch.object(TransactionViewSet, 'summary', side_effect=AssertionError('handler ran')), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get(SUMMARY_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+        # Only the data version lookup
+        self.assertEqual(len(queries), 1)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(SUMMARY_URL)['Last-Modified']
+        response = self.client.get(SUMMARY_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_varies_with_request(self):
+        etag = self.client.get(SUMMARY_URL)['ETag']
+        self.assertNotEqual(self.client.get(SUMMARY_URL, {'type': 'income'})['ETag'], etag)
+        self.assertNotEqual(self.client.get('/api/transactions/')['ETag'], etag)
+        self.assertEqual(self.client.get(SUMMARY_URL, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_write_changes_etag(self):
+        etag = self.client.get(SUMMARY_URL)['ETag']
+        self.add(self.food, '5.00', date(2024, 1, 6))
+
+        response = self.client.get(SUMMARY_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['total_expenses'], 15.0)
+
+    def test_other_users_etags_differ(self):
+        etag = self.client.get(SUMMARY_URL)['ETag']
+        other = self.user.__class__.objects.create_user(username='other', email='other@example.com')
+        client = APIClient()
+        client.force_authenticate(other)
+        self.assertEqual(client.get(SUMMARY_URL, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_unsafe_methods_and_errors_carry_no_etag(self):
+        response = self.client.post('/api/transactions/', {'amount': 'x'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('ETag', self.client.get('/api/transactions/999999/'))
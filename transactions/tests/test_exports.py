@@ -0,0 +1,64 @@
+"""
+Transaction exports stream under both WSGI and ASGI.
+"""
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.test import AsyncClient
+
+from transactions import exports
+from transactions.models import Transaction
+
+from .test_rollups import RollupTestCase
+
+EXPORT_URL = '/api/transactions/export/'
+
+
+class ExportTests(RollupTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Transaction.objects.bulk_create([
+            Transaction(user=cls.user, category=cls.food, type='expense', amount=Decimal('1.25'),
+                        description=f'row {index}', date=date(2024, 1, 1 + index % 28))
+            for index in range(1203)
+        ])
+
+    def test_wsgi_streams_sync_iterator(self):
+        self.client.force_login(self.user)
+        response = self.client.get(EXPORT_URL, {'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.is_async)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][0], 'id')
+        self.assertEqual(len(rows), 1204)
+
+    async def test_asgi_streams_async_iterator(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(EXPORT_URL, {'format': 'ndjson'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        # Rows arrive in blocks rather than as one body read to the end
+        self.assertEqual(len(chunks), -(-1203 // exports.ASYNC_BLOCK_ROWS))
+        lines = b''.join(chunks).decode().splitlines()
+        self.assertEqual(len(lines), 1203)
+        self.assertEqual(json.loads(lines[0])['category'], 'Food')
+
+    async def test_closing_early_closes_the_source(self):
+        closed = []
+
+        def lines():
+            try:
+                yield from ('a\n', 'b\n', 'c\n')
+            finally:
+                closed.append(True)
+
+        stream = exports.iterate_async(exports.blocks(lines(), size=1))
+        self.assertEqual(await stream.__anext__(), 'a\n')
+        await stream.aclose()
+        self.assertEqual(closed, [True])
@@ -0,0 +1,69 @@
+"""
+Fingerprints hash the stored date, whatever type the caller passed, and the
+transaction type, so a refund is not taken for a duplicate of its purchase.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+from ai_features.statement_import import ParsedRow, import_rows
+from transactions.fingerprints import fingerprint, transaction_fingerprint
+from transactions.models import Transaction
+
+from .test_rollups import RollupTestCase
+
+
+class FingerprintTests(RollupTestCase):
+    def create(self, day):
+        return Transaction.objects.create(
+            user=self.user, category=self.food, amount=Decimal('12.50'), description='Coffee  Shop', date=day
+        )
+
+    def test_string_date(self):
+        transaction = self.create('2024-01-05')
+        transaction.refresh_from_db()
+        self.assertEqual(transaction.date, date(2024, 1, 5))
+        self.assertEqual(transaction.fingerprint, transaction_fingerprint(transaction))
+        self.assertRollupsMatch()
+
+    def test_datetime_date(self):
+        transaction = self.create(datetime(2024, 1, 5, 18, 30))
+        reloaded = Transaction.objects.get(pk=transaction.pk)
+        self.assertEqual(reloaded.fingerprint, transaction_fingerprint(reloaded))
+        self.assertEqual(transaction.fingerprint, reloaded.fingerprint)
+
+    def test_date_types_agree(self):
+        args = ('expense', Decimal('12.50'), 'USD', 'coffee shop')
+        expected = fingerprint(self.user.pk, date(2024, 1, 5), *args)
+        self.assertEqual(fingerprint(self.user.pk, '2024-01-05', *args), expected)
+        self.assertEqual(fingerprint(self.user.pk, datetime(2024, 1, 5, 23, 59), *args), expected)
+
+    def test_type_is_hashed(self):
+        args = (Decimal('12.50'), 'USD', 'coffee shop')
+        self.assertNotEqual(
+            fingerprint(self.user.pk, date(2024, 1, 5), 'expense', *args),
+            fingerprint(self.user.pk, date(2024, 1, 5), 'income', *args),
+        )
+
+    def test_import_keeps_refund_of_purchase(self):
+        rows = [
+            ParsedRow(date(2024, 3, 1), 'Amazon order 123', Decimal('-49.99'), None),
+            ParsedRow(date(2024, 3, 1), 'Amazon order 123', Decimal('49.99'), None),
+        ]
+        self.assertEqual(import_rows(self.user, rows).created, 2)
+        self.assertEqual(
+            sorted(Transaction.objects.filter(description='Amazon order 123').values_list('type', flat=True)),
+            ['expense', 'income'],
+        )
+        # Re-importing the same statement still skips both
+        self.assertEqual(import_rows(self.user, rows).created, 0)
+        self.assertRollupsMatch()
+
+    def test_bulk_create_with_mixed_dates(self):
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, category=self.food, type='expense', amount=Decimal('1.00'),
+                        description='bulk', date=day)
+            for day in ('2024-02-01', datetime(2024, 2, 2, 9, 0), date(2024, 2, 3))
+        ])
+        for transaction in Transaction.objects.all():
+            self.assertEqual(transaction.fingerprint, transaction_fingerprint(transaction))
+        self.assertRollupsMatch()
@@ -0,0 +1,88 @@
+"""
+Keyset pagination: cursors walk the list forwards and back without gaps or
+repeats, counts are optional, and orderings the cursor can't resume are
+rejected instead of silently replaced.
+"""
+from datetime import date, timedelta
+
+from rest_framework.test import APIClient
+
+from .test_rollups import RollupTestCase
+
+LIST_URL = '/api/transactions/'
+
+
+class KeysetPaginationTests(RollupTestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Several rows share a date so the created_at / id tie-breakers matter
+        self.rows = [
+            self.add(self.food if i % 2 else self.salary, f'{i + 1}.00', date(2024, 1, 1) + timedelta(days=i // 3),
+                     description=f'row {i}')
+            for i in range(11)
+        ]
+        self.newest_first = [row.pk for row in sorted(
+            self.rows, key=lambda row: (row.date, row.created_at, row.pk), reverse=True
+        )]
+
+    def page(self, url=LIST_URL, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def ids(self, page):
+        return [row['id'] for row in page['results']]
+
+    def test_forward_and_back(self):
+        pages = [self.page(pagination='cursor', page_size=4)]
+        while pages[-1]['next']:
+            pages.append(self.page(pages[-1]['next']))
+
+        self.assertEqual([len(page['results']) for page in pages], [4, 4, 3])
+        self.assertEqual(sum(map(self.ids, pages), []), self.newest_first)
+        self.assertIsNone(pages[0]['previous'])
+        self.assertIsNone(pages[0]['count'])
+
+        # Walking back from the last page returns the same pages
+        back = self.page(pages[2]['previous'])
+        self.assertEqual(self.ids(back), self.ids(pages[1]))
+        first = self.page(back['previous'])
+        self.assertEqual(self.ids(first), self.ids(pages[0]))
+        self.assertIsNotNone(first['next'])
+
+    def test_new_rows_do_not_shift_pages(self):
+        first = self.page(pagination='cursor', page_size=4)
+        self.add(self.food, '99.00', date(2024, 2, 1), description='newer')
+        self.assertEqual(self.ids(self.page(first['next'])), self.newest_first[4:8])
+
+    def test_filters_carry_through_cursors(self):
+        first = self.page(pagination='cursor', page_size=2, type='expense')
+        second = self.page(first['next'])
+        expenses = [pk for pk in self.newest_first if pk in {row.pk for row in self.rows if row.type == 'expense'}]
+        self.assertEqual(self.ids(first) + self.ids(second), expenses[:4])
+
+    def test_counts(self):
+        self.assertEqual(self.page(pagination='cursor', count='exact')['count'], 11)
+        self.assertEqual(self.page(pagination='cursor', count='estimate')['count'], 11)
+        self.assertEqual(self.page(pagination='cursor', count='estimate', type='income')['count'], 6)
+        # The count describes the whole list, not the remaining pages
+        first = self.page(pagination='cursor', page_size=4, count='exact')
+        self.assertEqual(self.page(first['next'])['count'], 11)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(LIST_URL, {'pagination': 'cursor', 'cursor': 'bm90IGpzb24='})
+        self.assertEqual(response.status_code, 404)
+
+    def test_unsupported_ordering_is_rejected(self):
+        for params in ({'ordering': 'amount'}, {'ordering': 'date'}, {'search': 'row'}):
+            response = self.client.get(LIST_URL, {'pagination': 'cursor', **params})
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('ordering', response.data)
+
+    def test_date_ordering_is_accepted(self):
+        self.assertEqual(self.ids(self.page(pagination='cursor', ordering='-date')), self.newest_first)
+        searched = self.page(pagination='cursor', search='row', ordering='-date', page_size=5)
+        self.assertEqual(self.ids(searched), self.newest_first[:5])
+        # Page pagination keeps every ordering
+        self.assertEqual(self.page(ordering='amount')['results'][0]['amount'], '1.00')
@@ -0,0 +1,166 @@
+"""
+Versioned response cache: the two tiers and the stampede guard, and the
+cached endpoints serving fresh data straight after any write.
+"""
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+
+from transactions import versioning
+from transactions.models import Budget, Transaction
+from transactions.response_cache import ResponseCache, cached_response, response_cache
+
+from .test_rollups import RollupTestCase
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.cache = ResponseCache(max_entries=2, ttl=60)
+
+    def test_key_normalises_params(self):
+        first = self.cache.make_key(1, 'summary', {'type': ['expense'], 'start_date': ['2024-01-01']}, 3)
+        second = self.cache.make_key(1, 'summary', {'start_date': ['2024-01-01'], 'type': ['expense']}, 3)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, self.cache.make_key(1, 'summary', {'type': ['expense']}, 3))
+        self.assertNotEqual(first, self.cache.make_key(1, 'summary', {'type': ['expense'], 'start_date': ['2024-01-01']}, 4))
+        self.assertNotEqual(first, self.cache.make_key(2, 'summary', {'type': ['expense'], 'start_date': ['2024-01-01']}, 3))
+
+    def test_local_tier_is_lru(self):
+        for key in ('a', 'b'):
+            self.cache.set(key, key)
+        self.cache.get('a')
+        self.cache.set('c', 'c')
+        self.assertEqual(list(self.cache._local), ['a', 'c'])
+        # Evicted locally, still served by the shared tier and promoted again
+        self.assertEqual(self.cache.get('b'), 'b')
+        self.assertEqual(self.cache.stats()['shared_hits'], 1)
+
+    def test_local_entries_expire(self):
+        self.cache.set('a', 'value')
+        cache.delete('a')
+        with mock.patch('transactions.response_cache.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIsNone(self.cache.get('a'))
+        self.assertNotIn('a', self.cache._local)
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        barrier = threading.Barrier(4)
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return {'total': 1}
+
+        def fetch(results):
+            barrier.wait()
+            results.append(self.cache.fetch('hot', compute))
+
+        results = []
+        threads = [threading.Thread(target=fetch, args=(results,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'total': 1}] * 4)
+
+    def test_shared_tier_failure_falls_back_to_compute(self):
+        broken = mock.Mock(**{'get.side_effect': ConnectionError, 'set.side_effect': ConnectionError,
+                              'add.side_effect': ConnectionError})
+        with mock.patch.object(self.cache, '_shared', return_value=broken), \
+                self.assertLogs('transactions.response_cache', 'WARNING'):
+            self.assertEqual(self.cache.fetch('k', lambda: 'computed'), 'computed')
+            # Still served from the local tier
+            self.assertEqual(self.cache.fetch('k', lambda: 'again'), 'computed')
+
+    def test_disabled_always_computes(self):
+        self.cache.enabled = False
+        self.assertEqual(self.cache.fetch('k', lambda: 1), 1)
+        self.assertEqual(self.cache.fetch('k', lambda: 2), 2)
+
+
+class CachedEndpointTests(RollupTestCase):
+    def setUp(self):
+        # Rolled-back tests reuse user ids and data versions
+        response_cache._local.clear()
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.add(self.food, '10.00', date(2024, 1, 5))
+        self.add(self.salary, '100.00', date(2024, 1, 6))
+
+    def summary(self, **params):
+        response = self.client.get('/api/transactions/summary/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_hit_skips_aggregates(self):
+        first = self.summary()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.summary(), first)
+        self.assertFalse([query for query in queries if 'monthly_rollups' in query['sql']])
+        self.assertEqual(first['transaction_count'], 2)
+
+    def test_writes_invalidate(self):
+        self.assertEqual(self.summary()['total_expenses'], 10.0)
+
+        response = self.client.post('/api/transactions/', {
+            'category': self.food.pk, 'amount': '5.00', 'description': 'api', 'date': '2024-01-07',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.summary()['total_expenses'], 15.0)
+
+        Transaction.objects.filter(user=self.user, type='income').update(amount=Decimal('250.00'))
+        self.assertEqual(self.summary()['total_income'], 250.0)
+
+        Transaction.objects.filter(user=self.user, description='api').delete()
+        self.assertEqual(self.summary()['total_expenses'], 10.0)
+
+    def test_category_and_budget_writes_invalidate(self):
+        names = lambda: sorted(row['name'] for row in self.client.get('/api/categories/').data['results'])
+        self.assertIn('Food', names())
+        self.food.name = 'Groceries'
+        self.food.save()
+        self.assertIn('Groceries', names())
+
+        before = self.client.get('/api/dashboard/').data['budget_count']
+        Budget.objects.create(user=self.user, category=self.food, amount=Decimal('50.00'), start_date=date(2024, 1, 1))
+        self.assertEqual(self.client.get('/api/dashboard/').data['budget_count'], before + 1)
+
+    def test_params_and_users_are_separate_entries(self):
+        self.assertEqual(self.summary(type='income')['total_expenses'], 0.0)
+        self.assertEqual(self.summary()['total_expenses'], 10.0)
+
+        other = self.user.__class__.objects.create_user(username='other', email='other@example.com')
+        client = APIClient()
+        client.force_authenticate(other)
+        self.assertEqual(client.get('/api/transactions/summary/').data['transaction_count'], 0)
+        # Another user's writes leave this user's version alone
+        version = versioning.current(self.user.pk)
+        versioning.bump([other.pk])
+        self.assertEqual(versioning.current(self.user.pk), version)
+
+    def test_only_200_responses_are_cached(self):
+        replies = [Response({'error': 'busy'}, status=503), Response({'ok': 1}), Response({'ok': 2})]
+
+        class View:
+            @cached_response('test.flaky')
+            def get(self, request):
+                return replies.pop(0)
+
+        request = Request(APIRequestFactory().get('/flaky/'))
+        request.user = self.user
+        self.assertEqual(View().get(request).status_code, 503)
+        self.assertEqual(View().get(request).data, {'ok': 1})
+        self.assertEqual(View().get(request).data, {'ok': 1})
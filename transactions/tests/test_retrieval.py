@@ -0,0 +1,106 @@
+"""
+Retrieval index: staleness is decided by the user's DataVersion, not by
+per-process cache tokens, and cached indexes stay within their byte budget.
+Month names that are also everyday words only narrow the period when used as
+months.
+"""
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from transactions import retrieval
+from transactions.models import Transaction
+
+from .test_rollups import RollupTestCase
+
+
+class RetrievalTests(RollupTestCase):
+    def setUp(self):
+        retrieval._indexes.clear()
+        self.add(self.food, '12.00', date(2024, 3, 4), description='SWIGGY ORDER 1234')
+        self.add(self.food, '8.00', date(2024, 3, 9), description='Swiggy order 99')
+        self.add(self.rent, '900.00', date(2024, 3, 1), description='Landlord transfer')
+
+    def test_search_totals(self):
+        result = retrieval.retrieve(self.user, 'how much did I spend on swiggy in march 2024')
+        self.assertEqual(result.totals['expense_count'], 2)
+        self.assertEqual(result.totals['expenses'], 20.0)
+        self.assertEqual({match.description for match in result.matches}, {'SWIGGY ORDER 1234', 'Swiggy order 99'})
+
+    def test_modal_may_does_not_narrow_search(self):
+        result = retrieval.retrieve(self.user, 'how much may i spend on swiggy')
+        self.assertEqual((result.start_date, result.terms), (None, ['swiggy']))
+        self.assertEqual(result.totals['count'], 2)
+
+    def test_sparse_scores_match_dense(self):
+        index = retrieval.index_for(self.user.pk)
+        words = retrieval.text_tokens('swiggy order food')
+        dense = np.zeros((len(index.texts), retrieval.HASH_DIM), dtype=np.float32)
+        np.add.at(dense, (index.nz_text, index.nz_bucket.astype(np.int64)), index.nz_weight)
+        query = retrieval.vectorize(words)
+        sparse = np.bincount(index.nz_text, weights=index.nz_weight * query[index.nz_bucket],
+                             minlength=len(index.texts))
+        np.testing.assert_allclose(sparse, dense @ query, rtol=1e-5)
+
+    def test_catches_up_on_version_without_cache(self):
+        retrieval.retrieve(self.user, 'swiggy')
+        # Writes from another process leave no trace in this process's cache
+        self.add(self.food, '5.00', date(2024, 3, 20), description='Swiggy instamart')
+        cache.clear()
+        self.assertEqual(retrieval.retrieve(self.user, 'swiggy').totals['count'], 3)
+
+        Transaction.objects.filter(description__in=['Swiggy order 99', 'Swiggy instamart']).update(description='Zomato')
+        self.assertEqual(retrieval.retrieve(self.user, 'swiggy').totals['count'], 1)
+
+        Transaction.objects.filter(category=self.rent).delete()
+        self.assertEqual(retrieval.retrieve(self.user, 'landlord').totals['count'], 0)
+
+    def test_unchanged_version_skips_sync(self):
+        index = retrieval.index_for(self.user.pk)
+        with mock.patch.object(index, 'sync') as sync:
+            retrieval.index_for(self.user.pk)
+            sync.assert_not_called()
+
+    def test_category_rename_reindexes_rows(self):
+        self.assertEqual(retrieval.retrieve(self.user, 'takeaway').totals['count'], 0)
+        self.food.name = 'Takeaway'
+        self.food.save()
+        self.assertEqual(retrieval.retrieve(self.user, 'takeaway').totals['count'], 2)
+
+    def test_cache_respects_byte_budget(self):
+        index = retrieval.index_for(self.user.pk)
+        self.assertGreater(index.nbytes, 0)
+        with mock.patch.object(retrieval, 'MAX_BYTES', index.nbytes - 1):
+            result = retrieval.retrieve(self.user, 'swiggy')
+        # Still answered, but not kept
+        self.assertEqual(result.totals['count'], 2)
+        self.assertNotIn(self.user.pk, retrieval._indexes)
+
+        retrieval.index_for(self.user.pk)
+        self.assertIn(self.user.pk, retrieval._indexes)
+
+
+class ParsePeriodTests(SimpleTestCase):
+    today = date(2026, 10, 16)
+
+    def period(self, question):
+        return retrieval.parse_period(retrieval.tokens(question), self.today)
+
+    def test_modal_may_is_not_a_month(self):
+        self.assertEqual(self.period('how much may i spend on food'), (None, None))
+        self.assertEqual(retrieval.month_words(retrieval.tokens('may i see my dec bills')), [])
+
+    def test_ambiguous_months_with_cue_or_year(self):
+        self.assertEqual(self.period('what did i spend in may'), (date(2026, 5, 1), date(2026, 5, 31)))
+        self.assertEqual(self.period('groceries may 2025'), (date(2025, 5, 1), date(2025, 5, 31)))
+        self.assertEqual(self.period('rent for mar'), (date(2026, 3, 1), date(2026, 3, 31)))
+        # Latest December that has started
+        self.assertEqual(self.period('spent during dec'), (date(2025, 12, 1), date(2025, 12, 31)))
+
+    def test_unambiguous_months_need_no_cue(self):
+        self.assertEqual(self.period('swiggy march'), (date(2026, 3, 1), date(2026, 3, 31)))
+        self.assertEqual(self.period('sept salary'), (date(2026, 9, 1), date(2026, 9, 30)))
@@ -0,0 +1,160 @@
+"""
+Rollup invariant: MonthlyRollup rows, Category counters and UserStats totals
+always equal aggregates recomputed from raw transactions, whatever write path
+changed them.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from transactions.models import Category, MonthlyRollup, Transaction, UserStats
+from transactions.rollups import CENT, ROLLUP_KEY_FIELDS, category_counters, deltas_for_queryset
+from transactions.user_stats import stats_from_db
+
+STAT_FIELDS = ('transaction_count', 'total_income', 'total_expenses', 'net_savings')
+
+
+class RollupAssertions:
+    """Compare every denormalized aggregate against the raw transactions table"""
+
+    def assertRollupsMatch(self):
+        expected = {
+            key: (Decimal(total).quantize(CENT), count)
+            for key, (total, count) in deltas_for_queryset(Transaction.objects.all()).items()
+        }
+        actual = {
+            tuple(row[field] for field in ROLLUP_KEY_FIELDS): (Decimal(row['total']).quantize(CENT), row['count'])
+            for row in MonthlyRollup.objects.values(*ROLLUP_KEY_FIELDS, 'total', 'count')
+        }
+        self.assertEqual(actual, expected)
+
+        counters = category_counters()
+        for category in Category.objects.all():
+            count, total = counters.get(category.pk, (0, Decimal('0.00')))
+            self.assertEqual(
+                (category.transaction_count, category.total_amount.quantize(CENT)),
+                (count, Decimal(total).quantize(CENT)),
+                f"counters drifted for {category}",
+            )
+
+        user_ids = list(get_user_model().objects.values_list('pk', flat=True))
+        expected_stats = stats_from_db(user_ids)
+        for stats in UserStats.objects.filter(pk__in=user_ids):
+            for field in STAT_FIELDS:
+                self.assertEqual(
+                    getattr(stats, field), getattr(expected_stats[stats.pk], field),
+                    f"UserStats.{field} drifted for user #{stats.pk}",
+                )
+
+
+class RollupTestCase(RollupAssertions, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='rollups', email='rollups@example.com')
+        cls.food = Category.objects.create(user=cls.user, name='Food', type='expense')
+        cls.rent = Category.objects.create(user=cls.user, name='Rent', type='expense')
+        cls.salary = Category.objects.create(user=cls.user, name='Salary', type='income')
+
+    def add(self, category, amount, day=date(2024, 1, 15), **kwargs):
+        return Transaction.objects.create(
+            user=self.user, category=category, type=category.type,
+            amount=Decimal(amount), description=kwargs.pop('description', 'test'), date=day, **kwargs
+        )
+
+
+class RollupInvariantTests(RollupTestCase):
+    def test_save_creates_buckets(self):
+        self.add(self.food, '12.50')
+        self.add(self.food, '7.25', date(2024, 2, 3))
+        self.add(self.salary, '1000.00')
+        self.assertEqual(MonthlyRollup.objects.count(), 3)
+        self.assertRollupsMatch()
+
+    def test_save_moves_amount_and_month(self):
+        transaction = self.add(self.food, '12.50')
+        transaction.amount = Decimal('20.00')
+        transaction.date = date(2024, 3, 1)
+        transaction.save()
+        self.assertRollupsMatch()
+
+    def test_category_change_moves_totals(self):
+        transaction = self.add(self.food, '12.50')
+        self.add(self.food, '5.00')
+        transaction.category = self.salary
+        transaction.save()
+        self.assertEqual(transaction.type, 'income')
+        self.assertRollupsMatch()
+
+    def test_reloaded_instance_save(self):
+        pk = self.add(self.food, '12.50').pk
+        transaction = Transaction.objects.get(pk=pk)
+        transaction.category = self.rent
+        transaction.save(update_fields=['category', 'type'])
+        self.assertRollupsMatch()
+
+    def test_delete_drops_empty_buckets(self):
+        transaction = self.add(self.food, '12.50')
+        self.add(self.rent, '900.00')
+        transaction.delete()
+        self.assertFalse(MonthlyRollup.objects.filter(category=self.food).exists())
+        self.assertRollupsMatch()
+
+    def test_queryset_update(self):
+        for amount in ('1.00', '2.00', '3.00'):
+            self.add(self.food, amount)
+        Transaction.objects.filter(category=self.food).update(amount=Decimal('4.50'))
+        self.assertRollupsMatch()
+        Transaction.objects.filter(amount=Decimal('4.50')).update(category=self.rent)
+        self.assertRollupsMatch()
+        Transaction.objects.filter(category=self.rent).update(date=date(2023, 12, 31))
+        self.assertRollupsMatch()
+
+    def test_update_of_unrelated_fields_leaves_rollups(self):
+        self.add(self.food, '1.00')
+        before = list(MonthlyRollup.objects.values_list('total', 'count'))
+        Transaction.objects.update(notes='reviewed')
+        self.assertEqual(list(MonthlyRollup.objects.values_list('total', 'count')), before)
+        self.assertRollupsMatch()
+
+    def test_bulk_update(self):
+        transactions = [self.add(self.food, '1.00'), self.add(self.food, '2.00')]
+        for transaction in transactions:
+            transaction.amount += Decimal('10.00')
+            transaction.category = self.rent
+        Transaction.objects.bulk_update(transactions, ['amount', 'category'])
+        self.assertRollupsMatch()
+
+    def test_queryset_delete(self):
+        self.add(self.food, '1.00')
+        self.add(self.food, '2.00', date(2024, 5, 1))
+        self.add(self.salary, '50.00')
+        Transaction.objects.filter(category=self.food).delete()
+        self.assertRollupsMatch()
+
+    def test_bulk_create(self):
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, category=category, type=category.type, amount=Decimal(amount),
+                        description='bulk', date=day)
+            for category, amount, day in (
+                (self.food, '3.10', date(2024, 1, 2)),
+                (self.food, '4.20', date(2024, 1, 30)),
+                (self.salary, '2500.00', date(2024, 2, 1)),
+            )
+        ])
+        self.assertRollupsMatch()
+
+    def test_bulk_create_ignore_conflicts(self):
+        self.add(self.food, '1.00')
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, category=self.rent, type='expense', amount=Decimal('8.00'),
+                        description='bulk', date=date(2024, 1, 20)),
+        ], ignore_conflicts=True)
+        self.assertRollupsMatch()
+
+    def test_detects_drift(self):
+        self.add(self.food, '1.00')
+        MonthlyRollup.objects.update(total=Decimal('99.00'))
+        with self.assertRaises(AssertionError):
+            self.assertRollupsMatch()
@@ -0,0 +1,78 @@
+"""
+Full-text search: the query builder for each backend, and ?search= on the
+transaction list against the SQLite FTS5 index.
+"""
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from transactions import search
+from transactions.models import Category, Transaction
+
+from .test_rollups import RollupTestCase
+
+LIST_URL = '/api/transactions/'
+
+
+class QueryBuilderTests(RollupTestCase):
+    def test_tokens_drop_punctuation(self):
+        self.assertEqual(search.search_tokens("Coffee-shop's  (Latte)!"), ['coffee', 'shop', 's', 'latte'])
+        self.assertEqual(search.tsquery(['coffee', 'shop']), 'coffee:* & shop:*')
+
+    def test_postgres_match_filters_the_scoped_query(self):
+        condition, rank = search.postgres_match(['coffee', 'shop'])
+        queryset = Transaction.objects.filter(user=self.user).filter(condition).annotate(search_rank=rank)
+        sql, params = queryset.query.sql_with_params()
+
+        where = sql[sql.index(' WHERE '):]
+        self.assertIn('"user_id" = %s', where)
+        self.assertIn('transactions.search_vector @@ to_tsquery', where)
+        # No unscoped scan of every user's rows
+        self.assertNotIn('SELECT id FROM transactions', sql)
+        # Stop-word-only queries reduce to an empty tsquery and match nothing
+        self.assertIn('numnode(', where)
+        self.assertEqual(params.count('coffee:* & shop:*'), 3)
+
+    def test_sqlite_match_quotes_tokens(self):
+        condition, _ = search.sqlite_match(['or', 'near'])
+        self.assertEqual(condition.children[0][1].params, ['"or"* "near"*'])
+
+    def test_no_searchable_words_matches_nothing(self):
+        self.add(self.food, '4.00', description='Coffee')
+        queryset = search.search_transactions(Transaction.objects.filter(user=self.user), '!!! --')
+        self.assertEqual(list(queryset), [])
+
+
+class SearchEndpointTests(RollupTestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.coffee = self.add(self.food, '4.00', date(2024, 1, 2), description='Blue Bottle Coffee')
+        self.noted = self.add(self.food, '9.00', date(2024, 1, 3), description='Cafe', notes='coffee with team')
+        self.add(self.rent, '900.00', date(2024, 1, 1), description='Landlord')
+
+        other = get_user_model().objects.create_user(username='other', email='other@example.com')
+        other_food = Category.objects.create(user=other, name='Food', type='expense')
+        Transaction.objects.create(user=other, category=other_food, amount='3.00', description='Coffee',
+                                   date=date(2024, 1, 4))
+
+    def ids(self, **params):
+        response = self.client.get(LIST_URL, params)
+        self.assertEqual(response.status_code, 200)
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        return [row['id'] for row in rows]
+
+    def test_matches_are_scoped_and_ranked(self):
+        # Description hits outrank notes hits; the other user's coffee never shows
+        self.assertEqual(self.ids(search='coffee'), [self.coffee.pk, self.noted.pk])
+
+    def test_prefix_and_every_term(self):
+        self.assertEqual(self.ids(search='cof bot'), [self.coffee.pk])
+        self.assertEqual(self.ids(search='coffee landlord'), [])
+
+    def test_explicit_ordering_wins(self):
+        self.assertEqual(self.ids(search='coffee', ordering='-amount'), [self.noted.pk, self.coffee.pk])
+
+    def test_punctuation_only_matches_nothing(self):
+        self.assertEqual(self.ids(search='"*'), [])
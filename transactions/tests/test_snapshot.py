@@ -0,0 +1,51 @@
+"""
+Chat snapshots are keyed on the user's data version, so any write, from any
+process, is visible on the next read without deleting cache entries.
+"""
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from transactions import snapshot
+from transactions.models import Budget, Transaction
+
+from .test_rollups import RollupTestCase
+
+
+class SnapshotTests(RollupTestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+
+    def test_cached_until_data_changes(self):
+        self.add(self.food, '10.00', self.today)
+        first = snapshot.get_snapshot(self.user)
+        with mock.patch.object(snapshot, 'build_snapshot') as build:
+            self.assertEqual(snapshot.get_snapshot(self.user), first)
+            build.assert_not_called()
+
+        self.add(self.food, '5.00', self.today)
+        self.assertIn('expenses 15.00', snapshot.get_snapshot(self.user))
+
+    def test_queryset_update_and_budget_change(self):
+        self.add(self.food, '10.00', self.today)
+        snapshot.get_snapshot(self.user)
+
+        Transaction.objects.filter(user=self.user).update(amount=Decimal('3.00'))
+        self.assertIn('expenses 3.00', snapshot.get_snapshot(self.user))
+
+        Budget.objects.create(user=self.user, category=self.food, amount=Decimal('20.00'),
+                              start_date=self.today.replace(day=1))
+        self.assertIn('Budget Food', snapshot.get_snapshot(self.user))
+
+    def test_writes_elsewhere_need_no_local_delete(self):
+        self.add(self.food, '10.00', self.today)
+        snapshot.get_snapshot(self.user)
+        # A write handled by another process only bumps the stored version
+        with mock.patch('django.core.cache.cache.delete_many') as delete_many:
+            self.add(self.rent, '7.00', self.today)
+        delete_many.assert_not_called()
+        self.assertIn('expenses 17.00', snapshot.get_snapshot(self.user))
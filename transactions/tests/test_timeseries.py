@@ -0,0 +1,187 @@
+"""
+Dashboard timeseries: bucket edges match the database Trunc* functions, the
+rollup and raw-scan paths agree (also after bulk updates and deletes), and
+the endpoint validates its range.
+"""
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.db.models import Sum
+from rest_framework.test import APIClient
+
+from transactions import timeseries
+from transactions.response_cache import response_cache
+from transactions.models import Transaction
+
+from .test_rollups import RollupTestCase
+
+URL = '/api/dashboard/timeseries/'
+
+
+def noon(year, month, day):
+    return datetime(year, month, day, 12, 0, tzinfo=dt_timezone.utc)
+
+
+class BucketTests(RollupTestCase):
+    def test_bucket_start(self):
+        wednesday = date(2024, 5, 15)
+        self.assertEqual(timeseries.bucket_start(wednesday, 'day'), wednesday)
+        self.assertEqual(timeseries.bucket_start(wednesday, 'week'), date(2024, 5, 13))
+        self.assertEqual(timeseries.bucket_start(date(2024, 5, 19), 'week'), date(2024, 5, 13))
+        self.assertEqual(timeseries.bucket_start(date(2024, 5, 20), 'week'), date(2024, 5, 20))
+        self.assertEqual(timeseries.bucket_start(wednesday, 'month'), date(2024, 5, 1))
+        self.assertEqual(timeseries.bucket_start(wednesday, 'quarter'), date(2024, 4, 1))
+        self.assertEqual(timeseries.bucket_start(date(2024, 12, 31), 'quarter'), date(2024, 10, 1))
+        self.assertEqual(timeseries.bucket_start(wednesday, 'year'), date(2024, 1, 1))
+
+    def test_bucket_starts_cover_partial_ends(self):
+        self.assertEqual(
+            timeseries.bucket_starts(date(2024, 1, 31), date(2024, 3, 1), 'month'),
+            [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)],
+        )
+        # A leap-day February bucket ends on the 29th
+        self.assertEqual(
+            timeseries.bucket_starts(date(2024, 2, 29), date(2024, 2, 29), 'quarter'), [date(2024, 1, 1)]
+        )
+
+    def test_rows_on_either_side_of_an_edge(self):
+        self.add(self.food, '10.00', date(2024, 3, 31))   # Sunday, last day of Q1
+        self.add(self.food, '20.00', date(2024, 4, 1))    # Monday, first day of Q2
+        for granularity, first, second in (
+            ('day', date(2024, 3, 31), date(2024, 4, 1)),
+            ('week', date(2024, 3, 25), date(2024, 4, 1)),
+            ('month', date(2024, 3, 1), date(2024, 4, 1)),
+            ('quarter', date(2024, 1, 1), date(2024, 4, 1)),
+        ):
+            series = timeseries.timeseries(self.user, granularity, date(2024, 3, 31), date(2024, 4, 1))
+            self.assertEqual(
+                [(bucket['period_start'], bucket['expenses']) for bucket in series],
+                [(first, 10.0), (second, 20.0)], granularity,
+            )
+            self.assertEqual(series[0]['period_end'], second - timedelta(days=1))
+
+        year = timeseries.timeseries(self.user, 'year', date(2024, 3, 31), date(2024, 4, 1))
+        self.assertEqual([(bucket['label'], bucket['expenses']) for bucket in year], [('2024', 30.0)])
+
+    def test_range_bounds_are_inclusive_and_exclusive_outside(self):
+        self.add(self.food, '1.00', date(2024, 1, 9))
+        self.add(self.food, '2.00', date(2024, 1, 10))
+        self.add(self.food, '4.00', date(2024, 1, 20))
+        self.add(self.food, '8.00', date(2024, 1, 21))
+        series = timeseries.timeseries(self.user, 'month', date(2024, 1, 10), date(2024, 1, 20))
+        # The bucket keeps its calendar start but only sums rows inside the range
+        self.assertEqual([(bucket['period_start'], bucket['expenses']) for bucket in series],
+                         [(date(2024, 1, 1), 6.0)])
+
+    def test_empty_buckets_are_zero_filled(self):
+        self.add(self.salary, '100.00', date(2024, 1, 15))
+        self.add(self.food, '30.00', date(2024, 3, 15))
+        series = timeseries.timeseries(self.user, 'month', date(2024, 1, 1), date(2024, 3, 31))
+        self.assertEqual(
+            [(bucket['income'], bucket['expenses'], bucket['net']) for bucket in series],
+            [(100.0, 0.0, 100.0), (0.0, 0.0, 0.0), (0.0, 30.0, -30.0)],
+        )
+
+
+class RollupPathTests(RollupTestCase):
+    def setUp(self):
+        for month in range(1, 7):
+            self.add(self.food, f'{month}0.00', date(2024, month, 1))
+            self.add(self.food, f'{month}.50', date(2024, month, 28))
+            self.add(self.salary, '1000.00', date(2024, month, 15))
+
+    def raw(self, granularity, start, end):
+        """Series built straight from the transactions table"""
+        totals = {}
+        rows = Transaction.objects.filter(user=self.user, date__gte=start, date__lte=end).values_list(
+            'date', 'type', 'amount'
+        )
+        for day, kind, amount in rows:
+            bucket = totals.setdefault(timeseries.bucket_start(day, granularity), {'income': 0.0, 'expense': 0.0})
+            bucket[kind] += float(amount)
+        return [
+            (start_, round(totals.get(start_, {}).get('income', 0.0), 2),
+             round(totals.get(start_, {}).get('expense', 0.0), 2))
+            for start_ in timeseries.bucket_starts(start, end, granularity)
+        ]
+
+    def series(self, granularity, start, end):
+        return [(bucket['period_start'], bucket['income'], bucket['expenses'])
+                for bucket in timeseries.timeseries(self.user, granularity, start, end)]
+
+    def test_month_aligned_ranges_read_rollups(self):
+        with mock.patch.object(Transaction.objects, 'filter', side_effect=AssertionError('raw scan')):
+            series = self.series('quarter', date(2024, 1, 1), date(2024, 6, 30))
+        self.assertEqual(series, self.raw('quarter', date(2024, 1, 1), date(2024, 6, 30)))
+
+    def test_rollup_and_raw_paths_agree_after_bulk_writes(self):
+        rows = list(Transaction.objects.filter(user=self.user, category=self.food, date__day=28))
+        for row in rows:
+            row.amount += Decimal('0.25')
+            row.date = row.date.replace(day=2)
+        Transaction.objects.bulk_update(rows, ['amount', 'date'])
+        Transaction.objects.filter(user=self.user, date__month=3).delete()
+        Transaction.objects.filter(user=self.user, date__month=5, type='income').update(amount=Decimal('1200.00'))
+        self.assertRollupsMatch()
+
+        for granularity in ('month', 'quarter', 'year'):
+            aligned = self.series(granularity, date(2024, 1, 1), date(2024, 6, 30))
+            self.assertEqual(aligned, self.raw(granularity, date(2024, 1, 1), date(2024, 6, 30)), granularity)
+        # The same range scanned raw (not month aligned) sums to the same totals
+        unaligned = self.series('month', date(2024, 1, 1), date(2024, 6, 29))
+        self.assertEqual(unaligned, self.raw('month', date(2024, 1, 1), date(2024, 6, 29)))
+        self.assertEqual(
+            sum(expenses for _, _, expenses in self.series('year', date(2024, 1, 1), date(2024, 12, 31))),
+            float(Transaction.objects.filter(user=self.user, type='expense').aggregate(total=Sum('amount'))['total']),
+        )
+
+
+class TimeseriesEndpointTests(RollupTestCase):
+    def setUp(self):
+        # Rolled-back tests reuse user ids and data versions
+        response_cache._local.clear()
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, **params):
+        return self.client.get(URL, params)
+
+    def test_defaults_to_twelve_buckets_ending_today(self):
+        with mock.patch('django.utils.timezone.now', return_value=noon(2024, 5, 15)):
+            response = self.get(granularity='week')
+        self.assertEqual(response.status_code, 200)
+        buckets = response.data['buckets']
+        self.assertEqual(len(buckets), 12)
+        self.assertEqual(buckets[-1]['period_start'], date(2024, 5, 13))
+        self.assertEqual(buckets[0]['period_start'], date(2024, 2, 26))
+
+    def test_filters(self):
+        self.add(self.food, '10.00', date(2024, 1, 5))
+        self.add(self.rent, '500.00', date(2024, 1, 6))
+        self.add(self.salary, '900.00', date(2024, 1, 7))
+        params = {'granularity': 'month', 'start_date': '2024-01-01', 'end_date': '2024-01-31'}
+        self.assertEqual(self.get(**params, category=self.food.pk).data['buckets'][0]['expenses'], 10.0)
+        only_income = self.get(**params, type='income').data['buckets'][0]
+        self.assertEqual((only_income['income'], only_income['expenses']), (900.0, 0.0))
+
+    def test_rejects_bad_ranges(self):
+        for params in (
+            {'granularity': 'hour'},
+            {'start_date': '2024-13-01'},
+            {'start_date': '2024-02-01', 'end_date': '2024-01-01'},
+            {'granularity': 'day', 'start_date': '2000-01-01', 'end_date': '2024-01-01'},
+        ):
+            self.assertEqual(self.get(**params).status_code, 400, params)
+
+    def test_monthly_report_is_twelve_calendar_months(self):
+        self.add(self.food, '10.00', date(2024, 1, 31))
+        self.add(self.food, '20.00', date(2024, 3, 1))
+        with mock.patch('django.utils.timezone.now', return_value=noon(2024, 3, 31)):
+            response = self.client.get('/api/dashboard/monthly_report/')
+        months = [(row['month'], row['expenses']) for row in response.data]
+        self.assertEqual(len(months), 12)
+        self.assertEqual(months[0], ('April 2023', 0.0))
+        self.assertEqual(months[-3:], [('January 2024', 10.0), ('February 2024', 0.0), ('March 2024', 20.0)])
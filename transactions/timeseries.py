@@ -0,0 +1,112 @@
+"""
+Time-bucketed income/expense aggregation.
+
+Each series is computed with a single grouped query: month-aligned ranges at
+month/quarter/year granularity read the monthly rollups, everything else is one
+truncated GROUP BY over the raw transactions. Empty buckets are filled in Python.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncQuarter, TruncWeek, TruncYear
+
+from . import rollups
+
+GRANULARITIES = {
+    'day': (TruncDay, relativedelta(days=1)),
+    'week': (TruncWeek, relativedelta(weeks=1)),
+    'month': (TruncMonth, relativedelta(months=1)),
+    'quarter': (TruncQuarter, relativedelta(months=3)),
+    'year': (TruncYear, relativedelta(years=1)),
+}
+
+# Guard against accidental multi-decade daily series
+MAX_BUCKETS = 1000
+
+
+def bucket_start(value, granularity):
+    """Start of the bucket containing value, matching the database Trunc* functions"""
+    if granularity == 'day':
+        return value
+    if granularity == 'week':
+        return value - timedelta(days=value.weekday())
+    if granularity == 'month':
+        return value.replace(day=1)
+    if granularity == 'quarter':
+        return value.replace(month=3 * ((value.month - 1) // 3) + 1, day=1)
+    return value.replace(month=1, day=1)
+
+
+def bucket_label(start, granularity):
+    if granularity == 'day':
+        return start.strftime('%b %d, %Y')
+    if granularity == 'week':
+        return f"Week of {start.strftime('%b %d, %Y')}"
+    if granularity == 'month':
+        return start.strftime('%b %Y')
+    if granularity == 'quarter':
+        return f"Q{(start.month - 1) // 3 + 1} {start.year}"
+    return str(start.year)
+
+
+def bucket_starts(start_date, end_date, granularity):
+    """Every bucket start between the two dates, inclusive"""
+    step = GRANULARITIES[granularity][1]
+    current = bucket_start(start_date, granularity)
+    starts = []
+    while current <= end_date:
+        starts.append(current)
+        current += step
+    return starts
+
+
+def timeseries(user, granularity, start_date, end_date, category_id=None, type=None):
+    """
+    Income, expense and net per bucket between start_date and end_date.
+
+    Returns a list of dicts with period_start, period_end, label, income,
+    expenses and net, including zero-filled buckets.
+    """
+    from .models import MonthlyRollup, Transaction
+
+    trunc, step = GRANULARITIES[granularity]
+    filters = {}
+    if category_id:
+        filters['category_id'] = category_id
+    if type:
+        filters['type'] = type
+
+    months, edges = rollups.split_range(start_date, end_date)
+    if granularity in ('month', 'quarter', 'year') and months and not edges:
+        rows = MonthlyRollup.objects.filter(
+            user=user, month__gte=months[0], month__lte=months[1], **filters
+        ).order_by().annotate(bucket=trunc('month')).values('bucket', 'type').annotate(
+            sum_total=Sum('total')
+        )
+    else:
+        rows = Transaction.objects.filter(
+            user=user, date__gte=start_date, date__lte=end_date, **filters
+        ).order_by().annotate(bucket=trunc('date')).values('bucket', 'type').annotate(
+            sum_total=Sum('amount')
+        )
+
+    totals = {}
+    for row in rows:
+        bucket = totals.setdefault(row['bucket'], {'income': Decimal('0.00'), 'expense': Decimal('0.00')})
+        bucket[row['type']] += row['sum_total']
+
+    series = []
+    empty = {'income': Decimal('0.00'), 'expense': Decimal('0.00')}
+    for start in bucket_starts(start_date, end_date, granularity):
+        bucket = totals.get(start, empty)
+        series.append({
+            'period_start': start,
+            'period_end': start + step - timedelta(days=1),
+            'label': bucket_label(start, granularity),
+            'income': float(bucket['income']),
+            'expenses': float(bucket['expense']),
+            'net': float(bucket['income'] - bucket['expense']),
+        })
+    return series
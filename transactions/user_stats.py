@@ -0,0 +1,127 @@
+"""
+Maintained per-user statistics for the admin user list.
+
+UserStats keeps each user's transaction count, income, expense and net totals,
+category and budget counts and last transaction write. Transaction writes fold
+their rollup deltas in through apply_rollup_deltas(); category and budget
+creates / deletes adjust the counts from signals. The admin list then sorts
+and filters 100k users on one joined table instead of running five aggregates
+per user. rebuild() recomputes rows from raw data (migration backfill,
+repair_user_stats, and bulk writes whose effect is not known exactly).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+CENT = Decimal('0.01')
+
+
+def apply_rollup_deltas(deltas):
+    """Fold rollup deltas ({(user, category, type, month, currency): [amount, count]}) into UserStats"""
+    from .models import UserStats
+
+    by_user = defaultdict(lambda: {'income': Decimal('0.00'), 'expense': Decimal('0.00'), 'count': 0})
+    for (user_id, _, type, _, _), (amount, count) in deltas.items():
+        by_user[user_id]['income' if type == 'income' else 'expense'] += amount
+        by_user[user_id]['count'] += count
+
+    now = timezone.now()
+    missing = []
+    for user_id, change in by_user.items():
+        updated = UserStats.objects.filter(pk=user_id).update(
+            transaction_count=F('transaction_count') + change['count'],
+            total_income=F('total_income') + change['income'],
+            total_expenses=F('total_expenses') + change['expense'],
+            net_savings=F('net_savings') + change['income'] - change['expense'],
+            last_activity_at=now,
+        )
+        if not updated:
+            missing.append(user_id)
+    if missing:
+        rebuild(missing)
+
+
+def adjust(user_id, **counts):
+    """Add to category_count / budget_count for one user"""
+    from .models import UserStats
+
+    # No row means the user is being deleted (cascade order); nothing to keep
+    UserStats.objects.filter(pk=user_id).update(
+        **{field: F(field) + value for field, value in counts.items()}
+    )
+
+
+def stats_from_db(user_ids):
+    """{user_id: UserStats} recomputed from raw transactions, categories and budgets"""
+    from .models import Budget, Category, Transaction, UserStats
+
+    stats = {user_id: UserStats(user_id=user_id) for user_id in user_ids}
+    for row in Transaction.objects.filter(user_id__in=user_ids).order_by().values('user_id', 'type').annotate(
+        row_count=Count('id'), sum_total=Sum('amount')
+    ):
+        entry = stats[row['user_id']]
+        entry.transaction_count += row['row_count']
+        total = Decimal(row['sum_total']).quantize(CENT)
+        if row['type'] == 'income':
+            entry.total_income += total
+        else:
+            entry.total_expenses += total
+    for model, field in ((Category, 'category_count'), (Budget, 'budget_count')):
+        for row in model.objects.filter(user_id__in=user_ids).order_by().values('user_id').annotate(rows=Count('id')):
+            setattr(stats[row['user_id']], field, row['rows'])
+    for entry in stats.values():
+        entry.net_savings = entry.total_income - entry.total_expenses
+    return stats
+
+
+def rebuild(user_ids=None, batch_size=1000):
+    """Recompute UserStats for the given users (every user when None); returns the row count"""
+    from .models import UserStats
+
+    users = get_user_model().objects.order_by('pk')
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    activity = dict(UserStats.objects.filter(
+        last_activity_at__isnull=False, **({'pk__in': user_ids} if user_ids is not None else {})
+    ).values_list('pk', 'last_activity_at'))
+
+    ids = list(users.values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        batch = stats_from_db(ids[start:start + batch_size])
+        for user_id, entry in batch.items():
+            entry.last_activity_at = activity.get(user_id)
+        UserStats.objects.bulk_create(
+            batch.values(), update_conflicts=True, unique_fields=['user'],
+            update_fields=['transaction_count', 'total_income', 'total_expenses', 'net_savings',
+                           'category_count', 'budget_count', 'last_activity_at'],
+        )
+    return len(ids)
+
+
+def user_created(sender, instance, created=False, raw=False, **kwargs):
+    """post_save receiver for the user model"""
+    from .models import UserStats
+
+    if created and not raw:
+        UserStats.objects.get_or_create(user_id=instance.pk)
+
+
+def category_saved(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        adjust(instance.user_id, category_count=1)
+
+
+def category_deleted(sender, instance, **kwargs):
+    adjust(instance.user_id, category_count=-1)
+
+
+def budget_saved(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        adjust(instance.user_id, budget_count=1)
+
+
+def budget_deleted(sender, instance, **kwargs):
+    adjust(instance.user_id, budget_count=-1)
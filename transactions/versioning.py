@@ -0,0 +1,60 @@
+"""
+Per-user data versions.
+
+DataVersion holds a counter per user that is bumped by every write to the
+user's transactions, categories, budgets and recurring transactions, inside
+the same database transaction as the write. Anything derived from a user's
+data can key itself on (user, version): the versioned response cache and the
+chat snapshot use it, so stale entries are never served in any process and
+nothing has to be deleted, and a reader never sees a new version alongside
+old rows.
+"""
+from django.db.models import F
+from django.utils import timezone
+
+
+def bump(user_ids, create=True):
+    """Advance the data version of the given users (creating missing rows unless create=False)"""
+    from .models import DataVersion
+
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+
+    now = timezone.now()
+    updated = DataVersion.objects.filter(user_id__in=user_ids).update(
+        version=F('version') + 1, changed_at=now
+    )
+    if create and updated < len(user_ids):
+        # Rows are created with each user; this covers any without one, past the implied version 1
+        DataVersion.objects.bulk_create(
+            [DataVersion(user_id=user_id, version=2, changed_at=now) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+
+
+def data_changed(user_ids):
+    """Hook for every write to user data; derived caches and indexes compare versions to catch up"""
+    bump(user_ids)
+
+
+def current(user_id):
+    """(version, changed_at) for a user with one primary-key lookup; (1, None) if never written"""
+    from .models import DataVersion
+
+    row = DataVersion.objects.filter(user_id=user_id).values_list('version', 'changed_at').first()
+    return row or (1, None)
+
+
+def user_created(sender, instance, created=False, raw=False, **kwargs):
+    """post_save receiver for the user model"""
+    from .models import DataVersion
+
+    if created and not raw:
+        DataVersion.objects.get_or_create(user_id=instance.pk)
+
+
+def instance_changed(sender, instance, **kwargs):
+    """post_save / post_delete receiver for models owned by a user"""
+    # Never create rows here: a cascade delete of the user may already have removed theirs
+    bump([instance.user_id], create=False)